@@ -1,50 +1,297 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from functools import wraps
 from src.services.weather_service import WeatherService
 from src.services.recomendacao_service import RecomendacaoService
+from src.services.indicator_service import IndicatorService
+from src.services.planning_service import PlanningService
+from src.services.sensor_service import SensorService
+from src.services.weather_scheduler import WeatherScheduler
+from src.services.auth_service import TokenService
+from src.services.socket_queue import socketio_queue_options
+from src.services.weather_broadcaster import WeatherBroadcaster
 from src.storage.users import UserStore
+from src.utils.file_lock import FileLock
+from src.utils.http_cache import COMPRESS_MIN_SIZE, ResponseCache, compress, negotiate_encoding
 from src.utils.logger import setup_logger
+from src.utils.metrics import REGISTRY
+from src.utils.password_verifier import VerificationBusy
+from src.utils.rate_limit import KeyedRateLimiter
+from src.utils.rollups import RESOLUTIONS
+from src.utils.time_utils import to_epoch
+import atexit
+import math
+import os
 import threading
 import time
 
 # inicialização da aplicação Flask
 app = Flask(__name__)
 CORS(app)
-socketio = SocketIO(app, cors_allowed_origins="*")  # Configuração do socketio para comunicação em tempo real
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=os.getenv('SOCKETIO_ASYNC_MODE') or None,
+                    serializer=os.getenv('SOCKETIO_SERIALIZER', 'default'),
+                    **socketio_queue_options())  # Configuração do socketio para comunicação em tempo real (e entre processos)
 logger = setup_logger()
 
+# número máximo de entradas devolvidas por pedido de histórico
+HISTORY_MAX_LIMIT = int(os.getenv('HISTORY_MAX_LIMIT', 10000))
+
+# tamanho máximo (bytes) de um pedido de ingestão de leituras dos sensores
+SENSOR_MAX_BODY = int(os.getenv('SENSOR_MAX_BODY', 8 * 1024 * 1024))
+
+# tentativas de login admitidas por minuto (e rajada) por endereço IP e por utilizador; 0 desativa
+login_ip_limiter = KeyedRateLimiter(
+    float(os.getenv('LOGIN_RATE_PER_IP', 30)) / 60.0, float(os.getenv('LOGIN_BURST_PER_IP', 10))
+)
+login_user_limiter = KeyedRateLimiter(
+    float(os.getenv('LOGIN_RATE_PER_USER', 10)) / 60.0, float(os.getenv('LOGIN_BURST_PER_USER', 5))
+)
+
+# com outro servidor WSGI (flask run, gunicorn) a recolha arranca no primeiro pedido de cada processo
+SCHEDULER_AUTOSTART = os.getenv('SCHEDULER_AUTOSTART', 'true').lower() not in ('0', 'false', 'no')
+
+# atrás de um proxy o endereço do cliente vem do X-Forwarded-For
+TRUST_PROXY_HEADERS = os.getenv('TRUST_PROXY_HEADERS', 'false').lower() in ('1', 'true', 'yes')
+
 # inicialização dos serviços
 weather_service = WeatherService(socketio) 
-recomendacao_service = RecomendacaoService()  
+
+# com estado partilhado (sqlite) um único processo faz a recolha para todos; com estado em memória cada
+# processo tem o seu snapshot, por isso só um processo é admitido (o trinco recusa os restantes)
+SHARED_STATE = os.getenv('STATE_BACKEND', 'memory').lower() == 'sqlite'
+scheduler_lock = FileLock(os.getenv('SCHEDULER_LOCK_FILE', os.path.join('data', 'scheduler.lock')))
+weather_scheduler = WeatherScheduler(weather_service, leader_lock=scheduler_lock if SHARED_STATE else None)
+single_process_lock = None if SHARED_STATE else scheduler_lock
+recomendacao_service = RecomendacaoService(locations=weather_service.locations)
+planning_service = PlanningService(weather_service, recomendacao_service)
+sensor_service = SensorService(weather_service.locations, snapshots=weather_service.snapshots)
+indicator_service = IndicatorService(weather_service)
 user_store = UserStore()  
+token_service = TokenService(user_store)
+
+# eventos enviados apenas pelo agendador, só quando a observação muda e só para a sala da parcela
+weather_broadcaster = WeatherBroadcaster(socketio)
+weather_scheduler.add_listener(weather_broadcaster.publish)
+
+# cada observação guardada é enviada ao histórico (incluindo as que não mudam)
+weather_scheduler.add_listener(weather_broadcaster.publish_history)
+
+# alertas avaliados uma vez por observação; cada nova notificação é enviada uma única vez
+recomendacao_service.alert_engine.on_notification = weather_broadcaster.publish_notification
+weather_scheduler.add_listener(recomendacao_service.evaluate_alerts)
+
+# graus-dia e risco de míldio atualizados de forma incremental com cada observação
+weather_scheduler.add_listener(indicator_service.update)
+
+# indicadores retomados do último ponto gravado antes da primeira recolha, só no processo que a faz
+weather_scheduler.add_leader_task(indicator_service.restore)
+
+# métricas por rota (modelo da rota, não o caminho, para limitar o número de séries)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() not in ('0', 'false', 'no')
+HTTP_REQUESTS = REGISTRY.counter(
+    'agrosmart_http_requests_total', 'HTTP requests by method, route and status', ('method', 'route', 'status')
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    'agrosmart_http_request_seconds', 'HTTP request latency by method and route', ('method', 'route')
+)
+
+# indicadores calculados só quando /metrics é lido (sem custo nos pedidos)
+REGISTRY.gauge(
+    'agrosmart_active_notifications', 'Unacknowledged notifications by severity', ('severity',)
+).set_function(lambda: recomendacao_service.notification_service.store.counts())
+REGISTRY.gauge(
+    'agrosmart_weather_snapshots', 'Locations with a published weather snapshot'
+).set_function(lambda: sum(1 for key in weather_service.snapshots.keys() if ':' not in key))
+REGISTRY.gauge(
+    'agrosmart_response_cache_entries', 'Serialized responses held in the response cache'
+).set_function(lambda: len(response_cache))
+REGISTRY.gauge(
+    'agrosmart_scheduler_consecutive_failures', 'Consecutive failed weather polls'
+).set_function(lambda: weather_scheduler.failures)
+REGISTRY.gauge(
+    'agrosmart_openweather_circuit_open', 'OpenWeather circuit breaker state (0 closed, 0.5 half-open, 1 open)'
+).set_function(lambda: {'closed': 0, 'half-open': 0.5, 'open': 1}[weather_service.client.circuit_breaker.state])
+
+# tarefas em segundo plano iniciadas uma única vez por processo
+_background_started = False
+_background_lock = threading.Lock()
+
+@app.before_request
+def ensure_background_tasks():
+
+    # com vários processos o trinco do agendador garante que só um faz a recolha
+    if SCHEDULER_AUTOSTART and not _background_started:
+        start_background_tasks()
+
+@app.before_request
+def start_request_timer():
+    if METRICS_ENABLED:
+        g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+        HTTP_LATENCY.observe(time.perf_counter() - started, method=request.method, route=route)
+    return response
+
+# identifica o utilizador do pedido: token Bearer (HMAC) ou, em alternativa, Basic auth
+def authenticate_request():
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return token_service.verify_token(header[7:].strip())
+    auth = request.authorization
+    if auth and user_store.verify_user(auth.username, auth.password):
+        return auth.username
+    return None
+
+# verifica o parâmetro opcional ?location=<id> (None corresponde à parcela predefinida)
+def is_known_location(location_id):
+    return location_id is None or weather_service.locations.get(location_id) is not None
+
+# respostas JSON já serializadas e comprimidas, por rota e versão dos dados
+response_cache = ResponseCache()
+
+def latest_weather_version(location_id):
+
+    # versão da última observação; antes da primeira espera por ela (como get_latest_weather)
+    version = weather_service.get_weather_version(location_id)
+    if version == 0 and weather_service.get_latest_weather(location_id) is not None:
+        version = weather_service.get_weather_version(location_id)
+    return version
+
+def cached_json_response(body):
+
+    # ETag forte por codificação; se o cliente já tem a representação responde 304 sem corpo
+    encoding = negotiate_encoding(request.accept_encodings) if body.encoded else None
+    if any(request.if_none_match.contains(etag) for etag in body.etags()):
+        response = Response(status=304)
+    else:
+        response = Response(body.encoded[encoding] if encoding else body.data, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(body.etag(encoding))
+    response.vary.add('Accept-Encoding')
+    return response
+
+# comprime as restantes respostas JSON quando o cliente aceita (as rotas com cache já vêm comprimidas)
+@app.after_request
+def compress_response(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers):
+        return response
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None or (response.content_length or 0) < COMPRESS_MIN_SIZE:
+        return response
+    response.set_data(compress(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+# notificações ativas (geradas pelo motor de alertas), opcionalmente de uma parcela
+def active_notifications(location_id=None, severity=None):
+    notifications = recomendacao_service.notification_service.get_active_notifications(severity)
+    if location_id is not None:
+        notifications = [n for n in notifications if n.get('location') == location_id]
+    return notifications
+
+# endereço do cliente usado nos limites de login
+def client_address():
+    if TRUST_PROXY_HEADERS and request.access_route:
+        return request.access_route[0]
+    return request.remote_addr
+
+# resposta de recusa com o tempo sugerido para nova tentativa
+def retry_later(message, status, retry_after):
+    response = jsonify({"message": message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+def too_busy():
+    return retry_later("Too many password checks in progress, try again later", 503, 1)
 
 # decorador para exigir autenticação nas rotas
 def require_auth(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        auth = request.authorization
-        if not auth or not user_store.verify_user(auth.username, auth.password):
+        try:
+            username = authenticate_request()
+        except VerificationBusy:
+            return too_busy()
+        if username is None:
             return jsonify({"message": "Authentication required"}), 401
         return f(*args, **kwargs)
     return decorated
 
-# rota para autenticação de utilizadores
+# rota de verificação do estado do servidor (sem autenticação)
+@app.route('/api/health', methods=['GET'])
+def health():
+    return jsonify({
+        "status": "ok",
+        "async_mode": socketio.async_mode,
+        "scheduler_running": weather_scheduler.is_running(),
+        "scheduler_leader": weather_scheduler.is_leader(),
+        "pid": os.getpid()
+    })
+
+# rota com as métricas no formato de texto do Prometheus (sem autenticação, como /api/health)
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    if not METRICS_ENABLED:
+        return jsonify({"message": "Metrics disabled"}), 404
+    return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# rota para autenticação de utilizadores (devolve um token assinado para os pedidos seguintes)
 @app.route('/api/login', methods=['POST'])
 def login():
     auth = request.authorization
-    if not auth or not user_store.verify_user(auth.username, auth.password):
+    if not auth:
         return jsonify({"message": "Invalid credentials"}), 401
-    return jsonify({"message": "Login successful"}), 200
+
+    # admissão antes do PBKDF2: por endereço IP (todas as tentativas) e por utilizador (só as falhadas)
+    retry_after = login_ip_limiter.try_acquire(client_address()) or login_user_limiter.retry_after(auth.username)
+    if retry_after:
+        return retry_later("Too many login attempts", 429, retry_after)
+    try:
+        valid = user_store.verify_user(auth.username, auth.password)
+    except VerificationBusy:
+        return too_busy()
+    if not valid:
+        login_user_limiter.try_acquire(auth.username)
+        return jsonify({"message": "Invalid credentials"}), 401
+    return jsonify({
+        "message": "Login successful",
+        "token": token_service.issue_token(auth.username),
+        "expires_in": token_service.ttl
+    }), 200
+
+# rota para listar as parcelas monitorizadas
+@app.route('/api/locations', methods=['GET'])
+@require_auth
+def get_locations():
+    return jsonify(weather_service.locations.all())
 
 # rota para obter dados meteorológicos atuais
 @app.route('/api/weather', methods=['GET'])
 @require_auth
 def get_weather():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
     try:
-        weather_data = weather_service.get_current_weather()
-        return jsonify(weather_data)
+        version = latest_weather_version(location_id)
+        if version == 0:
+            return jsonify({"error": "Weather data not yet available"}), 503
+
+        # corpo serializado e comprimido uma vez por observação
+        body = response_cache.get(
+            ('weather', location_id, version), lambda: weather_service.get_latest_weather(location_id, timeout=0)
+        )
+        return cached_json_response(body)
     except Exception as e:
         logger.error(f"Error getting weather data: {str(e)}")
         return jsonify({"error": "Failed to fetch weather data"}), 500
@@ -54,42 +301,251 @@ def get_weather():
 @app.route('/api/recommendations', methods=['GET'])
 @require_auth
 def get_recommendations():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
     try:
-        weather_data = weather_service.get_current_weather()
-        recommendations = recomendacao_service.get_recommendation(weather_data)
-        return jsonify(recommendations)
+        version = latest_weather_version(location_id)
+        if version == 0:
+            return jsonify({"error": "Weather data not yet available"}), 503
+
+        # só recalcula (e serializa) quando a observação, as condições de campo ou as regras mudam
+        resolved_id = location_id or weather_service.locations.get()['id']
+        rule_set = recomendacao_service.get_rule_set(resolved_id)
+        conditions = sensor_service.get_conditions(resolved_id)
+        body = response_cache.get(
+            ('recommendations', location_id, version, recomendacao_service.rules.version, rule_set.name,
+             tuple(sorted(conditions.items()))),
+            lambda: recomendacao_service.get_snapshot_recommendation(
+                weather_service.get_latest_weather(location_id, timeout=0), version, conditions
+            )
+        )
+        return cached_json_response(body)
     except Exception as e:
         logger.error(f"Error getting recommendations: {str(e)}")
         return jsonify({"error": "Failed to generate recommendations"}), 500
     
 
+# secções disponíveis no painel (sem `fields` devolve as quatro primeiras)
+DASHBOARD_FIELDS = ('weather', 'recommendations', 'notifications', 'history', 'irrigation_plan', 'indicators')
+DASHBOARD_DEFAULT_FIELDS = DASHBOARD_FIELDS[:4]
+
+# rota do painel: uma autenticação e uma única observação para todas as secções
+@app.route('/api/dashboard', methods=['GET'])
+@require_auth
+def get_dashboard():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
+    fields = request.args.get('fields')
+    fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else list(DASHBOARD_DEFAULT_FIELDS)
+    unknown = [f for f in fields if f not in DASHBOARD_FIELDS]
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown)}; use: {', '.join(DASHBOARD_FIELDS)}"}), 400
+    try:
+        dashboard = {}
+
+        # observação lida uma vez (sem I/O); as recomendações usam a mesma
+        weather_data = None
+        if 'weather' in fields or 'recommendations' in fields:
+            version = weather_service.get_weather_version(location_id)
+            weather_data = weather_service.get_latest_weather(location_id)
+        if 'weather' in fields:
+            dashboard['weather'] = weather_data
+        if 'recommendations' in fields:
+            dashboard['recommendations'] = (
+                recomendacao_service.get_snapshot_recommendation(
+                    weather_data, version, sensor_service.get_conditions(weather_data['location'])
+                ) if weather_data is not None else None
+            )
+        if 'notifications' in fields:
+            dashboard['notifications'] = active_notifications(location_id, request.args.get('severity', None))
+        if 'history' in fields:
+            limit = max(1, min(request.args.get('history_limit', 24, type=int), HISTORY_MAX_LIMIT))
+            dashboard['history'] = weather_service.get_weather_history(
+                limit=limit, location_id=location_id or weather_service.locations.get()['id']
+            )
+        if 'irrigation_plan' in fields:
+            dashboard['irrigation_plan'] = planning_service.get_plan(location_id)
+        if 'indicators' in fields:
+            dashboard['indicators'] = indicator_service.get_indicators(
+                location_id or weather_service.locations.get()['id']
+            )
+        return jsonify(dashboard)
+    except Exception as e:
+        logger.error(f"Error getting dashboard: {str(e)}")
+        return jsonify({"error": "Failed to build dashboard"}), 500
+
+# rota com os indicadores agronómicos (graus-dia, horas húmidas e risco de míldio) e as recomendações atuais
+@app.route('/api/indicators', methods=['GET'])
+@require_auth
+def get_indicators():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
+    try:
+        resolved_id = location_id or weather_service.locations.get()['id']
+        indicators = indicator_service.get_indicators(resolved_id)
+        if indicators is None:
+            return jsonify({"error": "Indicators not yet available"}), 503
+        weather_data = weather_service.get_latest_weather(location_id, timeout=0)
+        recommendations = recomendacao_service.get_snapshot_recommendation(
+            weather_data, weather_service.get_weather_version(location_id), sensor_service.get_conditions(resolved_id)
+        ) if weather_data is not None else None
+        return jsonify({"location": resolved_id, "indicators": indicators, "recommendations": recommendations})
+    except Exception as e:
+        logger.error(f"Error getting indicators: {str(e)}")
+        return jsonify({"error": "Failed to fetch indicators"}), 500
+
+# rota com o plano de rega para os próximos dias (calculado uma vez por previsão e versão das regras)
+@app.route('/api/irrigation-plan', methods=['GET'])
+@require_auth
+def get_irrigation_plan():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
+    days = request.args.get('days', type=int)
+    if days is not None and days < 1:
+        return jsonify({"error": "Invalid 'days' parameter"}), 400
+    try:
+        plan = planning_service.get_plan(location_id, days)
+        if plan is None:
+            return jsonify({"error": "Forecast not yet available"}), 503
+        return jsonify(plan)
+    except Exception as e:
+        logger.error(f"Error getting irrigation plan: {str(e)}")
+        return jsonify({"error": "Failed to generate irrigation plan"}), 500
+
 # rota para obter histórico de dados meteorológicos
 @app.route('/api/history/weather', methods=['GET'])
 @require_auth
 def get_weather_history():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
+    try:
+        start = to_epoch(request.args.get('from'))
+        end = to_epoch(request.args.get('to'))
+        since = to_epoch(request.args.get('since'))
+    except ValueError:
+        return jsonify({"error": "Invalid 'from'/'to'/'since' parameter"}), 400
     try:
-        history = weather_service.get_weather_history()
-        return jsonify(history)
+
+        # sem parcela usa a predefinida (como as restantes rotas), sem misturar o histórico de todas
+        location_id = location_id or weather_service.locations.get()['id']
+
+        # sem intervalo devolve as últimas 24 entradas; com intervalo ou cursor aplica o limite máximo
+        default_limit = 24 if start is None and end is None and since is None else HISTORY_MAX_LIMIT
+        limit = max(1, min(request.args.get('limit', default_limit, type=int), HISTORY_MAX_LIMIT))
+
+        # corpo guardado por versão do histórico e parâmetros: sem novas observações não há consulta
+        body = response_cache.get(
+            ('history', weather_service.get_history_version(), location_id, limit, start, end, since),
+            lambda: weather_service.get_weather_history(
+                limit=limit, start=start, end=end, after=since, location_id=location_id
+            )
+        )
+        return cached_json_response(body)
     except Exception as e:
         logger.error(f"Error getting weather history: {str(e)}")
         return jsonify({"error": "Failed to fetch weather history"}), 500
     
-# função para atualização periódica dos dados meteorológicos
-def background_weather_updates():
-    while True:
-        weather_data = weather_service.get_current_weather()
-        time.sleep(20)
+# rota para obter o histórico agregado (mín/máx/média por 5 min, hora ou dia)
+@app.route('/api/history/weather/aggregate', methods=['GET'])
+@require_auth
+def get_weather_aggregates():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
+    resolution = request.args.get('resolution', '1h')
+    if resolution not in RESOLUTIONS:
+        return jsonify({"error": f"Invalid resolution, use one of: {', '.join(RESOLUTIONS)}"}), 400
+    try:
+        start = to_epoch(request.args.get('from'))
+        end = to_epoch(request.args.get('to'))
+    except ValueError:
+        return jsonify({"error": "Invalid 'from'/'to' parameter"}), 400
+    try:
+        limit = max(1, min(request.args.get('limit', HISTORY_MAX_LIMIT, type=int), HISTORY_MAX_LIMIT))
+        aggregates = weather_service.get_weather_aggregates(
+            resolution=resolution, start=start, end=end, limit=limit,
+            location_id=location_id or weather_service.locations.get()['id']
+        )
+        return jsonify(aggregates)
+    except Exception as e:
+        logger.error(f"Error getting weather aggregates: {str(e)}")
+        return jsonify({"error": "Failed to fetch weather aggregates"}), 500
+
+# rota de ingestão em lote das leituras dos sensores de campo (JSON ou protocolo de linhas)
+@app.route('/api/sensors/readings', methods=['POST'])
+@require_auth
+def ingest_sensor_readings():
+    if request.content_length is not None and request.content_length > SENSOR_MAX_BODY:
+        return jsonify({"error": f"Request body larger than {SENSOR_MAX_BODY} bytes"}), 413
+    try:
+        if request.mimetype == 'application/json':
+            batch = sensor_service.parse_json(request.get_json(silent=True))
+        else:
+            batch = sensor_service.parse_lines(request.get_data(as_text=True))
+    except OverflowError as e:
+        return jsonify({"error": str(e)}), 413
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    try:
+
+        # leituras aceites ficam em memória e são escritas em lote; as rejeitadas vêm indicadas na resposta
+        result = sensor_service.ingest(batch)
+        return jsonify(result), 400 if result['rejected'] and not result['accepted'] else 202
+    except Exception as e:
+        logger.error(f"Error ingesting sensor readings: {str(e)}")
+        return jsonify({"error": "Failed to ingest sensor readings"}), 500
+
+# rota com a última leitura de cada grandeza e as condições usadas nas recomendações
+@app.route('/api/sensors/latest', methods=['GET'])
+@require_auth
+def get_sensor_latest():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
+    location_id = location_id or weather_service.locations.get()['id']
+    return jsonify({
+        "location": location_id,
+        "readings": sensor_service.get_latest(location_id),
+        "conditions": sensor_service.get_conditions(location_id)
+    })
+
+# rota para obter o histórico das leituras dos sensores
+@app.route('/api/history/sensors', methods=['GET'])
+@require_auth
+def get_sensor_history():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
+    try:
+        start = to_epoch(request.args.get('from'))
+        end = to_epoch(request.args.get('to'))
+    except ValueError:
+        return jsonify({"error": "Invalid 'from'/'to' parameter"}), 400
+    try:
+        default_limit = 100 if start is None and end is None else HISTORY_MAX_LIMIT
+        limit = max(1, min(request.args.get('limit', default_limit, type=int), HISTORY_MAX_LIMIT))
+        return jsonify(sensor_service.get_readings(
+            location_id or weather_service.locations.get()['id'], sensor=request.args.get('sensor'),
+            start=start, end=end, limit=limit
+        ))
+    except Exception as e:
+        logger.error(f"Error getting sensor history: {str(e)}")
+        return jsonify({"error": "Failed to fetch sensor history"}), 500
 
 # rota para obter notificações ativas
 @app.route('/api/notifications', methods=['GET'])
 @require_auth
 def get_notifications():
+    location_id = request.args.get('location')
+    if not is_known_location(location_id):
+        return jsonify({"error": "Unknown location"}), 404
     try:
-        severity = request.args.get('severity', None)
-        weather_data = weather_service.get_current_weather()
-        recomendacao_service.get_recommendation(weather_data)
-        notifications = recomendacao_service.notification_service.get_active_notifications(severity)
-        return jsonify(notifications)
+        return jsonify(active_notifications(location_id, request.args.get('severity', None)))
     except Exception as e:
         logger.error(f"Error getting notifications: {str(e)}")
         return jsonify({"error": "Failed to fetch notifications"}), 500
@@ -105,6 +561,18 @@ def clear_notifications():
         logger.error(f"Error clearing notifications: {str(e)}")
         return jsonify({"error": "Failed to clear notifications"}), 500
 
+# rota para confirmar uma notificação (deixa de aparecer nas ativas)
+@app.route('/api/notifications/<notification_id>/ack', methods=['POST'])
+@require_auth
+def acknowledge_notification(notification_id):
+    try:
+        if not recomendacao_service.notification_service.acknowledge_notification(notification_id):
+            return jsonify({"error": "Notification not found"}), 404
+        return jsonify({"message": "Notification acknowledged successfully"})
+    except Exception as e:
+        logger.error(f"Error acknowledging notification: {str(e)}")
+        return jsonify({"error": "Failed to acknowledge notification"}), 500
+
 # rota para apagar uma notificação específica
 @app.route('/api/notifications/<notification_id>', methods=['DELETE'])
 @require_auth
@@ -116,13 +584,66 @@ def delete_notification(notification_id):
         logger.error(f"Error deleting notification: {str(e)}")
         return jsonify({"error": "Failed to delete notification"}), 500
 
-# inicia a tarefa de atualização em segundo plano
-@app.before_first_request
-def start_background_task():
-    thread = threading.Thread(target=background_weather_updates)
-    thread.daemon = True
-    thread.start()
+# subscrição das atualizações de uma parcela (sem parcela: a predefinida)
+@socketio.on('subscribe')
+def on_subscribe(data=None):
+    location_id = (data or {}).get('location') or weather_service.locations.get()['id']
+    if not is_known_location(location_id):
+        return {"error": "Unknown location"}
+    join_room(WeatherBroadcaster.room(location_id))
+
+    # envia de imediato ao novo subscritor a última observação conhecida
+    latest = weather_service.get_latest_weather(location_id, timeout=0)
+    if latest is not None:
+        emit('weather_update', latest)
+    return {"location": location_id}
+
+@socketio.on('unsubscribe')
+def on_unsubscribe(data=None):
+    location_id = (data or {}).get('location') or weather_service.locations.get()['id']
+    leave_room(WeatherBroadcaster.room(location_id))
+    return {"location": location_id}
+
+# escreve as leituras de sensores pendentes mesmo quando deixam de chegar lotes
+def flush_sensor_readings():
+    while True:
+        socketio.sleep(sensor_service.store.flush_interval)
+        try:
+            if sensor_service.store.flush_due():
+                sensor_service.flush()
+        except Exception as e:
+            logger.error(f"Error flushing sensor readings: {str(e)}")
+
+# inicia a recolha periódica de dados meteorológicos (única origem de chamadas à API)
+def start_background_tasks():
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return False
+        if single_process_lock is not None and not single_process_lock.try_acquire():
+            logger.critical("Another process is already serving with STATE_BACKEND=memory")
+            raise RuntimeError("STATE_BACKEND=memory supports a single process; "
+                               "use STATE_BACKEND=sqlite (e.g. launcher.py) for multiple workers")
+        _background_started = True
+    weather_scheduler.start()
+    socketio.start_background_task(flush_sensor_readings)
+    atexit.register(stop_background_tasks)
+    return True
+
+# para a recolha periódica de forma limpa (e escreve as leituras de sensores pendentes)
+def stop_background_tasks():
+    weather_scheduler.stop()
+    sensor_service.store.flush()
+    indicator_service.stop()
+    if single_process_lock is not None:
+        single_process_lock.release()
 
 # ponto de entrada do programa
 if __name__ == '__main__':
-    socketio.run(app, debug=True)
\ No newline at end of file
+
+    debug = os.getenv('FLASK_ENV', 'development') == 'development'
+
+    # com o reloader ativo, só o processo filho deve iniciar o agendador
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
+    socketio.run(app, debug=debug)
\ No newline at end of file
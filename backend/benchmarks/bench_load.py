@@ -0,0 +1,134 @@
+# cliente de carga cooperativo: muitos pedidos em simultâneo com poucas threads do sistema
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import requests
+from harness import add_result_arguments, finish, summarize
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"server did not become ready: {url}")
+
+
+def spawn(workdir, stub_latency, extra_env=None):
+
+    # OpenWeather simulado e servidor de produção (server.py) numa pasta de dados temporária
+    stub_port, server_port = free_port(), free_port()
+    stub = subprocess.Popen(
+        [sys.executable, os.path.join(BACKEND_DIR, 'benchmarks', 'stub_openweather.py'),
+         '--port', str(stub_port), '--latency', str(stub_latency)],
+        stdout=subprocess.DEVNULL
+    )
+    env = dict(
+        os.environ,
+        OPENWEATHER_BASE_URL=f"http://127.0.0.1:{stub_port}/data/2.5",
+        OPENWEATHER_API_KEY='benchmark',
+        SERVER_HOST='127.0.0.1',
+        SERVER_PORT=str(server_port),
+        LOG_LEVEL='WARNING'
+    )
+    env.update(extra_env or {})
+    server = subprocess.Popen([sys.executable, os.path.join(BACKEND_DIR, 'server.py')], cwd=workdir, env=env)
+    base_url = f"http://127.0.0.1:{server_port}"
+    wait_ready(f"{base_url}/api/health")
+    return base_url, [server, stub]
+
+
+def login(base_url, username, password):
+
+    # obtém um token para os pedidos autenticados
+    response = requests.post(f"{base_url}/api/login", auth=(username, password), timeout=10)
+    response.raise_for_status()
+    return response.json()['token']
+
+
+def run(base_url, paths, concurrency, duration, token):
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    def worker(index):
+        nonlocal errors
+        session = requests.Session()
+        headers = {'Authorization': f"Bearer {token}"} if token else {}
+        i = index
+        while time.monotonic() < deadline:
+            path = paths[i % len(paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                response = session.get(f"{base_url}{path}", headers=headers, timeout=30)
+                if response.status_code >= 500:
+                    errors += 1
+            except requests.RequestException:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    # cada cliente é uma greenthread com a sua própria ligação keep-alive
+    pool = eventlet.GreenPool(concurrency)
+    started = time.monotonic()
+    for index in range(concurrency):
+        pool.spawn(worker, index)
+    pool.waitall()
+    elapsed = time.monotonic() - started
+
+    return dict(summarize(latencies, elapsed), errors=errors)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Concurrent load test for the AGROSMART API')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--spawn', action='store_true',
+                        help='start server.py and a stub OpenWeather API in a temporary data folder (ignores --url)')
+    parser.add_argument('--stub-latency', type=float, default=0.05, help='seconds added by the stub to each API call')
+    parser.add_argument('--path', action='append', dest='paths',
+                        help='endpoint to request (repeatable); defaults to health, weather, recommendations and history')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    paths = args.paths or ['/api/health', '/api/weather', '/api/recommendations', '/api/history/weather?limit=24']
+    processes = []
+    workdir = tempfile.TemporaryDirectory()
+    try:
+        base_url = args.url
+        if args.spawn:
+            base_url, processes = spawn(workdir.name, args.stub_latency)
+        token = login(base_url, args.username, args.password)
+        result = run(base_url, paths, args.concurrency, args.duration, token)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(10)
+        workdir.cleanup()
+
+    print(f"concurrency: {args.concurrency}  duration: {args.duration:.0f}s  paths: {', '.join(paths)}")
+    print(f"requests: {result['count']}  errors: {result['errors']}  rps: {result['ops']:.0f}")
+    print(f"latency p50: {result['p50'] * 1000:.1f} ms  p99: {result['p99'] * 1000:.1f} ms  max: {result['max'] * 1000:.1f} ms")
+    finish({f"load[{args.concurrency}]": result}, args.save, args.baseline, args.tolerance)
@@ -0,0 +1,85 @@
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+import time
+
+# permite executar a partir da pasta backend: python benchmarks/bench_logging.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.logger import JsonFormatter
+
+
+def file_handler(path):
+    handler = logging.handlers.TimedRotatingFileHandler(path, when='midnight', backupCount=14, encoding='utf-8')
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def measure(logger, count):
+
+    # duração de cada chamada do ponto de vista de quem regista (média, p99 e máximo)
+    timings = []
+    for i in range(count):
+        started = time.perf_counter()
+        logger.info("Weather data saved successfully (%d rows)", i)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+    return sum(timings) / count, timings[int(0.99 * (count - 1))], timings[-1]
+
+
+def report(label, result):
+    mean, p99, maximum = result
+    return f"{label:<24} mean {mean * 1e6:8.2f} us  p99 {p99 * 1e6:8.2f} us  max {maximum * 1e6:9.2f} us"
+
+
+def run(count):
+    with tempfile.TemporaryDirectory() as tmp:
+
+        # escrita síncrona: a thread que regista faz a formatação e a escrita em disco
+        direct = logging.getLogger('bench.direct')
+        direct.propagate = False
+        direct.setLevel(logging.INFO)
+        direct.addHandler(file_handler(os.path.join(tmp, 'direct.log')))
+        direct_time = measure(direct, count)
+
+        # fila em memória: a escrita passa para a thread do QueueListener
+        queued = logging.getLogger('bench.queue')
+        queued.propagate = False
+        queued.setLevel(logging.INFO)
+        log_queue = queue.SimpleQueue()
+        listener = logging.handlers.QueueListener(log_queue, file_handler(os.path.join(tmp, 'queue.log')))
+        listener.start()
+        queued.addHandler(logging.handlers.QueueHandler(log_queue))
+        queue_time = measure(queued, count)
+        started = time.perf_counter()
+        listener.stop()
+        drain_time = time.perf_counter() - started
+
+        # manipuladores duplicados (comportamento anterior: um par por módulo importado)
+        piled = logging.getLogger('bench.piled')
+        piled.propagate = False
+        piled.setLevel(logging.INFO)
+        for i in range(10):
+            piled.addHandler(file_handler(os.path.join(tmp, 'piled.log')))
+        piled_time = measure(piled, count)
+
+        for logger in (direct, queued, piled):
+            for handler in list(logger.handlers):
+                handler.close()
+                logger.removeHandler(handler)
+
+    print(f"log calls: {count}")
+    print(report('direct file handler:', direct_time))
+    print(report('queue handler:', queue_time) + f"  (listener drained in {drain_time * 1000:.0f} ms)")
+    print(report('10 duplicated handlers:', piled_time))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-call logging overhead')
+    parser.add_argument('--count', type=int, default=20000)
+    args = parser.parse_args()
+    run(args.count)
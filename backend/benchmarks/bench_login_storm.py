@@ -0,0 +1,91 @@
+# latência das leituras enquanto uma rajada de logins (PBKDF2) chega ao servidor
+import eventlet
+eventlet.monkey_patch()
+
+import argparse
+import tempfile
+import time
+import requests
+from bench_load import login, run, spawn
+from harness import add_result_arguments, finish
+
+# leituras medidas: uma rota de dados em memória, uma que passa pelo armazenamento (tpool do SQLite)
+# e o handshake do Socket.IO (todas servidas pelo mesmo hub)
+PROBE_PATHS = ['/api/weather', '/api/history/weather', '/socket.io/?EIO=4&transport=polling']
+
+
+def storm(base_url, concurrency, duration, username, password):
+
+    # clientes que repetem o login sem parar; conta as respostas por código
+    statuses = {}
+    deadline = time.monotonic() + duration
+
+    def worker():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            try:
+                status = session.post(f"{base_url}/api/login", auth=(username, password), timeout=30).status_code
+            except requests.RequestException:
+                status = 'error'
+            statuses[status] = statuses.get(status, 0) + 1
+
+    pool = eventlet.GreenPool(concurrency)
+    for _ in range(concurrency):
+        pool.spawn(worker)
+    return pool, statuses
+
+
+def measure(base_url, args, token):
+    results = {}
+    for path in PROBE_PATHS:
+        results[f"baseline {path}"] = run(base_url, [path], args.probe_concurrency, args.duration, token)
+
+    # as mesmas leituras com a rajada de logins em curso
+    for path in PROBE_PATHS:
+        pool, statuses = storm(base_url, args.storm_concurrency, args.duration, args.username, args.password)
+        results[f"storm {path}"] = run(base_url, [path], args.probe_concurrency, args.duration, token)
+        pool.waitall()
+        results[f"storm {path}"]['logins'] = dict(sorted((str(k), v) for k, v in statuses.items()))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Read latency during a login storm')
+    parser.add_argument('--stub-latency', type=float, default=0.05, help='seconds added by the stub to each API call')
+    parser.add_argument('--probe-concurrency', type=int, default=10)
+    parser.add_argument('--storm-concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--username', default='admin')
+    parser.add_argument('--password', default='admin123')
+    parser.add_argument('--inline-hash', action='store_true',
+                        help='verify passwords in the request greenthread (PASSWORD_WORKERS=0), as before')
+    parser.add_argument('--no-admission', action='store_true', help='disable the login rate limits')
+    add_result_arguments(parser)
+    args = parser.parse_args()
+
+    # as credenciais erradas obrigam a um PBKDF2 por tentativa (as válidas ficam em cache)
+    extra_env = {}
+    if args.inline_hash:
+        extra_env['PASSWORD_WORKERS'] = '0'
+    if args.no_admission:
+        extra_env.update(LOGIN_RATE_PER_IP='0', LOGIN_RATE_PER_USER='0')
+
+    processes = []
+    workdir = tempfile.TemporaryDirectory()
+    try:
+        base_url, processes = spawn(workdir.name, args.stub_latency, extra_env)
+        token = login(base_url, args.username, args.password)
+        args.password = 'wrong-password'
+        results = measure(base_url, args, token)
+    finally:
+        for process in processes:
+            process.terminate()
+            process.wait(10)
+        workdir.cleanup()
+
+    for name, result in results.items():
+        logins = f"  logins: {result['logins']}" if 'logins' in result else ''
+        print(f"{name:<55} p50: {result['p50'] * 1000:7.1f} ms  p99: {result['p99'] * 1000:7.1f} ms"
+              f"  errors: {result['errors']}{logins}")
+    finish({name: {k: v for k, v in result.items() if k != 'logins'} for name, result in results.items()},
+           args.save, args.baseline, args.tolerance)
@@ -0,0 +1,56 @@
+import argparse
+import os
+import sys
+import time
+
+# permite executar a partir da pasta backend: python benchmarks/bench_metrics.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.metrics import Registry
+
+
+def per_call(function, count):
+    started = time.perf_counter()
+    for _ in range(count):
+        function()
+    return (time.perf_counter() - started) / count
+
+
+def run(count):
+    registry = Registry()
+    requests_total = registry.counter('requests_total', 'Requests', ('method', 'route', 'status'))
+    latency = registry.histogram('request_seconds', 'Latency', ('method', 'route'))
+
+    # custo por pedido instrumentado: um contador e uma observação do histograma
+    baseline = per_call(lambda: None, count)
+
+    def instrumented():
+        started = time.perf_counter()
+        requests_total.inc(method='GET', route='/api/weather', status=200)
+        latency.observe(time.perf_counter() - started, method='GET', route='/api/weather')
+
+    def timed():
+        with latency.time(method='GET', route='/api/weather'):
+            pass
+
+    instrumented_time = per_call(instrumented, count) - baseline
+    timed_time = per_call(timed, count) - baseline
+
+    # custo de uma recolha com 20 rotas x 5 estados
+    for i in range(20):
+        for status in (200, 304, 400, 401, 500):
+            requests_total.inc(method='GET', route=f'/api/route{i}', status=status)
+            latency.observe(0.01, method='GET', route=f'/api/route{i}')
+    render_time = per_call(registry.render, 200)
+
+    print(f"calls: {count}")
+    print(f"counter + histogram per request: {instrumented_time * 1e6:6.2f} us")
+    print(f"histogram.time() context:        {timed_time * 1e6:6.2f} us")
+    print(f"render ({len(registry.render().splitlines())} lines):            {render_time * 1e3:6.2f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Instrumentation overhead of the metrics registry')
+    parser.add_argument('--count', type=int, default=200000)
+    args = parser.parse_args()
+    run(args.count)
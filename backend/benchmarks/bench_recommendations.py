@@ -0,0 +1,53 @@
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+# permite executar a partir da pasta backend: python benchmarks/bench_recommendations.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.services.recomendacao_service import RecomendacaoService
+
+
+def run(size, repeat):
+    service = RecomendacaoService()
+
+    # leituras aleatórias que cobrem todos os ramos das regras
+    rng = np.random.default_rng(42)
+    temps = rng.uniform(0, 45, size)
+    hums = rng.uniform(30, 100, size)
+    rows = [{'temperature': float(t), 'humidity': float(h)} for t, h in zip(temps, hums)]
+
+    # cálculo individual, uma leitura de cada vez
+    started = time.perf_counter()
+    for _ in range(repeat):
+        scalar = [service.get_recommendation(row) for row in rows]
+    scalar_time = (time.perf_counter() - started) / repeat
+
+    # cálculo vetorizado (em colunas e convertido para registos)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        batch = service.get_recommendations_batch(temps, hums)
+    batch_time = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        records = service.batch_to_recommendations(service.get_recommendations_batch(temps, hums))
+    records_time = (time.perf_counter() - started) / repeat
+
+    if records != scalar:
+        raise SystemExit("batch results differ from scalar results")
+
+    print(f"readings: {size}")
+    print(f"scalar:          {size / scalar_time:14,.0f} readings/s")
+    print(f"batch (columns): {size / batch_time:14,.0f} readings/s  ({scalar_time / batch_time:.1f}x)")
+    print(f"batch (records): {size / records_time:14,.0f} readings/s  ({scalar_time / records_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scalar vs vectorized recommendation throughput')
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.size, args.repeat)
@@ -0,0 +1,181 @@
+import argparse
+import itertools
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# permite executar a partir da pasta backend: python benchmarks/bench_services.py
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from harness import add_result_arguments, finish, format_result, measure
+
+
+def bench_recommendations(rounds):
+    from src.services.recomendacao_service import RecomendacaoService
+
+    # leituras que percorrem todos os ramos das regras
+    service = RecomendacaoService()
+    readings = itertools.cycle([
+        {'temperature': t, 'humidity': h} for t in (5, 18, 28, 38) for h in (40, 70, 90)
+    ])
+    return {'recommendation.get_recommendation': measure(lambda: service.get_recommendation(next(readings)), rounds)}
+
+
+def bench_notifications(rounds):
+    from src.services.notification_service import NotificationService
+
+    # armazenamento cheio (capacidade por omissão) para medir o caso estável
+    service = NotificationService()
+    conditions = itertools.cycle(['temperature_high', 'humidity_high', 'humidity_low'])
+    for _ in range(service.store.capacity):
+        service.create_alert(next(conditions), location='porto')
+
+    def create_and_acknowledge():
+        notification = service.create_alert(next(conditions), location='porto')
+        service.acknowledge_notification(notification['id'])
+
+    return {
+        'notifications.create_and_acknowledge': measure(create_and_acknowledge, rounds),
+        'notifications.list_active': measure(service.get_active_notifications, max(rounds // 10, 10)),
+        'notifications.list_high': measure(lambda: service.get_active_notifications('HIGH'), max(rounds // 10, 10))
+    }
+
+
+def bench_data_store(sizes, rounds):
+    from src.storage.sqlite_store import SqliteDataStore
+
+    results = {}
+    for size in sizes:
+
+        # histórico pré-carregado em lotes; depois mede escritas individuais e a leitura das últimas 24
+        store = SqliteDataStore(db_path=os.path.join('data', f'bench_{size}.db'), batch_size=1)
+        start = datetime(2024, 1, 1)
+        for offset in range(0, size, 10000):
+            chunk = [
+                {'temperature': 20.0 + (i % 10), 'humidity': 60 + (i % 30), 'description': 'céu limpo',
+                 'timestamp': (start + timedelta(minutes=i)).isoformat()}
+                for i in range(offset, min(offset + 10000, size))
+            ]
+            store.save_many(chunk, location='porto')
+        counter = itertools.count(size)
+
+        def save():
+            i = next(counter)
+            store.save_weather_data({'temperature': 21.0, 'humidity': 65, 'description': 'céu limpo',
+                                     'timestamp': (start + timedelta(minutes=i)).isoformat()}, location='porto')
+
+        results[f'data_store.save_weather_data[{size}]'] = measure(save, rounds)
+        results[f'data_store.get_weather_history[{size}]'] = measure(
+            lambda: store.get_weather_history(limit=24, location='porto'), rounds
+        )
+        store.close()
+    return results
+
+
+def bench_sensors(batch_size, rounds):
+    import json
+    import time
+    from src.services.sensor_service import SensorService
+    from src.storage.locations import LocationRegistry
+    from src.storage.sensor_store import SensorStore
+
+    # lotes de leituras de 50 sensores (JSON e protocolo de linhas): análise, validação e escrita no SQLite
+    locations = LocationRegistry(default_location={'id': 'porto', 'name': 'Porto', 'city': 'Porto',
+                                                   'country': 'PT', 'crop': 'uva'})
+    service = SensorService(locations, store=SensorStore(db_path=os.path.join('data', 'bench_sensors.db'),
+                                                         batch_size=batch_size))
+    now = time.time()
+    body = json.dumps([
+        {'location': 'porto', 'sensor': f"s{i % 50}", 'timestamp': now - batch_size + i,
+         'soil_moisture': 20 + i % 10, 'leaf_wetness': i % 100, 'temperature': 18.5, 'humidity': 80}
+        for i in range(batch_size)
+    ])
+    text = '\n'.join(
+        f"campo,location=porto,sensor=s{i % 50} soil_moisture={20 + i % 10},leaf_wetness={i % 100},"
+        f"temperature=18.5,humidity=80 {int(now - batch_size + i)}"
+        for i in range(batch_size)
+    )
+    rounds = max(rounds // 200, 5)
+    results = {
+        f'sensors.ingest_json[{batch_size}]': measure(lambda: service.ingest(service.parse_json(json.loads(body))), rounds),
+        f'sensors.ingest_lines[{batch_size}]': measure(lambda: service.ingest(service.parse_lines(text)), rounds)
+    }
+    service.store.close()
+    return results
+
+
+def bench_indicators(rounds):
+    from src.utils.indicators import IndicatorAccumulator
+
+    # uma observação a cada 10 minutos: o custo por atualização não depende do histórico acumulado
+    accumulator = IndicatorAccumulator()
+    counter = itertools.count()
+    start = datetime(2024, 6, 1).timestamp()
+
+    def update():
+        i = next(counter)
+        accumulator.update(start + i * 600, 15 + i % 12, 70 + i % 25)
+
+    return {'indicators.update': measure(update, rounds * 10)}
+
+
+def bench_verify_user(hash_rounds):
+    from src.storage.users import UserStore
+
+    # com cache (pedidos seguintes do mesmo utilizador) e sem cache (PBKDF2 completo)
+    store = UserStore()
+    cached = measure(lambda: store.verify_user('admin', 'admin123'), 1000)
+
+    def verify_uncached():
+        store._verified.clear()
+        store.verify_user('admin', 'admin123')
+
+    uncached = measure(verify_uncached, hash_rounds, warmup=1)
+    return {'users.verify_user[cached]': cached, 'users.verify_user[pbkdf2]': uncached}
+
+
+def run(args):
+    results = {}
+    suites = set(args.only or ['recommendations', 'notifications', 'data_store', 'sensors', 'indicators', 'users'])
+    if 'recommendations' in suites:
+        results.update(bench_recommendations(args.rounds))
+    if 'notifications' in suites:
+        results.update(bench_notifications(args.rounds))
+    if 'data_store' in suites:
+        results.update(bench_data_store(args.history_sizes, args.rounds))
+    if 'sensors' in suites:
+        results.update(bench_sensors(args.sensor_batch, args.rounds))
+    if 'indicators' in suites:
+        results.update(bench_indicators(args.rounds))
+    if 'users' in suites:
+        results.update(bench_verify_user(args.hash_rounds))
+    for name, result in results.items():
+        print(format_result(name, result))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Micro-benchmarks of the AGROSMART services')
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--hash-rounds', type=int, default=20)
+    parser.add_argument('--history-sizes', type=lambda v: [int(s) for s in v.split(',')],
+                        default=[1000, 100000, 1000000], help='comma-separated history sizes (rows)')
+    parser.add_argument('--sensor-batch', type=int, default=10000, help='readings per sensor ingestion batch')
+    parser.add_argument('--only', action='append',
+                        choices=['recommendations', 'notifications', 'data_store', 'sensors', 'indicators', 'users'])
+    add_result_arguments(parser)
+    args = parser.parse_args()
+    if args.save:
+        args.save = os.path.abspath(args.save)
+    if args.baseline:
+        args.baseline = os.path.abspath(args.baseline)
+
+    # dados e logs numa pasta temporária para não tocar em backend/data
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        results = run(args)
+        os.chdir(BACKEND_DIR)
+    finish(results, args.save, args.baseline, args.tolerance)
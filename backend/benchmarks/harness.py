@@ -0,0 +1,88 @@
+import json
+import os
+import time
+
+
+def percentile(values, p):
+
+    # valores já ordenados; p entre 0 e 1
+    return values[min(len(values) - 1, int(p * len(values)))] if values else 0.0
+
+
+def summarize(latencies, elapsed=None):
+
+    # p50/p99/máximo e débito a partir das latências individuais (segundos)
+    latencies = sorted(latencies)
+    total = elapsed if elapsed is not None else sum(latencies)
+    return {
+        'count': len(latencies),
+        'ops': len(latencies) / total if total else 0.0,
+        'p50': percentile(latencies, 0.50),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1] if latencies else 0.0
+    }
+
+
+def measure(func, rounds=1000, warmup=10, min_time=0.0):
+
+    # mede cada chamada em separado (estilo pytest-benchmark), depois de algumas chamadas de aquecimento
+    for _ in range(warmup):
+        func()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < rounds or time.perf_counter() - started < min_time:
+        call_started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies)
+
+
+def format_result(name, result):
+    return (f"{name:<40} {result['ops']:12,.0f} ops/s  p50 {result['p50'] * 1e6:10.1f} us  "
+            f"p99 {result['p99'] * 1e6:10.1f} us  max {result['max'] * 1e6:10.1f} us")
+
+
+def save_results(results, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def compare_results(results, baseline_path, tolerance):
+
+    # regressões: p99 acima de (1 + tolerância) x referência ou débito abaixo de referência / (1 + tolerância)
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        if result['p99'] > reference['p99'] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {reference['p99'] * 1e3:.3f} ms -> {result['p99'] * 1e3:.3f} ms")
+        if result['ops'] < reference['ops'] / (1 + tolerance):
+            regressions.append(f"{name}: {reference['ops']:,.0f} -> {result['ops']:,.0f} ops/s")
+    return regressions
+
+
+def finish(results, save=None, baseline=None, tolerance=0.25):
+
+    # guarda os resultados e termina com erro se houver regressões face à referência
+    if save:
+        save_results(results, save)
+    if baseline:
+        regressions = compare_results(results, baseline, tolerance)
+        if regressions:
+            print("regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            raise SystemExit(1)
+        print(f"no regressions against {baseline} (tolerance {tolerance:.0%})")
+
+
+def add_result_arguments(parser):
+    parser.add_argument('--save', help='write results to a JSON file (e.g. a baseline)')
+    parser.add_argument('--baseline', help='compare against a saved JSON file and exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown before failing (0.25 = 25%%)')
@@ -0,0 +1,82 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+# resposta fixa do endpoint /weather (a tradução e os campos usados pelo WeatherService)
+WEATHER = {
+    'main': {'temp': 21.5, 'humidity': 70},
+    'weather': [{'description': 'clear sky'}]
+}
+
+
+def forecast(count=40, step=3 * 3600):
+
+    # previsão a 5 dias em intervalos de 3 horas, no formato do endpoint /forecast
+    now = int(time.time())
+    return {
+        'cnt': count,
+        'list': [
+            {
+                'dt': now + i * step,
+                'main': {'temp': 15 + (i % 8) * 2.5, 'humidity': 55 + (i % 5) * 8},
+                'weather': [{'description': 'few clouds'}]
+            }
+            for i in range(count)
+        ]
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+
+    def do_GET(self):
+        endpoint = urlparse(self.path).path.rstrip('/').rsplit('/', 1)[-1]
+        if endpoint == 'weather':
+            payload = WEATHER
+        elif endpoint == 'forecast':
+            payload = forecast()
+        else:
+            self.send_error(404)
+            return
+
+        # latência simulada da API real
+        if self.latency:
+            time.sleep(self.latency)
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub(host='127.0.0.1', port=0, latency=0.0):
+
+    # inicia o servidor numa thread; devolve o servidor e o URL base a usar em OPENWEATHER_BASE_URL
+    handler = type('Handler', (StubHandler,), {'latency': latency})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/data/2.5"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stub OpenWeather API for benchmarks and load tests')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to each response')
+    args = parser.parse_args()
+    server, base_url = start_stub(port=args.port, latency=args.latency)
+    print(f"OPENWEATHER_BASE_URL={base_url}", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
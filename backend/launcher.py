@@ -0,0 +1,76 @@
+# arranque de vários processos de trabalho (um por núcleo) com estado partilhado
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import time
+from dotenv import load_dotenv
+from src.utils.logger import setup_logger
+
+load_dotenv()
+logger = setup_logger()
+
+SERVER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+
+
+def worker_environment():
+
+    # configuração comum: notificações e snapshots em SQLite, fila Socket.IO partilhada
+    env = dict(os.environ)
+    env['STATE_BACKEND'] = env.get('STATE_BACKEND') or 'sqlite'
+    env['SOCKETIO_MESSAGE_QUEUE'] = env.get('SOCKETIO_MESSAGE_QUEUE') or 'sqlite:///' + os.path.join('data', 'socketio_queue.db')
+    if env.get('STATE_BACKEND') != 'sqlite':
+        raise SystemExit("Multiple workers require STATE_BACKEND=sqlite")
+    if (env.get('DATA_STORE_BACKEND') or 'sqlite') != 'sqlite':
+        raise SystemExit("Multiple workers require DATA_STORE_BACKEND=sqlite")
+
+    # os tokens emitidos por um processo têm de ser válidos nos restantes
+    if not env.get('AGROSMART_SECRET_KEY'):
+        logger.warning("AGROSMART_SECRET_KEY not set, generating a key shared by the workers of this run")
+        env['AGROSMART_SECRET_KEY'] = secrets.token_hex(32)
+    return env
+
+
+def main():
+    workers = int(os.getenv('SERVER_WORKERS', os.cpu_count() or 1))
+    base_port = int(os.getenv('SERVER_PORT', 5000))
+    env = worker_environment()
+
+    # cada processo escuta na sua porta (SERVER_PORT + i), atrás de um proxy com sessões fixas
+    def spawn(index):
+        worker_env = dict(env, SERVER_PORT=str(base_port + index), SERVER_WORKER_INDEX=str(index))
+        process = subprocess.Popen([sys.executable, SERVER_SCRIPT], env=worker_env)
+        logger.info(f"Worker {index} started on port {base_port + index} (pid {process.pid})")
+        return process
+
+    processes = {index: spawn(index) for index in range(workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # reinicia processos que terminem inesperadamente
+    while not stopping:
+        for index, process in list(processes.items()):
+            if process.poll() is not None and not stopping:
+                logger.error(f"Worker {index} exited with code {process.returncode}, restarting")
+                processes[index] = spawn(index)
+        time.sleep(1)
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    logger.info("All workers stopped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+# modo de produção: o eventlet tem de substituir sockets, threads e temporizadores
+# antes de qualquer outro import, para que todo o I/O (OpenWeather, Socket.IO) seja cooperativo
+import eventlet
+import eventlet.debug
+eventlet.monkey_patch()
+
+import os
+
+# as escritas e leituras do armazenamento correm no conjunto de threads do eventlet (tpool);
+# um único thread serializa o acesso ao SQLite sem bloquear o hub
+os.environ.setdefault('EVENTLET_THREADPOOL_SIZE', '1')
+os.environ.setdefault('SOCKETIO_ASYNC_MODE', 'eventlet')
+
+from app import app, socketio, start_background_tasks
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+def main():
+
+    # endereço e número máximo de pedidos em simultâneo (greenthreads do servidor WSGI)
+    host = os.getenv('SERVER_HOST', '0.0.0.0')
+    port = int(os.getenv('SERVER_PORT', 5000))
+    pool_size = int(os.getenv('SERVER_GREEN_POOL_SIZE', 1000))
+
+    # deteção opcional de código que bloqueia o hub (apenas para diagnóstico)
+    blocking_timeout = float(os.getenv('EVENTLET_BLOCKING_DETECTION', 0))
+    if blocking_timeout > 0:
+        eventlet.debug.hub_blocking_detection(True, blocking_timeout)
+
+    logger.info(f"Starting eventlet server on {host}:{port} (pool size {pool_size})")
+    start_background_tasks()
+    socketio.run(app, host=host, port=port, debug=False, use_reloader=False, max_size=pool_size, log_output=False)
+
+
+if __name__ == '__main__':
+    main()
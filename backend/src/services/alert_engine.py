@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from ..utils.logger import setup_logger
+
+# configuração do registo de eventos
+logger = setup_logger()
+
+class AlertEngine:
+    def __init__(self, notification_service, temperature_thresholds=None, humidity_thresholds=None,
+                 hysteresis=None, cooldown=None, on_notification=None, threshold_resolver=None):
+
+        # serviço onde as notificações são guardadas e limiares de ativação
+        self.notification_service = notification_service
+        self.temperature_thresholds = temperature_thresholds or {}
+        self.humidity_thresholds = humidity_thresholds or {}
+
+        # função opcional que devolve os limiares (temperatura, humidade) de cada parcela
+        self.threshold_resolver = threshold_resolver
+
+        # margem para desativar uma condição (evita alternar junto ao limiar)
+        self.hysteresis = hysteresis or {
+            'temperature': float(os.getenv('ALERT_TEMPERATURE_HYSTERESIS', 1.0)),
+            'humidity': float(os.getenv('ALERT_HUMIDITY_HYSTERESIS', 3.0))
+        }
+
+        # tempo mínimo (segundos) entre dois alertas da mesma condição na mesma parcela
+        self.cooldown = float(cooldown if cooldown is not None else os.getenv('ALERT_COOLDOWN', 3600))
+
+        # função chamada uma única vez por notificação criada (ex.: envio por socket)
+        self.on_notification = on_notification
+
+        # estado por (parcela, condição): ativa, id da notificação e instante do último alerta
+        self.states = {}
+        self._lock = threading.Lock()
+
+    def _conditions(self, temperature, humidity, location=None):
+
+        # limiares da cultura da parcela, se houver um resolvedor
+        if self.threshold_resolver:
+            temperature_thresholds, humidity_thresholds = self.threshold_resolver(location)
+        else:
+            temperature_thresholds, humidity_thresholds = self.temperature_thresholds, self.humidity_thresholds
+
+        # para cada condição: (está acima do limiar de ativação, está abaixo do limiar de resolução)
+        # condições sem limiar definido para a cultura não são avaliadas
+        conditions = {}
+        t_high = temperature_thresholds.get('high')
+        h_low = humidity_thresholds.get('low')
+        h_high = humidity_thresholds.get('high')
+        if t_high is not None:
+            conditions['temperature_high'] = (temperature > t_high, temperature <= t_high - self.hysteresis['temperature'])
+        if h_high is not None:
+            conditions['humidity_high'] = (humidity > h_high, humidity <= h_high - self.hysteresis['humidity'])
+        if h_low is not None:
+            conditions['humidity_low'] = (humidity < h_low, humidity >= h_low + self.hysteresis['humidity'])
+        return conditions
+
+    def evaluate(self, weather_data, location=None):
+
+        # avalia as condições e só cria notificações nas transições para ativo
+        location = location or weather_data.get('location')
+        now = time.monotonic()
+        created = []
+        conditions = self._conditions(weather_data['temperature'], weather_data['humidity'], location)
+
+        with self._lock:
+            for condition, (triggered, resolved) in conditions.items():
+                state = self.states.setdefault((location, condition), {
+                    'active': False, 'notification_id': None, 'last_fired': None
+                })
+
+                if not state['active'] and triggered:
+                    state['active'] = True
+                    in_cooldown = state['last_fired'] is not None and now - state['last_fired'] < self.cooldown
+                    if not in_cooldown:
+                        notification = self.notification_service.create_alert(condition, location)
+                        state['notification_id'] = notification['id']
+                        state['last_fired'] = now
+                        created.append(notification)
+
+                elif state['active'] and resolved:
+
+                    # condição resolvida: a notificação deixa de estar ativa
+                    state['active'] = False
+                    if state['notification_id'] is not None:
+                        self.notification_service.acknowledge_notification(state['notification_id'])
+                        state['notification_id'] = None
+
+        for notification in created:
+            logger.info(f"Alert raised: {notification['type']} ({location})")
+            if self.on_notification:
+                try:
+                    self.on_notification(notification)
+                except Exception as e:
+                    logger.error(f"Error dispatching notification: {str(e)}")
+        return created
+
+    def active_conditions(self, location=None):
+
+        # condições atualmente ativas (para diagnóstico)
+        with self._lock:
+            return [condition for (loc, condition), state in self.states.items()
+                    if state['active'] and (location is None or loc == location)]
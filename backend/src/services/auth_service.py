@@ -0,0 +1,69 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import time
+from ..utils.logger import setup_logger
+
+# configuração do registo de eventos
+logger = setup_logger()
+
+class TokenService:
+    def __init__(self, user_store, secret_key=None, ttl=None):
+
+        # armazenamento de utilizadores, usado para validar que a conta ainda existe
+        self.user_store = user_store
+
+        # chave de assinatura: sem AGROSMART_SECRET_KEY os tokens só valem até ao reinício
+        secret_key = secret_key or os.getenv('AGROSMART_SECRET_KEY')
+        if not secret_key:
+            logger.warning("AGROSMART_SECRET_KEY not set, using a random per-process key")
+            secret_key = secrets.token_hex(32)
+        self.secret_key = secret_key.encode('utf-8')
+
+        # validade dos tokens em segundos
+        self.ttl = int(ttl if ttl is not None else os.getenv('AUTH_TOKEN_TTL', 12 * 3600))
+
+    def issue_token(self, username):
+
+        # o token inclui a impressão da palavra-passe: alterá-la invalida os tokens emitidos
+        payload = {
+            'u': username,
+            'exp': int(time.time()) + self.ttl,
+            'h': self.user_store.get_password_fingerprint(username)
+        }
+        body = _b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8'))
+        return f"{body}.{self._sign(body)}"
+
+    def verify_token(self, token):
+        try:
+
+            # verificação da assinatura HMAC (custo de microssegundos)
+            body, signature = token.split('.', 1)
+            if not hmac.compare_digest(signature, self._sign(body)):
+                return None
+            payload = json.loads(_b64decode(body))
+
+            # token expirado ou emitido para outra palavra-passe
+            if payload['exp'] < time.time():
+                return None
+            if payload['h'] != self.user_store.get_password_fingerprint(payload['u']):
+                return None
+            return payload['u']
+
+        except Exception:
+            return None
+
+    def _sign(self, body):
+        digest = hmac.new(self.secret_key, body.encode('ascii'), hashlib.sha256).digest()
+        return _b64encode(digest)
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
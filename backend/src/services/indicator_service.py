@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from ..utils.green import run_blocking
+from ..utils.indicators import IndicatorAccumulator
+from ..utils.logger import setup_logger
+from ..utils.time_utils import to_epoch
+
+# configuração do logger para registo de eventos
+logger = setup_logger()
+
+class IndicatorService:
+    def __init__(self, weather_service, checkpoint_file=None, checkpoint_interval=None):
+
+        # observações vêm do agendador; o histórico só é lido no arranque, a partir do ponto de retoma
+        self.weather_service = weather_service
+        self.checkpoint_file = checkpoint_file or os.getenv(
+            'INDICATORS_CHECKPOINT_FILE', os.path.join('data', 'indicators.json')
+        )
+
+        # segundos mínimos entre gravações do ponto de retoma (0 grava a cada observação)
+        self.checkpoint_interval = float(
+            checkpoint_interval if checkpoint_interval is not None else os.getenv('INDICATORS_CHECKPOINT_INTERVAL', 300)
+        )
+        self._checkpointed_at = None
+
+        # parâmetros agronómicos (vinha por omissão)
+        month, day = os.getenv('GDD_SEASON_START', '04-01').split('-')
+        self.settings = {
+            'base_temperature': float(os.getenv('GDD_BASE_TEMPERATURE', 10)),
+            'season_start': (int(month), int(day)),
+            'max_gap': float(os.getenv('INDICATORS_MAX_GAP', 10800)),
+            'wet_humidity': float(os.getenv('MILDEW_WET_HUMIDITY', 90)),
+            'wet_temperature': (float(os.getenv('MILDEW_MIN_TEMPERATURE', 10)),
+                                float(os.getenv('MILDEW_MAX_TEMPERATURE', 30))),
+            'moderate_hours': float(os.getenv('MILDEW_MODERATE_HOURS', 4)),
+            'high_hours': float(os.getenv('MILDEW_HIGH_HOURS', 10))
+        }
+
+        # acumuladores por parcela; os valores publicados ficam no armazenamento de snapshots (partilhado)
+        self.accumulators = {}
+        self.snapshots = weather_service.snapshots
+        self._live = set()
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def key(location_id):
+        return f"indicators:{location_id}"
+
+    def _accumulator(self, location_id):
+        accumulator = self.accumulators.get(location_id)
+        if accumulator is None:
+            accumulator = self.accumulators[location_id] = IndicatorAccumulator(**self.settings)
+        return accumulator
+
+    def update(self, weather_data):
+
+        # O(1) por observação: atualiza os acumuladores da parcela e publica os indicadores
+        location_id = weather_data.get('location')
+        if location_id is None or weather_data.get('temperature') is None or weather_data.get('humidity') is None:
+            return None
+        with self._lock:
+
+            # primeira observação neste processo (arranque ou mudança de líder): retoma o último ponto gravado
+            if location_id not in self._live:
+                self._catch_up(location_id, self.load_checkpoint())
+                self._live.add(location_id)
+            accumulator = self._accumulator(location_id)
+            accumulator.update(to_epoch(weather_data['timestamp']), float(weather_data['temperature']),
+                               float(weather_data['humidity']))
+            indicators = accumulator.snapshot()
+        self.snapshots.publish(self.key(location_id), indicators)
+
+        # grava o ponto de retoma no máximo uma vez por intervalo
+        now = time.monotonic()
+        if self._checkpointed_at is None or now - self._checkpointed_at >= self.checkpoint_interval:
+            self._checkpointed_at = now
+            run_blocking(self.save_checkpoint)
+        return indicators
+
+    def get_indicators(self, location_id):
+        return self.snapshots.get(self.key(location_id))
+
+    def save_checkpoint(self):
+        try:
+
+            # estado de todos os acumuladores num ficheiro temporário que substitui o anterior
+            with self._lock:
+                state = {location_id: accumulator.to_dict() for location_id, accumulator in self.accumulators.items()}
+            directory = os.path.dirname(self.checkpoint_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_file = self.checkpoint_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump({'saved_at': time.time(), 'locations': state}, f)
+            os.replace(tmp_file, self.checkpoint_file)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving indicators checkpoint: {str(e)}")
+            return False
+
+    def load_checkpoint(self):
+        try:
+            if not os.path.exists(self.checkpoint_file):
+                return {}
+            with open(self.checkpoint_file, 'r') as f:
+                return json.load(f).get('locations', {})
+        except Exception as e:
+
+            # ponto de retoma danificado: os indicadores são recalculados a partir do histórico
+            logger.error(f"Error loading indicators checkpoint: {str(e)}")
+            return {}
+
+    def _catch_up(self, location_id, checkpoint):
+
+        # retoma a parcela do ponto gravado e aplica só as observações posteriores; sem ponto de
+        # retoma, percorre o histórico desde o início da época (uma única vez)
+        accumulator = self.accumulators[location_id] = IndicatorAccumulator(**self.settings)
+        if location_id in checkpoint:
+            try:
+                accumulator.restore(checkpoint[location_id])
+            except (KeyError, TypeError) as e:
+                logger.error(f"Invalid indicators checkpoint for {location_id}: {str(e)}")
+                accumulator = self.accumulators[location_id] = IndicatorAccumulator(**self.settings)
+        if accumulator.last_ts is not None:
+            after = datetime.fromtimestamp(accumulator.last_ts).isoformat()
+            entries = self.weather_service.get_weather_history(after=after, location_id=location_id)
+        else:
+            season = accumulator.season_of(time.time())
+            start = datetime(season, *self.settings['season_start']).isoformat()
+            entries = self.weather_service.get_weather_history(start=start, location_id=location_id)
+
+        replayed = 0
+        for entry in entries:
+            if entry.get('temperature') is None or entry.get('humidity') is None:
+                continue
+            if accumulator.update(to_epoch(entry['timestamp']), float(entry['temperature']), float(entry['humidity'])):
+                replayed += 1
+        return replayed
+
+    def restore(self):
+
+        # no arranque: indicadores de todas as parcelas disponíveis sem esperar pela próxima observação
+        checkpoint = self.load_checkpoint()
+        replayed = 0
+        for location in self.weather_service.locations.all():
+            location_id = location['id']
+            with self._lock:
+                replayed += self._catch_up(location_id, checkpoint)
+                accumulator = self.accumulators[location_id]
+                indicators = accumulator.snapshot() if accumulator.last_ts is not None else None
+            if indicators is not None:
+                self.snapshots.publish(self.key(location_id), indicators)
+        logger.info(f"Indicators restored ({len(checkpoint)} checkpoints, {replayed} observations replayed)")
+        return replayed
+
+    def stop(self):
+
+        # só o processo que atualizou os indicadores grava o estado final (os outros têm-no desatualizado)
+        if self._live:
+            self.save_checkpoint()
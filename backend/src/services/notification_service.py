@@ -1,15 +1,35 @@
 from datetime import datetime
 import uuid 
 from ..utils.logger import setup_logger
+from ..storage.notification_store import create_notification_store
 
 # configuração do registo de eventos
 logger = setup_logger()
 
-class NotificationService:
-    def __init__(self):
+# modelos das notificações por condição meteorológica
+ALERT_TEMPLATES = {
+    'temperature_high': {
+        'type': 'ALERTA_TEMPERATURA',
+        'message': 'Temperatura elevada detetada - Risco para as vinhas',
+        'severity': 'HIGH',
+        'details': 'Aumentar a irrigação e monitorizar o stress das vinhas'
+    },
+    'humidity_high': {
+        'type': 'ALERTA_HUMIDADE',
+        'message': 'Humidade elevada - Risco de doenças fúngicas',
+        'severity': 'HIGH',
+        'details': 'Monitorizar sinais de míldio e outras doenças fúngicas'
+    },
+    'humidity_low': {
+        'type': 'ALERTA_HUMIDADE',
+        'message': 'Humidade baixa - Risco de stress hídrico',
+        'severity': 'MEDIUM',
+        'details': 'Considerar aumento da irrigação'
+    }
+}
 
-        # lista para armazenar as notificações
-        self.notifications = []
+class NotificationService:
+    def __init__(self, capacity=None):
 
         # níveis de severidade das notificações
         self.severity_levels = {
@@ -18,43 +38,24 @@ class NotificationService:
             'LOW': 1
         }
 
+        # armazenamento limitado e indexado por id e por severidade (em memória ou partilhado)
+        self.store = create_notification_store(self.severity_levels, capacity)
+
     def create_notification(self, recommendation):
         try:
-            notifications = []
+            conditions = []
             
             # verificar condições de temperatura
             if recommendation['temperature_status'] == 'elevada':
-                notifications.append({
-                    'id': str(uuid.uuid4()),  
-                    'type': 'ALERTA_TEMPERATURA',
-                    'message': 'Temperatura elevada detetada - Risco para as vinhas',
-                    'severity': 'HIGH', 
-                    'timestamp': datetime.now().isoformat(),
-                    'details': 'Aumentar a irrigação e monitorizar o stress das vinhas'
-                })
+                conditions.append('temperature_high')
             
             # verificar condições de humidade
             if recommendation['humidity_status'] == 'elevada':  
-                notifications.append({
-                    'id': str(uuid.uuid4()),
-                    'type': 'ALERTA_HUMIDADE',
-                    'message': 'Humidade elevada - Risco de doenças fúngicas',
-                    'severity': 'HIGH',  
-                    'timestamp': datetime.now().isoformat(),
-                    'details': 'Monitorizar sinais de míldio e outras doenças fúngicas'
-                })
+                conditions.append('humidity_high')
             elif recommendation['humidity_status'] == 'baixa': 
-                notifications.append({
-                    'id': str(uuid.uuid4()),
-                    'type': 'ALERTA_HUMIDADE',
-                    'message': 'Humidade baixa - Risco de stress hídrico',
-                    'severity': 'MEDIUM',  
-                    'timestamp': datetime.now().isoformat(),
-                    'details': 'Considerar aumento da irrigação'
-                })
-
-            self.notifications.extend(notifications)
-            return notifications
+                conditions.append('humidity_low')
+
+            return [self.create_alert(condition) for condition in conditions]
 
         except Exception as e:
 
@@ -62,16 +63,24 @@ class NotificationService:
             logger.error(f"Erro ao criar notificações: {str(e)}")
             raise
 
+    def create_alert(self, condition, location=None):
+
+        # cria e guarda a notificação correspondente a uma condição
+        notification = dict(
+            ALERT_TEMPLATES[condition],
+            id=str(uuid.uuid4()),
+            timestamp=datetime.now().isoformat()
+        )
+        if location is not None:
+            notification['location'] = location
+        self.store.add(notification)
+        return notification
+
     def get_active_notifications(self, severity_level=None):
         try:
-            # retornar notificações filtradas por nível de severidade, se especificado
-            if severity_level:
-                return [n for n in self.notifications 
-                       if self.severity_levels[n['severity']] >= 
-                       self.severity_levels[severity_level]]
-            
-            # caso contrário, retornar todas as notificações
-            return self.notifications
+            # retornar notificações filtradas por nível de severidade, se especificado;
+            # caso contrário, retornar todas as notificações por confirmar
+            return self.store.list(severity_level)
 
         except Exception as e:
 
@@ -82,11 +91,14 @@ class NotificationService:
     def clear_notifications(self):
 
         # limpar todas as notificações
-        self.notifications = []
+        self.store.clear()
 
     def delete_notification(self, notification_id):
 
         # remover uma notificação específica pelo ID
-        self.notifications = [
-            n for n in self.notifications if str(n.get('id')) != str(notification_id)
-        ]
\ No newline at end of file
+        return self.store.delete(notification_id)
+
+    def acknowledge_notification(self, notification_id):
+
+        # marcar uma notificação como confirmada (deixa de estar ativa)
+        return self.store.acknowledge(notification_id)
\ No newline at end of file
@@ -0,0 +1,205 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from ..utils.logger import setup_logger
+from ..utils.metrics import REGISTRY
+from ..utils.rate_limit import TokenBucket
+
+# configuração do registo de eventos
+logger = setup_logger()
+
+# métricas expostas em /metrics
+API_REQUESTS = REGISTRY.counter(
+    'agrosmart_openweather_requests_total', 'OpenWeather API calls by endpoint and outcome', ('endpoint', 'outcome')
+)
+API_LATENCY = REGISTRY.histogram(
+    'agrosmart_openweather_request_seconds', 'OpenWeather API call latency including retries', ('endpoint',)
+)
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold, reset_timeout):
+
+        # abre após `failure_threshold` falhas seguidas e volta a testar após `reset_timeout` segundos
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow_request(self):
+
+        # fechado: deixa passar; meio-aberto: deixa passar um único pedido de teste
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def cancel_trial(self):
+
+        # o pedido de teste não chegou a ser feito
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_progress = False
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LatencyStats:
+    def __init__(self, window=1000):
+
+        # totais acumulados e janela das latências mais recentes para percentis
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds, error=False):
+        with self._lock:
+            self.count += 1
+            self.errors += 1 if error else 0
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self.recent.append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self.recent)
+            count, errors, total, maximum = self.count, self.errors, self.total, self.max
+
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(p * len(recent)))] if recent else 0.0
+
+        return {
+            'count': count,
+            'errors': errors,
+            'mean': total / count if count else 0.0,
+            'max': maximum,
+            'p50': percentile(0.50),
+            'p95': percentile(0.95),
+            'p99': percentile(0.99)
+        }
+
+
+class OpenWeatherClient:
+    def __init__(self, api_key=None, base_url=None, pool_size=None, connect_timeout=None, read_timeout=None,
+                 max_retries=None, backoff=None, failure_threshold=None, reset_timeout=None, rate_limit=None):
+
+        # credenciais e endereço base (pode apontar para um servidor local nos testes)
+        self.api_key = api_key or os.getenv('OPENWEATHER_API_KEY')
+        self.base_url = (base_url or os.getenv('OPENWEATHER_BASE_URL', 'http://api.openweathermap.org/data/2.5')).rstrip('/')
+
+        # sessão partilhada com pool de ligações keep-alive
+        pool_size = int(pool_size if pool_size is not None else os.getenv('WEATHER_FETCH_WORKERS', 8))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # tempos limite de ligação e de leitura
+        self.timeout = (
+            float(connect_timeout if connect_timeout is not None else os.getenv('OPENWEATHER_CONNECT_TIMEOUT', 3.05)),
+            float(read_timeout if read_timeout is not None else os.getenv('OPENWEATHER_READ_TIMEOUT', 10))
+        )
+
+        # novas tentativas com backoff exponencial
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv('OPENWEATHER_MAX_RETRIES', 2))
+        self.backoff = float(backoff if backoff is not None else os.getenv('OPENWEATHER_BACKOFF', 0.5))
+
+        # disjuntor para não insistir num serviço em baixo
+        self.circuit_breaker = CircuitBreaker(
+            int(failure_threshold if failure_threshold is not None else os.getenv('OPENWEATHER_FAILURE_THRESHOLD', 5)),
+            float(reset_timeout if reset_timeout is not None else os.getenv('OPENWEATHER_RESET_TIMEOUT', 60))
+        )
+
+        # orçamento de chamadas à API por minuto
+        self.rate_limit = float(rate_limit if rate_limit is not None else os.getenv('OPENWEATHER_RATE_LIMIT', 60))
+        self.rate_limiter = TokenBucket(self.rate_limit / 60.0, capacity=self.rate_limit)
+        self.rate_limit_wait = float(os.getenv('OPENWEATHER_RATE_LIMIT_WAIT', 10))
+
+        # latência de cada chamada (incluindo novas tentativas)
+        self.metrics = LatencyStats()
+
+    def get_current(self, params):
+        return self.get('weather', params)
+
+    def get(self, endpoint, params):
+
+        # recusa de imediato se o disjuntor estiver aberto
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError(f"OpenWeather circuit open ({self.circuit_breaker.failures} consecutive failures)")
+        if not self.rate_limiter.acquire(timeout=self.rate_limit_wait):
+            self.circuit_breaker.cancel_trial()
+            raise RuntimeError("OpenWeather rate limit budget exhausted")
+
+        url = f"{self.base_url}/{endpoint}"
+        params = dict(params, appid=self.api_key)
+        started = time.perf_counter()
+        try:
+            data = self._get_with_retries(url, params)
+        except Exception:
+            elapsed = time.perf_counter() - started
+            self.metrics.record(elapsed, error=True)
+            API_REQUESTS.inc(endpoint=endpoint, outcome='error')
+            API_LATENCY.observe(elapsed, endpoint=endpoint)
+            self.circuit_breaker.record_failure()
+            raise
+        elapsed = time.perf_counter() - started
+        self.metrics.record(elapsed)
+        API_REQUESTS.inc(endpoint=endpoint, outcome='success')
+        API_LATENCY.observe(elapsed, endpoint=endpoint)
+        self.circuit_breaker.record_success()
+        return data
+
+    def _get_with_retries(self, url, params):
+        attempt = 0
+        while True:
+            try:
+                response = self.session.get(url, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                return response.json()
+
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+
+                # erros de rede, do servidor (5xx) e limite de pedidos (429) justificam nova tentativa
+                status = getattr(e.response, 'status_code', None)
+                retryable = status is None or status >= 500 or status == 429
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning(f"OpenWeather request failed ({str(e)}), retrying in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
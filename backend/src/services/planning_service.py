@@ -0,0 +1,110 @@
+import threading
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from ..utils.logger import setup_logger
+
+# configuração do registo de eventos
+logger = setup_logger()
+
+# ordem das intensidades de rega (a do dia é a mais elevada dos seus intervalos)
+INTENSITY_RANK = {'nenhuma': 0, 'baixa': 1, 'média': 2, 'elevada': 3}
+INTENSITIES = sorted(INTENSITY_RANK, key=INTENSITY_RANK.get)
+
+class PlanningService:
+    def __init__(self, weather_service, recomendacao_service):
+
+        # previsões (WeatherService) e regras por cultura (RecomendacaoService)
+        self.weather_service = weather_service
+        self.recomendacao_service = recomendacao_service
+
+        # plano calculado por parcela, válido enquanto a previsão e as regras não mudarem
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def get_plan(self, location_id=None, days=None):
+
+        # devolve o plano já calculado; só recalcula quando há nova previsão ou as regras mudam
+        location = self.weather_service.locations.get(location_id)
+        if location is None:
+            raise KeyError(f"Unknown location: {location_id}")
+        forecast = self.weather_service.get_forecast(location['id'])
+        if forecast is None:
+            return None
+        rule_set = self.recomendacao_service.get_rule_set(location['id'])
+        key = (self.weather_service.forecasts.version(location['id']), self.recomendacao_service.rules.version,
+               rule_set.name)
+        cached = self._plans.get(location['id'])
+        if cached is not None and cached[0] == key:
+            plan = cached[1]
+        else:
+            plan = self.build_plan(forecast, location['id'])
+            with self._lock:
+                self._plans[location['id']] = (key, plan)
+        if days is not None:
+            plan = dict(plan, days=plan['days'][:days])
+        return plan
+
+    def build_plan(self, forecast, location_id=None):
+        try:
+
+            # recomendações para todos os intervalos da previsão numa única passagem vetorizada
+            rule_set = self.recomendacao_service.get_rule_set(location_id)
+            batch = self.recomendacao_service.get_recommendations_batch(
+                forecast.temperature, forecast.humidity, location_id=location_id
+            )
+            irrigate = batch['should_irrigate'].astype(bool)
+            values, inverse = np.unique(batch['intensity'], return_inverse=True)
+            ranks = np.array([INTENSITY_RANK.get(value, 0) for value in values], dtype=np.int8)[inverse]
+            ranks = np.where(irrigate, ranks, 0)
+
+            # agregação por dia local da parcela (a previsão está ordenada por instante)
+            day_index = (forecast.times + forecast.timezone) // 86400
+            day_numbers, starts = np.unique(day_index, return_index=True)
+            counts = np.diff(np.append(starts, len(day_index)))
+            temperature = forecast.temperature.astype(np.float64)
+            humidity = forecast.humidity.astype(np.float64)
+            if len(starts):
+                temperature_min = np.minimum.reduceat(temperature, starts)
+                temperature_max = np.maximum.reduceat(temperature, starts)
+                humidity_mean = np.add.reduceat(humidity, starts) / counts
+                day_rank = np.maximum.reduceat(ranks, starts)
+
+            # conversão para o formato da resposta (um elemento por dia e por intervalo com rega)
+            tz = timezone(timedelta(seconds=forecast.timezone))
+            plan_days = []
+            for i, (day_number, start, count) in enumerate(zip(day_numbers, starts, counts)):
+                day = slice(start, start + count)
+                slots = [
+                    {
+                        'time': datetime.fromtimestamp(int(forecast.times[j]), tz).isoformat(),
+                        'intensity': batch['intensity'][j],
+                        'reason': batch['reason'][j],
+                        'temperature': round(float(forecast.temperature[j]), 2),
+                        'humidity': round(float(forecast.humidity[j]), 2)
+                    }
+                    for j in np.flatnonzero(irrigate[day]) + start
+                ]
+                warnings = []
+                for row in batch['warnings'][day]:
+                    warnings.extend(warning for warning in row if warning not in warnings)
+                plan_days.append({
+                    'date': (datetime(1970, 1, 1) + timedelta(days=int(day_number))).date().isoformat(),
+                    'should_irrigate': bool(slots),
+                    'intensity': INTENSITIES[day_rank[i]],
+                    'irrigation_slots': slots,
+                    'temperature_min': round(float(temperature_min[i]), 2),
+                    'temperature_max': round(float(temperature_max[i]), 2),
+                    'humidity_mean': round(float(humidity_mean[i]), 2),
+                    'warnings': warnings
+                })
+
+            return {
+                'location': location_id,
+                'crop': rule_set.name,
+                'generated_at': datetime.now().isoformat(),
+                'forecast_fetched_at': datetime.fromtimestamp(forecast.fetched_at).isoformat(),
+                'days': plan_days
+            }
+        except Exception as e:
+            logger.error(f"Error building irrigation plan: {str(e)}")
+            raise
@@ -1,73 +1,100 @@
 from ..utils.logger import setup_logger
+from ..storage.crop_rules import CropRuleRegistry
+from ..storage.locations import LocationRegistry
 from .notification_service import NotificationService
+from .alert_engine import AlertEngine
 
 # configuração do logger para registo de eventos
 logger = setup_logger()
 
 class RecomendacaoService:
-    def __init__(self):
-
-        # limiares específicos para o cultivo de uvas
-        self.temperature_thresholds = {
-            'low': 10,    # as uvas necessitam de pelo menos 10°C para crescimento
-            'high': 35    # acima de 35°C pode danificar o desenvolvimento das uvas
-        }
-        self.humidity_thresholds = {
-            'low': 60,    # as uvas preferem humidade acima de 60%
-            'high': 85    # acima de 85% aumenta o risco de doenças fúngicas
-        }
+    def __init__(self, locations=None, rules=None):
+
+        # parcelas (cultura de cada uma) e regras compiladas por cultura, recarregadas quando o ficheiro muda
+        self.locations = locations or LocationRegistry()
+        self.rules = rules or CropRuleRegistry()
 
         # inicialização do serviço de notificações
         self.notification_service = NotificationService()
 
-    def get_recommendation(self, weather_data):
+        # última recomendação por parcela, válida para a mesma observação e versão das regras
+        self._memo = {}
+
+        # motor de alertas: notifica apenas nas mudanças de estado de cada condição
+        self.alert_engine = AlertEngine(
+            self.notification_service, threshold_resolver=self.get_thresholds
+        )
+
+    @property
+    def temperature_thresholds(self):
+        return self.rules.get().thresholds.get('temperature', {})
+
+    @property
+    def humidity_thresholds(self):
+        return self.rules.get().thresholds.get('humidity', {})
+
+    def get_rule_set(self, location_id=None, crop=None):
+
+        # a cultura vem da parcela, se não for indicada
+        if crop is None and location_id is not None:
+            location = self.locations.get(location_id)
+            crop = location.get('crop') if location else None
+        return self.rules.get(crop)
+
+    def get_thresholds(self, location_id=None):
+
+        # limiares de temperatura e humidade da cultura da parcela (usados nos alertas)
+        thresholds = self.get_rule_set(location_id).thresholds
+        return thresholds.get('temperature', {}), thresholds.get('humidity', {})
+
+    def get_recommendation(self, weather_data, crop=None):
         try:
 
-            # extração dos dados meteorológicos
-            temp = weather_data['temperature']
-            humidity = weather_data['humidity']
-
-            # estrutura base da recomendação
-            recommendation = {
-                'should_irrigate': False,
-                'intensity': 'nenhuma',
-                'reason': '',
-                'temperature_status': 'normal',
-                'humidity_status': 'normal',
-                'warnings': []
-            }
-
-            # análise da temperatura para vinhas
-            if temp > self.temperature_thresholds['high']:
-                recommendation['temperature_status'] = 'elevada'
-                recommendation['warnings'].append('Temperatura elevada pode causar stress nas vinhas')
-                recommendation['should_irrigate'] = True
-                recommendation['intensity'] = 'elevada'
-                recommendation['reason'] = 'Temperatura elevada requer aumento da irrigação'
-            elif temp < self.temperature_thresholds['low']:
-                recommendation['temperature_status'] = 'baixa'
-                recommendation['warnings'].append('Temperatura baixa pode atrasar o crescimento')
-
-            # análise da humidade para vinhas
-            if humidity < self.humidity_thresholds['low']:
-                recommendation['humidity_status'] = 'baixa'
-                recommendation['should_irrigate'] = True
-                recommendation['intensity'] = 'elevada'
-                recommendation['reason'] = 'Humidade baixa pode afetar o desenvolvimento das uvas'
-            elif humidity > self.humidity_thresholds['high']:
-                recommendation['humidity_status'] = 'elevada'
-                recommendation['reason'] = 'Humidade elevada - monitorizar doenças fúngicas'
-                recommendation['warnings'].append('Risco de míldio e outras doenças fúngicas')
-            else:
-                # condições normais de humidade
-                recommendation['intensity'] = 'média' if temp > 25 else 'baixa'
-                recommendation['should_irrigate'] = temp > 25
-                recommendation['reason'] = 'Condições normais para a cultura da vinha'
-            
-            self.notification_service.create_notification(recommendation)
-
-            return recommendation
+            # consulta da tabela de decisão compilada para a cultura da parcela
+            rule_set = self.get_rule_set(weather_data.get('location'), crop)
+            return rule_set.evaluate(weather_data)
         except Exception as e:
             # Registo de erro no logger
-            logger.error(f"Erro ao gerar recomendação para cultivo de uvas: {str(e)}")
-            raise
\ No newline at end of file
+            logger.error(f"Erro ao gerar recomendação: {str(e)}")
+            raise
+
+    def get_snapshot_recommendation(self, weather_data, version, conditions=None):
+
+        # a mesma observação (versão do snapshot), as mesmas condições de campo (sensores) e as mesmas
+        # regras dão sempre o mesmo resultado
+        conditions = conditions or {}
+        rule_set = self.get_rule_set(weather_data.get('location'))
+        key = (version, self.rules.version, rule_set.name, tuple(sorted(conditions.items())))
+        cached = self._memo.get(weather_data.get('location'))
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        recommendation = self.get_recommendation(dict(weather_data, **conditions))
+        self._memo[weather_data.get('location')] = (key, recommendation)
+        return recommendation
+
+    def get_recommendations_batch(self, temperatures, humidities, location_id=None, crop=None):
+        try:
+
+            # leituras em colunas (histórico, previsões ou várias parcelas da mesma cultura)
+            rule_set = self.get_rule_set(location_id, crop)
+            return rule_set.evaluate_batch({'temperature': temperatures, 'humidity': humidities})
+        except Exception as e:
+            logger.error(f"Erro ao gerar recomendações em lote: {str(e)}")
+            raise
+
+    def batch_to_recommendations(self, batch):
+
+        # converte o resultado em colunas para o formato de `get_recommendation`
+        fields = list(batch)
+        recommendations = []
+        for row in zip(*(batch[field].ravel() for field in fields)):
+            recommendation = dict(zip(fields, row))
+            recommendation['should_irrigate'] = bool(recommendation['should_irrigate'])
+            recommendation['warnings'] = list(recommendation['warnings'])
+            recommendations.append(recommendation)
+        return recommendations
+
+    def evaluate_alerts(self, weather_data):
+
+        # avalia as condições de alerta para uma nova observação
+        return self.alert_engine.evaluate(weather_data)
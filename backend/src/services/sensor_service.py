@@ -0,0 +1,283 @@
+import os
+import time
+import numpy as np
+from ..storage.sensor_store import METRICS, SensorStore
+from ..storage.snapshot_store import create_snapshot_store
+from ..utils.green import run_blocking
+from ..utils.logger import setup_logger
+from ..utils.metrics import REGISTRY
+from ..utils.time_utils import to_epoch
+
+# configuração do logger para registo de eventos
+logger = setup_logger()
+
+# limites físicos aceites por grandeza (humidade do solo e molhamento foliar em %)
+METRIC_RANGES = {
+    'soil_moisture': (0, 100),
+    'leaf_wetness': (0, 100),
+    'temperature': (-40, 60),
+    'humidity': (0, 100)
+}
+
+# grandezas usadas nas recomendações (as restantes são apenas guardadas)
+CONDITION_METRICS = ('soil_moisture', 'leaf_wetness')
+
+# motivos de rejeição (o índice 0 significa leitura aceite)
+REJECT_REASONS = ('', 'malformed', 'unknown_location', 'invalid_sensor', 'invalid_timestamp', 'no_values',
+                  'out_of_range')
+
+SENSOR_READINGS = REGISTRY.counter(
+    'agrosmart_sensor_readings_total', 'Field sensor readings by outcome', ('outcome',)
+)
+
+class SensorBatch:
+
+    # leituras de um pedido em colunas, antes da validação
+    __slots__ = ('location', 'sensor', 'ts', 'values', 'malformed', 'positions')
+
+    def __init__(self, location, sensor, ts, values, malformed, positions=None):
+        self.location = location
+        self.sensor = sensor
+        self.ts = ts
+        self.values = values
+        self.malformed = malformed
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.ts)
+
+def _to_float(values):
+
+    # conversão em C; só com valores inválidos (ex.: texto) converte um a um e marca-os
+    try:
+        return np.array(values, dtype=np.float64), np.zeros(len(values), dtype=bool)
+    except (TypeError, ValueError):
+        array = np.full(len(values), np.nan)
+        invalid = np.zeros(len(values), dtype=bool)
+        for i, value in enumerate(values):
+            try:
+                array[i] = np.nan if value is None else float(value)
+            except (TypeError, ValueError):
+                invalid[i] = True
+        return array, invalid
+
+def _to_epoch(values, now):
+
+    # epoch em s, ms ou ns (normalizado pela ordem de grandeza) ou texto ISO 8601; sem valor usa a receção
+    try:
+        array = np.array([now if value is None else value for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        array = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                array[i] = now if value is None else to_epoch(value)
+            except (TypeError, ValueError):
+                pass
+    return np.where(array > 1e14, array / 1e9, np.where(array > 1e11, array / 1e3, array))
+
+class SensorService:
+    def __init__(self, locations, store=None, snapshots=None):
+
+        # parcelas conhecidas e armazenamento das leituras (SQLite, em lotes)
+        self.locations = locations
+        self.store = store or SensorStore()
+
+        # últimas condições de campo por parcela (partilhadas entre processos como as observações)
+        self.snapshots = snapshots or create_snapshot_store()
+
+        # limites de cada pedido e janela de tempo aceite
+        self.max_batch = int(os.getenv('SENSOR_MAX_BATCH', 50000))
+        self.max_age = float(os.getenv('SENSOR_MAX_AGE', 7 * 86400))
+        self.max_future = float(os.getenv('SENSOR_MAX_FUTURE', 300))
+        self.max_errors = int(os.getenv('SENSOR_MAX_ERRORS', 20))
+
+        # leituras mais antigas do que isto não entram nas recomendações
+        self.stale_after = float(os.getenv('SENSOR_STALE_AFTER', 7200))
+
+    @staticmethod
+    def key(location_id):
+        return f"sensors:{location_id}"
+
+    def parse_json(self, payload):
+
+        # lista de objetos {"location", "sensor", "timestamp", "soil_moisture", ...}
+        if not isinstance(payload, list):
+            raise ValueError("Expected a JSON array of readings")
+        if len(payload) > self.max_batch:
+            raise OverflowError(f"Batch larger than {self.max_batch} readings")
+        malformed = np.fromiter((not isinstance(row, dict) for row in payload), dtype=bool, count=len(payload))
+        rows = [row if isinstance(row, dict) else {} for row in payload]
+        values = {}
+        for metric in METRICS:
+            values[metric], invalid = _to_float([row.get(metric) for row in rows])
+            malformed |= invalid
+        return SensorBatch(
+            [row.get('location') for row in rows],
+            [row.get('sensor') for row in rows],
+            _to_epoch([row.get('timestamp') for row in rows], time.time()),
+            values, malformed
+        )
+
+    def parse_lines(self, text):
+
+        # protocolo de linhas: "<medida>,location=<id>,sensor=<id> soil_moisture=21.5,leaf_wetness=0 [epoch]"
+        locations, sensors, stamps, positions = [], [], [], []
+        columns = {metric: [] for metric in METRICS}
+        malformed = []
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if len(positions) >= self.max_batch:
+                raise OverflowError(f"Batch larger than {self.max_batch} readings")
+            positions.append(number)
+            try:
+                head, fields, *stamp = line.split(' ')
+                tags = dict(tag.split('=', 1) for tag in head.split(',')[1:])
+                fields = dict(field.split('=', 1) for field in fields.split(','))
+                if len(stamp) > 1:
+                    raise ValueError(line)
+                locations.append(tags.get('location'))
+                sensors.append(tags.get('sensor'))
+                stamps.append(stamp[0] if stamp else None)
+                for metric in METRICS:
+                    columns[metric].append(fields.get(metric, 'nan'))
+                malformed.append(False)
+            except ValueError:
+                locations.append(None)
+                sensors.append(None)
+                stamps.append(None)
+                for metric in METRICS:
+                    columns[metric].append('nan')
+                malformed.append(True)
+
+        malformed = np.array(malformed, dtype=bool)
+        values = {}
+        for metric in METRICS:
+            values[metric], invalid = _to_float(columns[metric])
+            malformed |= invalid
+        return SensorBatch(locations, sensors, _to_epoch(stamps, time.time()), values, malformed,
+                           np.array(positions, dtype=np.int64))
+
+    def validate(self, batch):
+
+        # motivo de rejeição por leitura (o primeiro que se aplica), calculado em colunas
+        count = len(batch)
+        reasons = np.zeros(count, dtype=np.uint8)
+
+        def reject(mask, reason):
+            reasons[(reasons == 0) & mask] = REJECT_REASONS.index(reason)
+
+        reject(batch.malformed, 'malformed')
+
+        # parcelas e sensores: verificados uma vez por valor distinto e expandidos pelo índice inverso
+        location_values = np.array([value if isinstance(value, str) else '' for value in batch.location], dtype=object)
+        unique, location_codes = np.unique(location_values, return_inverse=True)
+        known = np.array([self.locations.get(value) is not None if value else False for value in unique], dtype=bool)
+        reject(~known[location_codes], 'unknown_location')
+        sensor_values = np.array([value if isinstance(value, str) else '' for value in batch.sensor], dtype=object)
+        unique_sensors, sensor_codes = np.unique(sensor_values, return_inverse=True)
+        valid_sensor = np.array([0 < len(value) <= 64 for value in unique_sensors], dtype=bool)
+        reject(~valid_sensor[sensor_codes], 'invalid_sensor')
+
+        # instante dentro da janela aceite
+        now = time.time()
+        ts = batch.ts
+        with np.errstate(invalid='ignore'):
+            reject(~((ts >= now - self.max_age) & (ts <= now + self.max_future)), 'invalid_timestamp')
+
+            # pelo menos uma grandeza e todas dentro dos limites físicos
+            matrix = np.column_stack([batch.values[metric] for metric in METRICS]) if count else np.empty((0, len(METRICS)))
+            present = ~np.isnan(matrix)
+            low = np.array([METRIC_RANGES[metric][0] for metric in METRICS])
+            high = np.array([METRIC_RANGES[metric][1] for metric in METRICS])
+            reject(~present.any(axis=1), 'no_values')
+            reject((present & ((matrix < low) | (matrix > high))).any(axis=1), 'out_of_range')
+
+        accepted = reasons == 0
+        readings = {
+            'location': location_values[accepted].tolist(),
+            'sensor': sensor_values[accepted].tolist(),
+            'ts': ts[accepted]
+        }
+        for metric in METRICS:
+            readings[metric] = batch.values[metric][accepted]
+        return readings, reasons
+
+    def ingest(self, batch):
+
+        # valida, guarda em lote e atualiza as condições de campo das parcelas do lote
+        readings, reasons = self.validate(batch)
+        accepted = len(readings['ts'])
+        rejected = len(batch) - accepted
+        if self.store.append(readings):
+            try:
+                run_blocking(self.store.flush)
+            except Exception as e:
+
+                # as leituras ficam no buffer para a escrita seguinte: o lote continua aceite
+                logger.error(f"Error flushing sensor readings during ingest: {str(e)}")
+        if accepted:
+            self._update_conditions(readings)
+        SENSOR_READINGS.inc(accepted, outcome='accepted')
+        if rejected:
+            SENSOR_READINGS.inc(rejected, outcome='rejected')
+
+        # primeiros erros com a posição no pedido (índice no array JSON ou número da linha)
+        errors = []
+        for index in np.flatnonzero(reasons)[:self.max_errors]:
+            if batch.positions is None:
+                errors.append({'index': int(index), 'reason': REJECT_REASONS[reasons[index]]})
+            else:
+                errors.append({'line': int(batch.positions[index]), 'reason': REJECT_REASONS[reasons[index]]})
+        return {'accepted': accepted, 'rejected': rejected, 'errors': errors}
+
+    def _update_conditions(self, readings):
+
+        # última leitura de cada grandeza por parcela: ordenação por (parcela, instante) e último de cada grupo
+        locations = np.array(readings['location'], dtype=object)
+        unique, codes = np.unique(locations, return_inverse=True)
+        latest = {location: {} for location in unique.tolist()}
+        for metric in METRICS:
+            index = np.flatnonzero(~np.isnan(readings[metric]))
+            if index.size == 0:
+                continue
+            order = index[np.lexsort((readings['ts'][index], codes[index]))]
+            last = order[np.r_[codes[order][1:] != codes[order][:-1], True]]
+            for i in last:
+                latest[locations[i]][metric] = (float(readings[metric][i]), float(readings['ts'][i]),
+                                                readings['sensor'][i])
+
+        # junta às condições já publicadas, mantendo a leitura mais recente de cada grandeza
+        for location, metrics in latest.items():
+            current = dict(self.snapshots.get(self.key(location)) or {})
+            changed = False
+            for metric, (value, ts, sensor) in metrics.items():
+                previous = current.get(metric)
+                if previous is None or ts >= previous['ts']:
+                    current[metric] = {'value': value, 'ts': ts, 'sensor': sensor}
+                    changed = True
+            if changed:
+                self.snapshots.publish(self.key(location), current)
+
+    def get_latest(self, location_id):
+
+        # última leitura de cada grandeza (valor, instante e sensor)
+        return self.snapshots.get(self.key(location_id)) or {}
+
+    def get_conditions(self, location_id):
+
+        # valores recentes usados como entradas das regras de recomendação
+        now = time.time()
+        latest = self.get_latest(location_id)
+        return {
+            metric: latest[metric]['value'] for metric in CONDITION_METRICS
+            if metric in latest and now - latest[metric]['ts'] <= self.stale_after
+        }
+
+    def get_readings(self, location_id, sensor=None, start=None, end=None, limit=None):
+        return run_blocking(self.store.get_readings, location=location_id, sensor=sensor, start=start, end=end,
+                            limit=limit)
+
+    def flush(self):
+        return run_blocking(self.store.flush)
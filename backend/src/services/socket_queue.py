@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import socketio
+from ..utils.green import run_blocking
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS socketio_messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    created REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_socketio_channel_id ON socketio_messages (channel, id);
+"""
+
+
+class SqliteQueueManager(socketio.PubSubManager):
+
+    # fila de mensagens local para distribuir eventos Socket.IO entre processos do mesmo servidor
+    name = 'sqlite'
+
+    def __init__(self, url='sqlite:///data/socketio_queue.db', channel='socketio', write_only=False,
+                 logger=None, poll_interval=None, retention=None):
+
+        # caminho da base (sqlite:///caminho), intervalo de consulta e tempo de vida das mensagens
+        self.db_path = url[len('sqlite:///'):] if url.startswith('sqlite:///') else url
+        self.poll_interval = float(poll_interval if poll_interval is not None else os.getenv('SOCKETIO_QUEUE_POLL_INTERVAL', 0.05))
+        self.retention = float(retention if retention is not None else os.getenv('SOCKETIO_QUEUE_RETENTION', 60))
+        self._local = threading.local()
+        self._last_cleanup = time.monotonic()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        conn.commit()
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _publish(self, data):
+        run_blocking(self._insert, json.dumps(data))
+
+    def _insert(self, payload):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT INTO socketio_messages (channel, created, payload) VALUES (?, ?, ?)',
+                (self.channel, time.time(), payload)
+            )
+
+            # remove periodicamente as mensagens já entregues
+            if time.monotonic() - self._last_cleanup >= self.retention:
+                self._last_cleanup = time.monotonic()
+                conn.execute('DELETE FROM socketio_messages WHERE created < ?', (time.time() - self.retention,))
+
+    def _fetch(self, last_id):
+        return self._connection().execute(
+            'SELECT id, payload FROM socketio_messages WHERE channel = ? AND id > ? ORDER BY id',
+            (self.channel, last_id)
+        ).fetchall()
+
+    def _listen(self):
+
+        # entrega apenas as mensagens publicadas depois do arranque deste processo
+        row = run_blocking(lambda: self._connection().execute('SELECT MAX(id) FROM socketio_messages').fetchone())
+        last_id = row[0] or 0
+        while True:
+            rows = run_blocking(self._fetch, last_id)
+            for message_id, payload in rows:
+                last_id = message_id
+                yield json.loads(payload)
+            if not rows:
+                time.sleep(self.poll_interval)
+
+
+def socketio_queue_options():
+
+    # SOCKETIO_MESSAGE_QUEUE: sqlite:///caminho (local), redis://, amqp:// ou kafka:// (servidores externos)
+    url = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    if not url:
+        return {}
+    if url.startswith('sqlite:'):
+        return {'client_manager': SqliteQueueManager(url)}
+    return {'message_queue': url}
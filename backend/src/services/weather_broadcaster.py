@@ -0,0 +1,56 @@
+import threading
+from ..utils.logger import setup_logger
+
+# configuração do registo de eventos
+logger = setup_logger()
+
+class WeatherBroadcaster:
+    def __init__(self, socketio, fields=None):
+
+        # campos que definem se uma observação mudou (o timestamp muda sempre)
+        self.socketio = socketio
+        self.fields = tuple(fields or ('temperature', 'humidity', 'description'))
+
+        # última assinatura enviada por parcela
+        self._last_sent = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def room(location_id):
+        return f"location:{location_id}"
+
+    def has_changed(self, weather_data):
+
+        # compara com a última observação enviada para a mesma parcela e regista a nova
+        signature = tuple(weather_data.get(field) for field in self.fields)
+        location_id = weather_data.get('location')
+        with self._lock:
+            if self._last_sent.get(location_id) == signature:
+                return False
+            self._last_sent[location_id] = signature
+            return True
+
+    def publish(self, weather_data):
+
+        # um único evento por mudança, apenas para os clientes subscritos à parcela
+        if weather_data.get('stale') or not self.has_changed(weather_data):
+            return False
+        self.socketio.emit('weather_update', weather_data, to=self.room(weather_data.get('location')))
+        return True
+
+    def publish_history(self, weather_data):
+
+        # cada observação guardada é uma nova entrada do histórico, mesmo que os valores se repitam
+        if weather_data.get('stale'):
+            return False
+        self.socketio.emit('history_append', weather_data, to=self.room(weather_data.get('location')))
+        return True
+
+    def publish_notification(self, notification):
+
+        # alertas de uma parcela vão para a sala dessa parcela; os restantes para todos
+        location_id = notification.get('location')
+        if location_id is None:
+            self.socketio.emit('notification', notification)
+        else:
+            self.socketio.emit('notification', notification, to=self.room(location_id))
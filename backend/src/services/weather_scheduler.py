@@ -0,0 +1,159 @@
+import os
+import random
+import threading
+import time
+from ..utils.logger import setup_logger
+
+# configuração do registo de eventos
+logger = setup_logger()
+
+class WeatherScheduler:
+    def __init__(self, weather_service, interval=None, max_backoff=None, on_update=None, leader_lock=None,
+                 forecast_interval=None):
+
+        # serviço responsável pela chamada à API e intervalo entre recolhas
+        self.weather_service = weather_service
+        self.interval = float(interval if interval is not None else os.getenv('WEATHER_POLL_INTERVAL', 20))
+
+        # limite máximo de espera após falhas consecutivas
+        self.max_backoff = float(max_backoff if max_backoff is not None else os.getenv('WEATHER_POLL_MAX_BACKOFF', 300))
+
+        # intervalo entre recolhas de previsões (o OpenWeather atualiza-as a cada 3 horas; 0 desativa)
+        self.forecast_interval = float(
+            forecast_interval if forecast_interval is not None else os.getenv('FORECAST_POLL_INTERVAL', 10800)
+        )
+        self._forecast_polled_at = {}
+
+        # funções chamadas com cada nova observação
+        self.listeners = [on_update] if on_update else []
+
+        # trinco entre processos: com vários processos só o que o obtiver faz a recolha
+        self.leader_lock = leader_lock
+
+        # funções chamadas uma vez, no thread do agendador, quando este processo passa a fazer a recolha
+        self.leader_tasks = []
+        self._leading = False
+
+        self.failures = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def add_leader_task(self, callback):
+        self.leader_tasks.append(callback)
+
+    def start(self):
+
+        # inicia a recolha periódica (ignora se já estiver a correr)
+        if self.is_running():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='weather-scheduler', daemon=True)
+        self._thread.start()
+        logger.info(f"Weather scheduler started (interval={self.interval}s)")
+
+    def stop(self, timeout=5):
+
+        # pede a paragem e espera que o ciclo termine
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.leader_lock is not None:
+            self.leader_lock.release()
+        self._leading = False
+        logger.info("Weather scheduler stopped")
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def is_leader(self):
+        return self.leader_lock is None or self.leader_lock.held
+
+    def poll_once(self):
+
+        # única origem de chamadas à API: recolhe todas as parcelas em paralelo
+        results = self.weather_service.fetch_all_locations()
+        fresh = 0
+        for location_id, weather_data in results.items():
+            if isinstance(weather_data, Exception):
+                logger.warning(f"Weather poll failed for {location_id}: {str(weather_data)}")
+                continue
+
+            # observação de recurso (API indisponível): nada de novo a propagar
+            if weather_data.get('stale'):
+                continue
+            fresh += 1
+            for listener in self.listeners:
+                try:
+                    listener(weather_data)
+                except Exception as e:
+                    logger.error(f"Error in weather update listener: {str(e)}")
+
+        # só uma observação nova repõe o contador; sem nenhuma a recolha conta como falha (backoff)
+        if not fresh:
+            raise RuntimeError("No fresh weather observation in this poll")
+        self.failures = 0
+        return results
+
+    def poll_forecasts(self):
+
+        # recolhe a previsão de cada parcela quando o seu intervalo expira (as que falham tentam na recolha seguinte)
+        now = time.monotonic()
+        if not self.forecast_interval:
+            return None
+        try:
+            due = [
+                location['id'] for location in self.weather_service.locations.all()
+                if location['id'] not in self._forecast_polled_at
+                or now - self._forecast_polled_at[location['id']] >= self.forecast_interval
+            ]
+            if not due:
+                return None
+            results = self.weather_service.fetch_all_forecasts(due)
+            for location_id, forecast in results.items():
+                if isinstance(forecast, Exception):
+                    logger.warning(f"Forecast poll failed for {location_id}: {str(forecast)}")
+                else:
+                    self._forecast_polled_at[location_id] = now
+            return results
+        except Exception as e:
+            logger.error(f"Forecast poll failed: {str(e)}")
+            return None
+
+    def next_delay(self):
+
+        # intervalo normal ou backoff exponencial com jitter após falhas
+        if self.failures == 0:
+            return self.interval
+        ceiling = min(self.max_backoff, self.interval * (2 ** self.failures))
+        return random.uniform(self.interval, max(self.interval, ceiling))
+
+    def _run_leader_tasks(self):
+
+        # antes da primeira recolha (ex.: retomar estado do histórico), fora do caminho dos pedidos
+        for task in self.leader_tasks:
+            try:
+                task()
+            except Exception as e:
+                logger.error(f"Error in scheduler leader task: {str(e)}")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+
+            # outro processo já faz a recolha: tenta de novo no próximo intervalo (assume se ele parar)
+            if self.leader_lock is not None and not self.leader_lock.try_acquire():
+                self._stop_event.wait(self.interval)
+                continue
+            if not self._leading:
+                self._leading = True
+                self._run_leader_tasks()
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Weather poll failed ({self.failures} consecutive): {str(e)}")
+            self.poll_forecasts()
+            self._stop_event.wait(self.next_delay())
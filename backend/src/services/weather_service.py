@@ -1,75 +1,217 @@
-import requests
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 from ..utils.logger import setup_logger
-from ..storage.data_store import DataStore
+from .openweather_client import OpenWeatherClient
+from ..storage.data_store import create_data_store
+from ..storage.forecast_store import Forecast, ForecastStore
+from ..storage.locations import LocationRegistry
+from ..storage.snapshot_store import create_snapshot_store
+from ..utils.green import run_blocking
+from ..utils.metrics import REGISTRY
 
 # carrega as variáveis de ambiente e configura o logger
 load_dotenv()
 logger = setup_logger()
 
+# dicionário para tradução das descrições meteorológicas de inglês para português
+DESCRIPTION_EN_PT = {
+    'clear sky': 'céu limpo',
+    'few clouds': 'poucas nuvens',
+    'scattered clouds': 'nuvens dispersas',
+    'broken clouds': 'nuvens fragmentadas',
+    'light rain': 'chuva fraca',
+    'shower rain': 'aguaceiros',
+    'rain': 'chuva',
+    'thunderstorm': 'trovoada',
+    'snow': 'neve',
+    'fog': 'nevoeiro'
+}
+
+def translate_description(description):
+    return DESCRIPTION_EN_PT.get(description.lower(), description)
+
+# métricas expostas em /metrics
+WEATHER_LATENCY = REGISTRY.histogram(
+    'agrosmart_weather_current_seconds', 'WeatherService.fetch_current_weather latency', ('outcome',)
+)
+STORE_LATENCY = REGISTRY.histogram(
+    'agrosmart_data_store_seconds', 'Data store call latency by operation', ('operation',)
+)
+
 class WeatherService:
     def __init__(self, socketio):
 
-        # inicialização com chave API e configurações base
-        self.api_key = os.getenv('OPENWEATHER_API_KEY')
-        self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+        # inicialização com configurações base
         self.city = "Porto"
         self.country = "PT"
-        self.data_store = DataStore()
+
+        # parcelas monitorizadas; sem ficheiro de configuração usa apenas o Porto
+        self.locations = LocationRegistry(default_location={
+            'id': 'porto', 'name': self.city, 'city': self.city, 'country': self.country, 'crop': 'uva'
+        })
+
+        # recolha concorrente: cliente HTTP partilhado e conjunto limitado de threads
+        self.max_workers = int(os.getenv('WEATHER_FETCH_WORKERS', 8))
+        self.client = OpenWeatherClient(pool_size=self.max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='weather-fetch')
+
+        self.data_store = create_data_store(default_location=self.locations.get()['id'])
         self.socketio = socketio  # guarda a instância socketio para atualizações em tempo real
 
-    def get_current_weather(self):
+        # última observação publicada pelo agendador, lida pelas rotas sem I/O
+        self.snapshots = create_snapshot_store()
+        self.snapshot_wait = float(os.getenv('WEATHER_SNAPSHOT_WAIT', 5))
+
+        # previsões a 5 dias (intervalos de 3 horas) guardadas em colunas
+        self.forecasts = ForecastStore()
+
+    def _resolve_location(self, location_id=None):
+
+        # obtém a parcela pedida (ou a predefinida) do registo
+        location = self.locations.get(location_id)
+        if location is None:
+            raise KeyError(f"Unknown location: {location_id}")
+        return location
+
+    def get_current_weather(self, location_id=None):
+
+        # recolha a pedido (as rotas leem o snapshot publicado pelo agendador, sem I/O)
+        location = self._resolve_location(location_id)
         try:
-            # prepara os parâmetros para a chamada à API
-            params = {
-                'q': f"{self.city},{self.country}",
-                'appid': self.api_key,
-                'units': 'metric'
-            }
-            # faz a chamada à API do OpenWeather
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            
-            weather_data = response.json()
+            return self.fetch_current_weather(location['id'])
+        except Exception:
+
+            # API indisponível: devolve a última observação válida marcada como desatualizada
+            last_good = self.snapshots.get(location['id'])
+            if last_good is None:
+                raise
+            return dict(last_good, stale=True)
+
+    def get_latest_weather(self, location_id=None, timeout=None):
+
+        # devolve a última observação publicada (None se ainda não houver)
+        if timeout is None:
+            timeout = self.snapshot_wait
+        return self.snapshots.get(self._resolve_location(location_id)['id'], timeout)
+
+    def get_weather_version(self, location_id=None):
+
+        # número de observações publicadas para a parcela (muda a cada nova observação)
+        return self.snapshots.version(self._resolve_location(location_id)['id'])
+
+    def fetch_all_locations(self):
+
+        # recolhe todas as parcelas em paralelo; devolve {id: observação ou exceção}
+        return self._fetch_all(self.fetch_current_weather)
+
+    def fetch_all_forecasts(self, location_ids=None):
+
+        # o mesmo para as previsões (todas as parcelas ou só as indicadas): {id: previsão ou exceção}
+        return self._fetch_all(self.fetch_forecast, location_ids)
+
+    def _fetch_all(self, fetch, location_ids=None):
+        if location_ids is None:
+            location_ids = [location['id'] for location in self.locations.all()]
+        futures = {
+            location_id: self.executor.submit(fetch, location_id)
+            for location_id in location_ids
+        }
+        results = {}
+        for location_id, future in futures.items():
+            try:
+                results[location_id] = future.result()
+            except Exception as e:
+                results[location_id] = e
+
+        # só falha a recolha se nenhuma parcela tiver sido atualizada
+        if results and all(isinstance(r, Exception) for r in results.values()):
+            raise next(iter(results.values()))
+        return results
+
+    def _request_params(self, location):
+
+        # coordenadas quando disponíveis, caso contrário cidade e país
+        params = {
+            'units': 'metric'
+        }
+        if 'lat' in location and 'lon' in location:
+            params['lat'] = location['lat']
+            params['lon'] = location['lon']
+        else:
+            params['q'] = f"{location['city']},{location['country']}"
+        return params
+
+    def fetch_current_weather(self, location_id=None):
+        location = self._resolve_location(location_id)
+        started = time.perf_counter()
+        try:
+            # prepara os parâmetros e faz a chamada à API do OpenWeather
+            weather_data = self.client.get_current(self._request_params(location))
             
-            # dicionário para tradução das descrições meteorológicas de inglês para português
-            description_en_pt = {
-                'clear sky': 'céu limpo',
-                'few clouds': 'poucas nuvens',
-                'scattered clouds': 'nuvens dispersas',
-                'broken clouds': 'nuvens fragmentadas',
-                'light rain': 'chuva fraca',
-                'shower rain': 'aguaceiros',
-                'rain': 'chuva',
-                'thunderstorm': 'trovoada',
-                'snow': 'neve',
-                'fog': 'nevoeiro'
-            }
-            description_original = weather_data['weather'][0]['description']
-            description_pt = description_en_pt.get(description_original.lower(), description_original)
+            # traduz a descrição meteorológica de inglês para português
+            description_pt = translate_description(weather_data['weather'][0]['description'])
 
             # simplifica e estrutura os dados meteorológicos relevantes
             simplified_data = {
                 'temperature': weather_data['main']['temp'],
                 'humidity': weather_data['main']['humidity'],
                 'description': description_pt,
-                'timestamp': datetime.now().isoformat()
+                'timestamp': datetime.now().isoformat(),
+                'location': location['id']
             }
             
-            # guarda os dados e emite um evento com as atualizações
-            self.data_store.save_weather_data(simplified_data)
-            self.socketio.emit('weather_update', simplified_data)
+            # guarda os dados e publica o snapshot (os eventos Socket.IO são enviados pelo agendador)
+            with STORE_LATENCY.time(operation='save_weather_data'):
+                run_blocking(self.data_store.save_weather_data, simplified_data, location=location['id'])
+            self.snapshots.publish(location['id'], simplified_data)
+            WEATHER_LATENCY.observe(time.perf_counter() - started, outcome='success')
             return simplified_data
 
         except Exception as e:
 
-            # regista o erro e propaga a exceção
+            # regista o erro e propaga-o (o agendador conta as falhas para o backoff)
+            WEATHER_LATENCY.observe(time.perf_counter() - started, outcome='error')
             logger.error(f"Error fetching weather data: {str(e)}")
             raise
 
-    def get_weather_history(self):
+    def fetch_forecast(self, location_id=None):
+        location = self._resolve_location(location_id)
+        try:
+
+            # previsão a 5 dias da parcela, convertida para colunas e publicada para todos os processos
+            payload = self.client.get('forecast', self._request_params(location))
+            forecast = Forecast.from_api(location['id'], payload, translate=translate_description)
+            self.forecasts.publish(forecast)
+            return forecast
+        except Exception as e:
+            logger.error(f"Error fetching forecast data: {str(e)}")
+            raise
+
+    def get_forecast(self, location_id=None):
+
+        # última previsão publicada (None se ainda não houver)
+        return self.forecasts.get(self._resolve_location(location_id)['id'])
+
+    def get_weather_history(self, limit=None, start=None, end=None, after=None, location_id=None):
+
+        # obtém o histórico de dados meteorológicos do armazenamento (opcionalmente de uma parcela)
+        with STORE_LATENCY.time(operation='get_weather_history'):
+            return run_blocking(self.data_store.get_weather_history,
+                                limit=limit, start=start, end=end, after=after, location=location_id)
+
+    def get_history_version(self):
+
+        # versão do histórico, alterada a cada nova observação
+        return run_blocking(self.data_store.get_history_version)
+
+    def get_weather_aggregates(self, resolution='1h', start=None, end=None, limit=None, location_id=None):
 
-        # obtém o histórico de dados meteorológicos do armazenamento
-        return self.data_store.get_weather_history()
\ No newline at end of file
+        # obtém mínimos, máximos e médias por intervalo (5m, 1h ou 1d)
+        with STORE_LATENCY.time(operation='get_weather_aggregates'):
+            return run_blocking(
+                self.data_store.get_weather_aggregates,
+                resolution=resolution, start=start, end=end, limit=limit, location=location_id
+            )
\ No newline at end of file
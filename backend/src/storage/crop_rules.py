@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+from ..utils.logger import setup_logger
+from ..utils.rule_engine import CompiledRuleSet
+
+# configuração do registo de eventos
+logger = setup_logger()
+
+# regras por omissão (vinha); o ficheiro de regras pode redefini-las ou acrescentar culturas
+DEFAULT_RULES = {
+    'uva': {
+        'name': 'Vinha',
+        'thresholds': {
+            'temperature': {
+                'low': 10,          # as uvas necessitam de pelo menos 10°C para crescimento
+                'high': 35,         # acima de 35°C pode danificar o desenvolvimento das uvas
+                'irrigation': 25    # com humidade normal, acima de 25°C recomenda-se irrigação moderada
+            },
+            'humidity': {
+                'low': 60,          # as uvas preferem humidade acima de 60%
+                'high': 85          # acima de 85% aumenta o risco de doenças fúngicas
+            },
+            'soil_moisture': {
+                'low': 18,          # humidade volumétrica do solo (%) abaixo da qual há stress hídrico
+                'high': 35          # perto da capacidade de campo a rega é desnecessária
+            },
+            'leaf_wetness': {
+                'high': 50          # folhas molhadas favorecem a infeção por míldio
+            }
+        },
+
+        # medidas pelos sensores de campo; sem leituras recentes as regras respetivas não se aplicam
+        'optional': ['soil_moisture', 'leaf_wetness'],
+        'rules': [
+            {
+                'when': {'temperature': {'gt': 'high'}},
+                'set': {
+                    'temperature_status': 'elevada',
+                    'should_irrigate': True,
+                    'intensity': 'elevada',
+                    'reason': 'Temperatura elevada requer aumento da irrigação'
+                },
+                'warning': 'Temperatura elevada pode causar stress nas vinhas'
+            },
+            {
+                'when': {'temperature': {'lt': 'low'}},
+                'set': {'temperature_status': 'baixa'},
+                'warning': 'Temperatura baixa pode atrasar o crescimento'
+            },
+            {
+                'when': {'humidity': {'lt': 'low'}},
+                'set': {
+                    'humidity_status': 'baixa',
+                    'should_irrigate': True,
+                    'intensity': 'elevada',
+                    'reason': 'Humidade baixa pode afetar o desenvolvimento das uvas'
+                }
+            },
+            {
+                'when': {'humidity': {'gt': 'high'}},
+                'set': {
+                    'humidity_status': 'elevada',
+                    'reason': 'Humidade elevada - monitorizar doenças fúngicas'
+                },
+                'warning': 'Risco de míldio e outras doenças fúngicas'
+            },
+            {
+                'when': {'humidity': {'ge': 'low', 'le': 'high'}},
+                'set': {
+                    'should_irrigate': False,
+                    'intensity': 'baixa',
+                    'reason': 'Condições normais para a cultura da vinha'
+                }
+            },
+            {
+                'when': {'humidity': {'ge': 'low', 'le': 'high'}, 'temperature': {'gt': 'irrigation'}},
+                'set': {'should_irrigate': True, 'intensity': 'média'}
+            },
+            {
+                'when': {'soil_moisture': {'lt': 'low'}},
+                'set': {
+                    'should_irrigate': True,
+                    'intensity': 'elevada',
+                    'reason': 'Humidade do solo baixa - risco de stress hídrico'
+                },
+                'warning': 'Solo seco nas vinhas'
+            },
+            {
+                'when': {'soil_moisture': {'gt': 'high'}},
+                'set': {
+                    'should_irrigate': False,
+                    'intensity': 'nenhuma',
+                    'reason': 'Solo com humidade suficiente - rega desnecessária'
+                }
+            },
+            {
+                'when': {'leaf_wetness': {'gt': 'high'}},
+                'warning': 'Folhas molhadas: condições favoráveis ao míldio'
+            }
+        ]
+    }
+}
+
+
+class CropRuleRegistry:
+    def __init__(self, rules_file=None, default_crop=None, check_interval=None):
+
+        # ficheiro com as regras por cultura e cultura usada quando a parcela não indica nenhuma
+        self.rules_file = rules_file or os.getenv('CROP_RULES_FILE', os.path.join('data', 'crop_rules.json'))
+        self.default_crop = default_crop or os.getenv('DEFAULT_CROP', 'uva')
+
+        # intervalo mínimo (segundos) entre verificações do ficheiro
+        self.check_interval = float(check_interval if check_interval is not None else os.getenv('CROP_RULES_CHECK_INTERVAL', 1.0))
+        self._checked_at = None
+
+        # regras compiladas e versão (incrementada a cada recarregamento)
+        self._rule_sets = {}
+        self._signature = None
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def _load(self):
+
+        # recompila apenas quando o ficheiro muda (verificado no máximo uma vez por intervalo)
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self._rule_sets
+        self._checked_at = now
+        try:
+            stat = os.stat(self.rules_file)
+            signature = (self.rules_file, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = (self.rules_file, None, None)
+        if signature == self._signature:
+            return self._rule_sets
+
+        with self._lock:
+            if signature != self._signature:
+                specs = dict(DEFAULT_RULES)
+                try:
+                    if signature[1] is not None:
+                        with open(self.rules_file, 'r', encoding='utf-8') as f:
+                            specs.update(json.load(f))
+                    self._rule_sets = {crop: CompiledRuleSet(spec, crop) for crop, spec in specs.items()}
+                    logger.info(f"Crop rules compiled: {', '.join(self._rule_sets)}")
+                except Exception as e:
+
+                    # regras inválidas: mantém as anteriores (ou as regras por omissão)
+                    logger.error(f"Error loading crop rules: {str(e)}")
+                    if not self._rule_sets:
+                        self._rule_sets = {crop: CompiledRuleSet(spec, crop) for crop, spec in DEFAULT_RULES.items()}
+                self._signature = signature
+                self.version += 1
+        return self._rule_sets
+
+    def crops(self):
+        return list(self._load().keys())
+
+    def get(self, crop=None):
+
+        # culturas desconhecidas usam as regras da cultura por omissão
+        rule_sets = self._load()
+        return rule_sets.get(crop) or rule_sets.get(self.default_crop) or next(iter(rule_sets.values()))
@@ -1,6 +1,8 @@
 import json
 import os
 from ..utils.logger import setup_logger
+from ..utils.rollups import RESOLUTIONS, aggregate_entries
+from .jsonl_store import JsonlDataStore, filter_entries, slice_history
 
 # Configuração do sistema de registo
 logger = setup_logger()
@@ -15,8 +17,10 @@ class DataStore:
         # cria a pasta de dados se não existir
         os.makedirs(self.data_dir, exist_ok=True)
 
-    def save_weather_data(self, data):
+    def save_weather_data(self, data, location=None):
         try:
+            if location is not None:
+                data = dict(data, location=location)
 
             # obtém o histórico atual de dados meteorológicos
             history = self.get_weather_history()
@@ -28,9 +32,11 @@ class DataStore:
             if len(history) > 24:
                 history = history[-24:]
             
-            # guarda os dados atualizados no ficheiro
-            with open(self.weather_file, 'w') as f:
+            # guarda os dados atualizados num ficheiro temporário e substitui o original
+            tmp_file = self.weather_file + '.tmp'
+            with open(tmp_file, 'w') as f:
                 json.dump(history, f, indent=2)
+            os.replace(tmp_file, self.weather_file)
             
             # regista o sucesso da operação
             logger.info("Weather data saved successfully")
@@ -42,7 +48,7 @@ class DataStore:
             logger.error(f"Error saving weather data: {str(e)}")
             return False
 
-    def get_weather_history(self):
+    def get_weather_history(self, limit=None, start=None, end=None, location=None, after=None):
         try:
 
             # verifica se o ficheiro de histórico existe
@@ -51,9 +57,42 @@ class DataStore:
             
             # lê e devolve os dados do ficheiro
             with open(self.weather_file, 'r') as f:
-                return json.load(f)
+                history = json.load(f)
+            if start is not None or end is not None or location is not None or after is not None:
+                history = filter_entries(history, start, end, location, after)
+            return slice_history(history, limit, after)
         except Exception as e:
 
             # Regista o erro em caso de falha na leitura
             logger.error(f"Error reading weather history: {str(e)}")
-            return []
\ No newline at end of file
+            return []
+
+    def get_history_version(self):
+
+        # muda sempre que o ficheiro é reescrito (usado como ETag)
+        try:
+            stat = os.stat(self.weather_file)
+            return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        except OSError:
+            return "0"
+
+    def get_weather_aggregates(self, resolution='1h', start=None, end=None, location=None, limit=None):
+
+        # sem tabelas de rollup: agrega o histórico no momento, de forma vetorizada
+        entries = self.get_weather_history(start=start, end=end, location=location)
+        points = aggregate_entries(entries, RESOLUTIONS[resolution])
+        return points[-limit:] if limit else points
+
+
+def create_data_store(backend=None, default_location=None):
+
+    # escolhe a implementação de armazenamento (DATA_STORE_BACKEND: sqlite, jsonl ou json)
+    backend = (backend or os.getenv('DATA_STORE_BACKEND', 'sqlite')).lower()
+    if backend == 'sqlite':
+        from .sqlite_store import SqliteDataStore
+        return SqliteDataStore(default_location=default_location)
+    if backend == 'jsonl':
+        return JsonlDataStore()
+    if backend == 'json':
+        return DataStore()
+    raise ValueError(f"Unknown data store backend: {backend}")
@@ -0,0 +1,103 @@
+import threading
+import time
+import numpy as np
+from .snapshot_store import create_snapshot_store
+
+
+class Forecast:
+
+    # previsão de uma parcela em colunas: instantes (epoch), temperatura e humidade em float32
+    # e descrições codificadas (índice para a lista de categorias)
+    __slots__ = ('location', 'times', 'temperature', 'humidity', 'description_codes', 'descriptions',
+                 'timezone', 'fetched_at')
+
+    def __init__(self, location, times, temperature, humidity, description_codes, descriptions,
+                 timezone=0, fetched_at=None):
+        self.location = location
+        self.times = np.asarray(times, dtype=np.int64)
+        self.temperature = np.asarray(temperature, dtype=np.float32)
+        self.humidity = np.asarray(humidity, dtype=np.float32)
+        self.description_codes = np.asarray(description_codes, dtype=np.uint8)
+        self.descriptions = list(descriptions)
+        self.timezone = int(timezone)
+        self.fetched_at = fetched_at if fetched_at is not None else time.time()
+
+    @classmethod
+    def from_api(cls, location, payload, translate=None):
+
+        # converte a resposta do endpoint /forecast (lista de intervalos de 3 horas), ordenada por instante
+        entries = sorted(payload.get('list', []), key=lambda entry: entry['dt'])
+        count = len(entries)
+        times = np.fromiter((entry['dt'] for entry in entries), dtype=np.int64, count=count)
+        temperature = np.fromiter((entry['main']['temp'] for entry in entries), dtype=np.float32, count=count)
+        humidity = np.fromiter((entry['main']['humidity'] for entry in entries), dtype=np.float32, count=count)
+
+        # cada descrição distinta é guardada (e traduzida) uma única vez
+        raw = [entry['weather'][0]['description'] if entry.get('weather') else '' for entry in entries]
+        categories, codes = np.unique(np.array(raw, dtype=object), return_inverse=True) if raw else ([], [])
+        descriptions = [translate(value) if translate else value for value in categories]
+        timezone = (payload.get('city') or {}).get('timezone', 0)
+        return cls(location, times, temperature, humidity, codes, descriptions, timezone)
+
+    def __len__(self):
+        return len(self.times)
+
+    @property
+    def description(self):
+        return [self.descriptions[code] for code in self.description_codes]
+
+    def to_dict(self):
+
+        # formato em colunas para o armazenamento partilhado (JSON)
+        return {
+            'location': self.location,
+            'times': self.times.tolist(),
+            'temperature': self.temperature.tolist(),
+            'humidity': self.humidity.tolist(),
+            'description_codes': self.description_codes.tolist(),
+            'descriptions': self.descriptions,
+            'timezone': self.timezone,
+            'fetched_at': self.fetched_at
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+class ForecastStore:
+    def __init__(self, snapshots=None):
+
+        # previsões publicadas pelo processo que faz a recolha (em memória ou partilhadas via SQLite)
+        self.snapshots = snapshots or create_snapshot_store()
+
+        # previsões já convertidas para arrays, por parcela e versão
+        self._decoded = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(location_id):
+        return f"forecast:{location_id}"
+
+    def publish(self, forecast):
+        self.snapshots.publish(self.key(forecast.location), forecast.to_dict())
+
+    def version(self, location_id):
+        return self.snapshots.version(self.key(location_id))
+
+    def get(self, location_id):
+
+        # só converte de novo quando a versão publicada muda
+        version = self.version(location_id)
+        if version == 0:
+            return None
+        cached = self._decoded.get(location_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        data = self.snapshots.get(self.key(location_id))
+        if data is None:
+            return None
+        forecast = Forecast.from_dict(data)
+        with self._lock:
+            self._decoded[location_id] = (version, forecast)
+        return forecast
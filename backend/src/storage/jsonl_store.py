@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+from ..utils.logger import setup_logger
+from ..utils.rollups import RESOLUTIONS, aggregate_entries
+from ..utils.time_utils import to_epoch
+
+# configuração do sistema de registo
+logger = setup_logger()
+
+class JsonlDataStore:
+    def __init__(self, data_dir="data", retention_days=None, compact_every=None):
+
+        # ficheiro append-only (uma observação por linha) e ficheiro antigo para migração
+        self.data_dir = data_dir
+        self.weather_file = os.path.join(self.data_dir, "weather_data.jsonl")
+        self.legacy_file = os.path.join(self.data_dir, "weather_data.json")
+
+        # retenção por tempo e número de escritas entre compactações
+        if retention_days is None:
+            retention_days = float(os.getenv('WEATHER_RETENTION_DAYS', 180))
+        if compact_every is None:
+            compact_every = int(os.getenv('WEATHER_COMPACT_EVERY', 1000))
+        self.retention = timedelta(days=retention_days)
+        self.compact_every = compact_every
+
+        self._lock = threading.Lock()
+        self._appends = 0
+
+        # cria a pasta de dados e importa o histórico antigo, se existir
+        os.makedirs(self.data_dir, exist_ok=True)
+        self._migrate_legacy_file()
+
+    def save_weather_data(self, data, location=None):
+        try:
+            if location is not None:
+                data = dict(data, location=location)
+
+            # acrescenta uma linha ao fim do ficheiro: custo constante por escrita
+            line = (json.dumps(data, separators=(',', ':')) + '\n').encode('utf-8')
+            with self._lock:
+                with open(self.weather_file, 'a+b') as f:
+
+                    # linha cortada no fim (escrita interrompida): termina-a para não estragar a nova
+                    if f.seek(0, os.SEEK_END) > 0:
+                        f.seek(-1, os.SEEK_END)
+                        if f.read(1) != b'\n':
+                            line = b'\n' + line
+                    f.write(line)
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._appends += 1
+                compact = self.compact_every and self._appends >= self.compact_every
+
+            # compactação periódica para aplicar a retenção
+            if compact:
+                self.compact()
+
+            logger.info("Weather data saved successfully")
+            return True
+
+        except Exception as e:
+
+            # regista o erro em caso de falha
+            logger.error(f"Error saving weather data: {str(e)}")
+            return False
+
+    def get_weather_history(self, limit=None, start=None, end=None, location=None, after=None):
+        try:
+            if not os.path.exists(self.weather_file):
+                return []
+
+            # sem filtros e com limite, lê apenas o fim do ficheiro
+            filtered = start is not None or end is not None or location is not None or after is not None
+            if limit and not filtered:
+                return self._parse_lines(self._read_tail(limit))[-limit:]
+            with open(self.weather_file, 'r', encoding='utf-8') as f:
+                entries = self._parse_lines(f)
+            if filtered:
+                entries = filter_entries(entries, start, end, location, after)
+            return slice_history(entries, limit, after)
+
+        except Exception as e:
+
+            # regista o erro em caso de falha na leitura
+            logger.error(f"Error reading weather history: {str(e)}")
+            return []
+
+    def get_history_version(self):
+
+        # muda sempre que o ficheiro é escrito (usado como ETag)
+        try:
+            stat = os.stat(self.weather_file)
+            return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+        except OSError:
+            return "0"
+
+    def get_weather_aggregates(self, resolution='1h', start=None, end=None, location=None, limit=None):
+
+        # sem tabelas de rollup: agrega o histórico no momento, de forma vetorizada
+        entries = self.get_weather_history(start=start, end=end, location=location)
+        points = aggregate_entries(entries, RESOLUTIONS[resolution])
+        return points[-limit:] if limit else points
+
+    def compact(self):
+        try:
+            with self._lock:
+                if not os.path.exists(self.weather_file):
+                    return 0
+
+                # mantém apenas as observações dentro da janela de retenção
+                cutoff = datetime.now() - self.retention
+                with open(self.weather_file, 'r', encoding='utf-8') as f:
+                    entries = [e for e in self._parse_lines(f) if self._is_recent(e, cutoff)]
+                self._write_atomic(entries)
+                self._appends = 0
+
+            logger.info(f"Weather history compacted ({len(entries)} entries kept)")
+            return len(entries)
+
+        except Exception as e:
+            logger.error(f"Error compacting weather history: {str(e)}")
+            return None
+
+    def _write_atomic(self, entries):
+
+        # escreve num ficheiro temporário e substitui o original de forma atómica
+        tmp_file = self.weather_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.weather_file)
+
+    def _read_tail(self, count, block_size=8192):
+
+        # lê blocos a partir do fim até ter linhas suficientes
+        with open(self.weather_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b''
+            while position > 0 and data.count(b'\n') <= count:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data.decode('utf-8', errors='ignore').splitlines()
+
+        # a primeira linha pode estar cortada se não chegámos ao início
+        if position > 0:
+            lines = lines[1:]
+        return lines
+
+    def _parse_lines(self, lines):
+
+        # ignora linhas vazias ou corrompidas (ex.: escrita interrompida)
+        entries = []
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping corrupted weather history line")
+        return entries
+
+    def _is_recent(self, entry, cutoff):
+        try:
+            return datetime.fromisoformat(entry['timestamp']) >= cutoff
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def _migrate_legacy_file(self):
+
+        # importa o ficheiro JSON antigo na primeira utilização
+        if os.path.exists(self.weather_file) or not os.path.exists(self.legacy_file):
+            return
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            self._write_atomic(entries)
+            logger.info(f"Migrated {len(entries)} entries from {self.legacy_file}")
+        except Exception as e:
+            logger.error(f"Error migrating legacy weather history: {str(e)}")
+
+
+def filter_entries(entries, start=None, end=None, location=None, after=None):
+
+    # filtragem sequencial usada pelos armazenamentos baseados em ficheiros
+    start, end, after = to_epoch(start), to_epoch(end), to_epoch(after)
+    result = []
+    for entry in entries:
+        if location is not None and entry.get('location', location) != location:
+            continue
+        if start is not None or end is not None or after is not None:
+            try:
+                ts = to_epoch(entry['timestamp'])
+            except (KeyError, ValueError):
+                continue
+            if (start is not None and ts < start) or (end is not None and ts > end):
+                continue
+            if after is not None and ts <= after:
+                continue
+        result.append(entry)
+    return result
+
+
+def slice_history(entries, limit, after=None):
+
+    # com cursor devolve as primeiras entradas seguintes; sem cursor, as mais recentes
+    if not limit:
+        return entries
+    return entries[:limit] if after is not None else entries[-limit:]
@@ -0,0 +1,77 @@
+import json
+import os
+import threading
+from ..utils.logger import setup_logger
+
+# configuração do registo de eventos
+logger = setup_logger()
+
+class LocationRegistry:
+    def __init__(self, locations_file=None, default_location=None):
+
+        # ficheiro com as parcelas monitorizadas (id, nome, coordenadas, cultura)
+        self.locations_file = locations_file or os.getenv('LOCATIONS_FILE', os.path.join('data', 'locations.json'))
+
+        # parcela usada quando o ficheiro não existe
+        self.default_location = default_location or {
+            'id': 'porto',
+            'name': 'Porto',
+            'city': 'Porto',
+            'country': 'PT',
+            'crop': 'uva'
+        }
+
+        self._locations = {}
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+
+        # recarrega apenas quando o ficheiro muda
+        try:
+            stat = os.stat(self.locations_file)
+            signature = (self.locations_file, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = (self.locations_file, None, None)
+        if signature == self._signature:
+            return self._locations
+
+        with self._lock:
+            if signature != self._signature:
+                locations = {str(self.default_location['id']): self.default_location}
+                if signature[1] is not None:
+                    try:
+                        locations = self._read_file()
+                    except Exception as e:
+
+                        # ficheiro inválido (ex.: a meio de uma edição): mantém as parcelas já carregadas
+                        logger.error(f"Error loading locations file, keeping previous locations: {str(e)}")
+                        locations = self._locations or locations
+                self._locations = locations
+                self._signature = signature
+        return self._locations
+
+    def _read_file(self):
+        with open(self.locations_file, 'r', encoding='utf-8') as f:
+            locations = json.load(f)
+
+        # uma lista não vazia de parcelas, cada uma com id
+        if not isinstance(locations, list) or not locations:
+            raise ValueError("expected a non-empty list of locations")
+        if not all(isinstance(location, dict) and location.get('id') is not None for location in locations):
+            raise ValueError("every location needs an 'id'")
+        return {str(location['id']): location for location in locations}
+
+    def all(self):
+        return list(self._load().values())
+
+    def ids(self):
+        return list(self._load().keys())
+
+    def get(self, location_id=None):
+
+        # sem id devolve a primeira parcela registada
+        locations = self._load()
+        if location_id is None:
+            return next(iter(locations.values()), None)
+        return locations.get(str(location_id))
@@ -0,0 +1,136 @@
+import heapq
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+
+class NotificationRecord:
+
+    # registo compacto: sem __dict__ por instância
+    __slots__ = ('seq', 'id', 'type', 'message', 'severity', 'timestamp', 'details', 'location', 'acknowledged')
+
+    def __init__(self, seq, notification):
+        self.seq = seq
+        self.id = notification['id']
+        self.type = notification['type']
+        self.message = notification['message']
+        self.severity = notification['severity']
+        self.timestamp = notification['timestamp']
+        self.details = notification.get('details')
+        self.location = notification.get('location')
+        self.acknowledged = False
+
+    def to_dict(self):
+        data = {
+            'id': self.id,
+            'type': self.type,
+            'message': self.message,
+            'severity': self.severity,
+            'timestamp': self.timestamp,
+            'details': self.details,
+            'acknowledged': self.acknowledged
+        }
+        if self.location is not None:
+            data['location'] = self.location
+        return data
+
+
+class NotificationStore:
+    def __init__(self, severity_levels, capacity=None):
+
+        # níveis de severidade e capacidade máxima (as mais antigas são descartadas)
+        self.severity_levels = severity_levels
+        self.capacity = int(capacity if capacity is not None else os.getenv('NOTIFICATION_CAPACITY', 1000))
+
+        # índice id -> registo, por ordem de chegada, e um índice por severidade
+        self._records = OrderedDict()
+        self._by_severity = {severity: OrderedDict() for severity in severity_levels}
+
+        # notificações já confirmadas, candidatas preferenciais à remoção
+        self._acknowledged = OrderedDict()
+
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, notification):
+        with self._lock:
+            record = NotificationRecord(next(self._seq), notification)
+            self._records[record.id] = record
+            self._by_severity[record.severity][record.id] = record
+
+            # ao exceder a capacidade remove primeiro as confirmadas, depois as mais antigas
+            while len(self._records) > self.capacity:
+                if self._acknowledged:
+                    oldest_id = next(iter(self._acknowledged))
+                else:
+                    oldest_id = next(iter(self._records))
+                self._remove(oldest_id)
+            return record
+
+    def get(self, notification_id):
+        record = self._records.get(str(notification_id))
+        return record.to_dict() if record is not None else None
+
+    def delete(self, notification_id):
+
+        # remoção O(1) por id
+        with self._lock:
+            return self._remove(str(notification_id))
+
+    def acknowledge(self, notification_id):
+        with self._lock:
+            record = self._records.get(str(notification_id))
+            if record is None:
+                return False
+            record.acknowledged = True
+            self._acknowledged[record.id] = None
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self._acknowledged.clear()
+            for bucket in self._by_severity.values():
+                bucket.clear()
+
+    def list(self, min_severity=None, include_acknowledged=False):
+
+        # junta, por ordem de chegada, apenas os índices com severidade suficiente
+        with self._lock:
+            if min_severity is None:
+                records = list(self._records.values())
+            else:
+                threshold = self.severity_levels[min_severity]
+                buckets = [list(bucket.values()) for severity, bucket in self._by_severity.items()
+                           if self.severity_levels[severity] >= threshold]
+                records = list(heapq.merge(*buckets, key=lambda r: r.seq))
+        return [r.to_dict() for r in records if include_acknowledged or not r.acknowledged]
+
+    def counts(self):
+
+        # número de notificações guardadas por severidade
+        return {severity: len(bucket) for severity, bucket in self._by_severity.items()}
+
+    def _remove(self, notification_id):
+        record = self._records.pop(notification_id, None)
+        if record is None:
+            return False
+        self._by_severity[record.severity].pop(notification_id, None)
+        self._acknowledged.pop(notification_id, None)
+        return True
+
+
+def create_notification_store(severity_levels, capacity=None, backend=None):
+
+    # memória (um processo) ou SQLite partilhado entre processos (STATE_BACKEND: memory ou sqlite)
+    backend = (backend or os.getenv('STATE_BACKEND', 'memory')).lower()
+    if backend == 'memory':
+        return NotificationStore(severity_levels, capacity)
+    if backend == 'sqlite':
+        from .sqlite_state import SqliteNotificationStore
+        return SqliteNotificationStore(severity_levels, capacity)
+    raise ValueError(f"Unknown state backend: {backend}")
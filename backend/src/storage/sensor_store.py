@@ -0,0 +1,193 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from ..utils.file_lock import FileLock
+from ..utils.logger import setup_logger
+from ..utils.time_utils import to_epoch
+
+# configuração do sistema de registo
+logger = setup_logger()
+
+# grandezas medidas pelos sensores de campo (colunas da tabela, NULL quando o sensor não as mede)
+METRICS = ('soil_moisture', 'leaf_wetness', 'temperature', 'humidity')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sensor_readings (
+    location TEXT NOT NULL,
+    sensor TEXT NOT NULL,
+    ts REAL NOT NULL,
+    soil_moisture REAL,
+    leaf_wetness REAL,
+    temperature REAL,
+    humidity REAL
+);
+CREATE INDEX IF NOT EXISTS idx_sensor_location_ts ON sensor_readings (location, ts);
+"""
+
+class SensorStore:
+    def __init__(self, db_path=None, batch_size=None, flush_interval=None, max_pending=None):
+
+        # leituras guardadas na mesma base SQLite do histórico meteorológico, numa tabela própria
+        self.db_path = db_path or os.getenv('SQLITE_PATH', os.path.join('data', 'agrosmart.db'))
+        self.batch_size = int(batch_size if batch_size is not None else os.getenv('SENSOR_BATCH_SIZE', 5000))
+        self.flush_interval = float(flush_interval if flush_interval is not None else os.getenv('SENSOR_FLUSH_INTERVAL', 1))
+
+        # máximo de leituras retidas em memória enquanto a escrita falha (as mais antigas são descartadas)
+        self.max_pending = int(max_pending if max_pending is not None else os.getenv('SENSOR_MAX_PENDING', 100000))
+
+        # uma ligação por thread, reutilizada entre pedidos
+        self._local = threading.local()
+
+        # lotes pendentes em colunas (numpy), inseridos juntos numa única transação
+        self._chunks = []
+        self._pending = 0
+        self._buffer_since = None
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with FileLock(self.db_path + '.lock'):
+            conn = self._connection()
+            conn.executescript(SCHEMA)
+            conn.commit()
+
+    def _connection(self):
+
+        # abre a ligação da thread atual na primeira utilização
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def flush_due(self):
+
+        # lote cheio ou leituras pendentes há mais do que o intervalo configurado
+        return self._pending > 0 and (self._pending >= self.batch_size or
+                                      time.monotonic() - self._buffer_since >= self.flush_interval)
+
+    def append(self, readings):
+
+        # acrescenta um lote já validado (colunas location, sensor, ts e uma por grandeza)
+        count = len(readings['ts'])
+        if count == 0:
+            return False
+        with self._buffer_lock:
+            self._chunks.append(readings)
+            self._pending += count
+            if self._buffer_since is None:
+                self._buffer_since = time.monotonic()
+            self._trim()
+        return self.flush_due()
+
+    def _trim(self):
+
+        # com a base indisponível o buffer não cresce sem limite: descarta os lotes mais antigos
+        dropped = 0
+        while self._pending > self.max_pending and len(self._chunks) > 1:
+            count = len(self._chunks.pop(0)['ts'])
+            self._pending -= count
+            dropped += count
+        if dropped:
+            logger.error(f"Sensor buffer over {self.max_pending} readings, dropped {dropped} oldest readings")
+
+    def flush(self):
+
+        # escreve todas as leituras pendentes (uma transação, executemany sobre as colunas)
+        with self._flush_lock:
+            with self._buffer_lock:
+                chunks, self._chunks = self._chunks, []
+                self._pending = 0
+                self._buffer_since = None
+            if not chunks:
+                return 0
+            try:
+                rows = 0
+                conn = self._connection()
+                with conn:
+                    for chunk in chunks:
+
+                        # NaN (grandeza não medida) fica NULL no SQLite
+                        columns = [chunk['location'], chunk['sensor'], chunk['ts'].tolist()]
+                        columns += [chunk[metric].tolist() for metric in METRICS]
+                        rows += conn.executemany(
+                            'INSERT INTO sensor_readings (location, sensor, ts, soil_moisture, leaf_wetness, '
+                            'temperature, humidity) VALUES (?, ?, ?, ?, ?, ?, ?)', zip(*columns)
+                        ).rowcount
+                logger.info(f"Sensor readings saved successfully ({rows} rows)")
+                return rows
+            except Exception as e:
+
+                # a transação foi desfeita: devolve os lotes ao início do buffer para a próxima escrita
+                with self._buffer_lock:
+                    self._chunks[:0] = chunks
+                    self._pending += sum(len(chunk['ts']) for chunk in chunks)
+                    if self._buffer_since is None:
+                        self._buffer_since = time.monotonic()
+                    self._trim()
+                logger.error(f"Error saving sensor readings: {str(e)}")
+                raise
+
+    def get_readings(self, location=None, sensor=None, start=None, end=None, limit=None):
+        try:
+
+            # garante que as leituras pendentes são visíveis
+            self.flush()
+            clauses, params = [], []
+            if location is not None:
+                clauses.append('location = ?')
+                params.append(location)
+            if sensor is not None:
+                clauses.append('sensor = ?')
+                params.append(sensor)
+            if start is not None:
+                clauses.append('ts >= ?')
+                params.append(to_epoch(start))
+            if end is not None:
+                clauses.append('ts <= ?')
+                params.append(to_epoch(end))
+            query = 'SELECT * FROM sensor_readings'
+            if clauses:
+                query += ' WHERE ' + ' AND '.join(clauses)
+
+            # as mais recentes, devolvidas por ordem cronológica
+            query += ' ORDER BY ts DESC'
+            if limit:
+                query += ' LIMIT ?'
+                params.append(int(limit))
+            rows = self._connection().execute(query, params).fetchall()
+            rows.reverse()
+            return [self._from_row(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error reading sensor readings: {str(e)}")
+            return []
+
+    def close(self):
+        self.flush()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _from_row(self, row):
+        reading = {
+            'location': row['location'],
+            'sensor': row['sensor'],
+            'timestamp': datetime.fromtimestamp(row['ts']).isoformat()
+        }
+        for metric in METRICS:
+            if row[metric] is not None:
+                reading[metric] = row[metric]
+        return reading
@@ -0,0 +1,49 @@
+import os
+import threading
+
+
+class SnapshotStore:
+    def __init__(self):
+
+        # última observação publicada por localização e respetiva versão
+        self._snapshots = {}
+        self._versions = {}
+        self._condition = threading.Condition()
+
+    def publish(self, key, data):
+
+        # substitui a observação atual e acorda quem espera pela primeira
+        with self._condition:
+            self._snapshots[key] = data
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._condition.notify_all()
+
+    def get(self, key, timeout=None):
+
+        # leitura O(1) sem I/O; opcionalmente espera pela primeira publicação
+        snapshot = self._snapshots.get(key)
+        if snapshot is not None or not timeout:
+            return snapshot
+        with self._condition:
+            self._condition.wait_for(lambda: key in self._snapshots, timeout)
+            return self._snapshots.get(key)
+
+    def version(self, key):
+
+        # número de publicações para a localização (0 se nunca houve)
+        return self._versions.get(key, 0)
+
+    def keys(self):
+        return list(self._snapshots.keys())
+
+
+def create_snapshot_store(backend=None):
+
+    # memória (um processo) ou SQLite partilhado entre processos (STATE_BACKEND: memory ou sqlite)
+    backend = (backend or os.getenv('STATE_BACKEND', 'memory')).lower()
+    if backend == 'memory':
+        return SnapshotStore()
+    if backend == 'sqlite':
+        from .sqlite_state import SqliteSnapshotStore
+        return SqliteSnapshotStore()
+    raise ValueError(f"Unknown state backend: {backend}")
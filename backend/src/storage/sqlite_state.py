@@ -0,0 +1,203 @@
+import json
+import os
+import sqlite3
+import time
+from functools import wraps
+from ..utils.green import run_blocking, thread_local
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS notifications (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    type TEXT NOT NULL,
+    message TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    severity_level INTEGER NOT NULL,
+    timestamp TEXT NOT NULL,
+    details TEXT,
+    location TEXT,
+    acknowledged INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_notifications_severity ON notifications (severity_level, seq);
+CREATE TABLE IF NOT EXISTS snapshots (
+    key TEXT PRIMARY KEY,
+    version INTEGER NOT NULL,
+    data TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def off_hub(method):
+
+    # em modo eventlet as consultas correm no conjunto de threads (tpool), nunca no hub
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return run_blocking(method, self, *args, **kwargs)
+    return wrapper
+
+
+def default_state_path():
+
+    # base de dados partilhada pelos processos de trabalho
+    return os.getenv('STATE_DB_PATH', os.path.join('data', 'agrosmart_state.db'))
+
+
+class SqliteState:
+    def __init__(self, db_path=None):
+
+        # uma ligação por thread do sistema à base partilhada (modo WAL: leitores não bloqueiam o escritor)
+        self.db_path = db_path or default_state_path()
+        self._local = thread_local()
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+
+class SqliteNotificationStore(SqliteState):
+    def __init__(self, severity_levels, capacity=None, db_path=None):
+
+        # mesma interface do NotificationStore, partilhada entre processos
+        self.severity_levels = severity_levels
+        self.capacity = int(capacity if capacity is not None else os.getenv('NOTIFICATION_CAPACITY', 1000))
+        super().__init__(db_path)
+
+    @off_hub
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM notifications').fetchone()[0]
+
+    @off_hub
+    def add(self, notification):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT INTO notifications (id, type, message, severity, severity_level, timestamp, details, location) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (notification['id'], notification['type'], notification['message'], notification['severity'],
+                 self.severity_levels[notification['severity']], notification['timestamp'],
+                 notification.get('details'), notification.get('location'))
+            )
+
+            # ao exceder a capacidade remove primeiro as confirmadas, depois as mais antigas
+            excess = conn.execute('SELECT COUNT(*) FROM notifications').fetchone()[0] - self.capacity
+            if excess > 0:
+                conn.execute(
+                    'DELETE FROM notifications WHERE seq IN '
+                    '(SELECT seq FROM notifications ORDER BY acknowledged DESC, seq ASC LIMIT ?)', (excess,)
+                )
+        return notification
+
+    @off_hub
+    def get(self, notification_id):
+        row = self._connection().execute(
+            'SELECT * FROM notifications WHERE id = ?', (str(notification_id),)
+        ).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    @off_hub
+    def delete(self, notification_id):
+        conn = self._connection()
+        with conn:
+            return conn.execute('DELETE FROM notifications WHERE id = ?', (str(notification_id),)).rowcount > 0
+
+    @off_hub
+    def acknowledge(self, notification_id):
+        conn = self._connection()
+        with conn:
+            return conn.execute(
+                'UPDATE notifications SET acknowledged = 1 WHERE id = ?', (str(notification_id),)
+            ).rowcount > 0
+
+    @off_hub
+    def clear(self):
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM notifications')
+
+    @off_hub
+    def list(self, min_severity=None, include_acknowledged=False):
+
+        # filtro por severidade e estado feito pelo índice, por ordem de chegada
+        query = 'SELECT * FROM notifications WHERE severity_level >= ?'
+        if not include_acknowledged:
+            query += ' AND acknowledged = 0'
+        threshold = self.severity_levels[min_severity] if min_severity is not None else 0
+        rows = self._connection().execute(query + ' ORDER BY seq', (threshold,)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    @off_hub
+    def counts(self):
+        counts = {severity: 0 for severity in self.severity_levels}
+        for row in self._connection().execute('SELECT severity, COUNT(*) FROM notifications GROUP BY severity'):
+            counts[row[0]] = row[1]
+        return counts
+
+    def _to_dict(self, row):
+        data = {
+            'id': row['id'],
+            'type': row['type'],
+            'message': row['message'],
+            'severity': row['severity'],
+            'timestamp': row['timestamp'],
+            'details': row['details'],
+            'acknowledged': bool(row['acknowledged'])
+        }
+        if row['location'] is not None:
+            data['location'] = row['location']
+        return data
+
+
+class SqliteSnapshotStore(SqliteState):
+    def __init__(self, db_path=None, poll_interval=0.1):
+
+        # última observação por localização, publicada pelo processo que faz a recolha
+        self.poll_interval = poll_interval
+        super().__init__(db_path)
+
+    @off_hub
+    def publish(self, key, data):
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                'INSERT INTO snapshots (key, version, data) VALUES (?, 1, ?) '
+                'ON CONFLICT(key) DO UPDATE SET version = version + 1, data = excluded.data',
+                (key, json.dumps(data))
+            )
+
+    def get(self, key, timeout=None):
+
+        # sem notificação entre processos: espera pela primeira publicação por consulta periódica
+        deadline = time.monotonic() + (timeout or 0)
+        while True:
+            data = self._read(key)
+            if data is not None:
+                return json.loads(data)
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    @off_hub
+    def _read(self, key):
+        row = self._connection().execute('SELECT data FROM snapshots WHERE key = ?', (key,)).fetchone()
+        return row['data'] if row is not None else None
+
+    @off_hub
+    def version(self, key):
+        row = self._connection().execute('SELECT version FROM snapshots WHERE key = ?', (key,)).fetchone()
+        return row['version'] if row is not None else 0
+
+    @off_hub
+    def keys(self):
+        return [row['key'] for row in self._connection().execute('SELECT key FROM snapshots')]
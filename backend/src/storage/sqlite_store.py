@@ -0,0 +1,333 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+from ..utils.file_lock import FileLock
+from ..utils.logger import setup_logger
+from ..utils.rollups import RESOLUTIONS, bucket_observations, format_aggregates
+from ..utils.time_utils import to_epoch
+
+# configuração do sistema de registo
+logger = setup_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weather_observations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    location TEXT NOT NULL,
+    ts REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    temperature REAL,
+    humidity REAL,
+    description TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_weather_ts ON weather_observations (ts);
+CREATE INDEX IF NOT EXISTS idx_weather_location_ts ON weather_observations (location, ts);
+CREATE TABLE IF NOT EXISTS weather_rollups (
+    resolution INTEGER NOT NULL,
+    location TEXT NOT NULL,
+    bucket REAL NOT NULL,
+    count INTEGER NOT NULL,
+    temp_min REAL, temp_max REAL, temp_sum REAL,
+    hum_min REAL, hum_max REAL, hum_sum REAL,
+    PRIMARY KEY (resolution, location, bucket)
+) WITHOUT ROWID;
+"""
+
+class SqliteDataStore:
+    def __init__(self, db_path=None, batch_size=None, flush_interval=None, default_location=None):
+
+        # caminho da base de dados e parâmetros do agrupamento de escritas
+        self.db_path = db_path or os.getenv('SQLITE_PATH', os.path.join('data', 'agrosmart.db'))
+        self.batch_size = int(batch_size if batch_size is not None else os.getenv('SQLITE_BATCH_SIZE', 1))
+        self.flush_interval = float(flush_interval if flush_interval is not None else os.getenv('SQLITE_FLUSH_INTERVAL', 5))
+
+        # parcela atribuída às observações antigas sem localização (a parcela por omissão do registo)
+        self.default_location = default_location or 'porto'
+
+        # uma ligação por thread, reutilizada entre pedidos
+        self._local = threading.local()
+
+        # escritas pendentes, inseridas em lote numa única transação
+        self._buffer = []
+        self._buffer_since = None
+        self._buffer_lock = threading.Lock()
+
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_schema()
+
+    def _connection(self):
+
+        # abre a ligação da thread atual na primeira utilização
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+
+        # vários processos podem arrancar ao mesmo tempo: só um cria o esquema e importa o histórico
+        with FileLock(self.db_path + '.lock'):
+            conn = self._connection()
+            conn.executescript(SCHEMA)
+            conn.commit()
+
+            # bases anteriores marcavam as observações sem localização como 'default', que nenhuma parcela pede
+            self._relabel_legacy_rows(conn)
+
+            # importa o histórico dos ficheiros JSON se a base estiver vazia
+            if conn.execute('SELECT 1 FROM weather_observations LIMIT 1').fetchone() is None:
+                self._import_file_history()
+
+            # reconstrói os rollups se existirem observações sem agregados (ex.: base anterior)
+            elif conn.execute('SELECT 1 FROM weather_rollups LIMIT 1').fetchone() is None:
+                self.rebuild_rollups()
+
+    def save_weather_data(self, data, location=None):
+        try:
+            with self._buffer_lock:
+                self._buffer.append(self._to_row(data, location))
+                if self._buffer_since is None:
+                    self._buffer_since = time.monotonic()
+                ready = (len(self._buffer) >= self.batch_size or
+                         time.monotonic() - self._buffer_since >= self.flush_interval)
+            if ready:
+                self.flush()
+            return True
+
+        except Exception as e:
+
+            # regista o erro em caso de falha
+            logger.error(f"Error saving weather data: {str(e)}")
+            return False
+
+    def save_many(self, entries, location=None):
+        try:
+
+            # inserção em lote de várias observações numa só transação
+            rows = [self._to_row(data, location) for data in entries]
+            self._insert(rows)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving weather data batch: {str(e)}")
+            return False
+
+    def flush(self):
+
+        # escreve as observações pendentes
+        with self._buffer_lock:
+            rows, self._buffer = self._buffer, []
+            self._buffer_since = None
+        if rows:
+            self._insert(rows)
+            logger.info(f"Weather data saved successfully ({len(rows)} rows)")
+
+    def _insert(self, rows):
+
+        # observações e respetivos rollups na mesma transação
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                'INSERT INTO weather_observations (location, ts, timestamp, temperature, humidity, description) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+            self._update_rollups(conn, rows)
+
+    def _update_rollups(self, conn, rows):
+
+        # agrega o lote por localização e soma-o aos intervalos já existentes
+        by_location = {}
+        for location, ts, _, temperature, humidity, _ in rows:
+            by_location.setdefault(location, []).append((
+                ts,
+                np.nan if temperature is None else temperature,
+                np.nan if humidity is None else humidity
+            ))
+        for location, values in by_location.items():
+            ts, temps, hums = zip(*values)
+            for resolution in RESOLUTIONS.values():
+                result = bucket_observations(ts, temps, hums, resolution)
+                conn.executemany(
+                    'INSERT INTO weather_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT (resolution, location, bucket) DO UPDATE SET '
+                    'count = count + excluded.count, '
+                    'temp_min = min(temp_min, excluded.temp_min), temp_max = max(temp_max, excluded.temp_max), '
+                    'temp_sum = temp_sum + excluded.temp_sum, '
+                    'hum_min = min(hum_min, excluded.hum_min), hum_max = max(hum_max, excluded.hum_max), '
+                    'hum_sum = hum_sum + excluded.hum_sum',
+                    self._rollup_rows(resolution, location, result)
+                )
+
+    def _rollup_rows(self, resolution, location, result):
+        return [
+            (resolution, location, float(b), int(n), float(tmin), float(tmax), float(tsum),
+             float(hmin), float(hmax), float(hsum))
+            for b, n, tmin, tmax, tsum, hmin, hmax, hsum in zip(
+                result['bucket'], result['count'], result['temp_min'], result['temp_max'],
+                result['temp_sum'], result['hum_min'], result['hum_max'], result['hum_sum'])
+        ]
+
+    def rebuild_rollups(self):
+
+        # recalcula todos os agregados a partir das observações (backfill vetorizado)
+        conn = self._connection()
+        rows = conn.execute(
+            'SELECT location, ts, temperature, humidity FROM weather_observations ORDER BY location'
+        ).fetchall()
+        with conn:
+            conn.execute('DELETE FROM weather_rollups')
+            locations = np.array([row[0] for row in rows], dtype=object)
+            ts = np.array([row[1] for row in rows], dtype=np.float64)
+            temps = np.array([np.nan if row[2] is None else row[2] for row in rows], dtype=np.float64)
+            hums = np.array([np.nan if row[3] is None else row[3] for row in rows], dtype=np.float64)
+            for location in set(locations.tolist()):
+                mask = locations == location
+                for resolution in RESOLUTIONS.values():
+                    result = bucket_observations(ts[mask], temps[mask], hums[mask], resolution)
+                    conn.executemany(
+                        'INSERT INTO weather_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        self._rollup_rows(resolution, location, result)
+                    )
+        logger.info(f"Weather rollups rebuilt from {len(rows)} observations")
+
+    def get_weather_aggregates(self, resolution='1h', start=None, end=None, location=None, limit=None):
+        try:
+            self.flush()
+
+            # leitura dos agregados pré-calculados pela chave primária (resolução, localização, intervalo)
+            clauses, params = ['resolution = ?'], [RESOLUTIONS[resolution]]
+            if location is not None:
+                clauses.append('location = ?')
+                params.append(location)
+            if start is not None:
+                clauses.append('bucket >= ?')
+                params.append(np.floor(to_epoch(start) / RESOLUTIONS[resolution]) * RESOLUTIONS[resolution])
+            if end is not None:
+                clauses.append('bucket <= ?')
+                params.append(to_epoch(end))
+            query = (
+                'SELECT bucket, SUM(count), MIN(temp_min), MAX(temp_max), SUM(temp_sum), '
+                'MIN(hum_min), MAX(hum_max), SUM(hum_sum) FROM weather_rollups WHERE '
+                + ' AND '.join(clauses) + ' GROUP BY bucket ORDER BY bucket DESC'
+            )
+            if limit:
+                query += ' LIMIT ?'
+                params.append(int(limit))
+            rows = self._connection().execute(query, params).fetchall()
+            return format_aggregates(*zip(*reversed(rows))) if rows else []
+
+        except Exception as e:
+            logger.error(f"Error reading weather aggregates: {str(e)}")
+            return []
+
+    def get_weather_history(self, limit=None, start=None, end=None, location=None, after=None):
+        try:
+
+            # garante que as escritas pendentes são visíveis
+            self.flush()
+
+            # pesquisa por intervalo servida pelos índices (location, ts) / (ts)
+            clauses, params = [], []
+            if location is not None:
+                clauses.append('location = ?')
+                params.append(location)
+            if start is not None:
+                clauses.append('ts >= ?')
+                params.append(to_epoch(start))
+            if end is not None:
+                clauses.append('ts <= ?')
+                params.append(to_epoch(end))
+            if after is not None:
+                clauses.append('ts > ?')
+                params.append(to_epoch(after))
+            query = 'SELECT location, timestamp, temperature, humidity, description FROM weather_observations'
+            if clauses:
+                query += ' WHERE ' + ' AND '.join(clauses)
+
+            # com cursor devolve as entradas seguintes; sem cursor, as mais recentes
+            query += ' ORDER BY ts ASC' if after is not None else ' ORDER BY ts DESC'
+            if limit:
+                query += ' LIMIT ?'
+                params.append(int(limit))
+            rows = self._connection().execute(query, params).fetchall()
+            if after is None:
+                rows.reverse()
+            return [self._from_row(row) for row in rows]
+
+        except Exception as e:
+
+            # regista o erro em caso de falha na leitura
+            logger.error(f"Error reading weather history: {str(e)}")
+            return []
+
+    def get_history_version(self):
+
+        # identificador da última observação (mais as pendentes), usado como ETag
+        row = self._connection().execute('SELECT MAX(id) FROM weather_observations').fetchone()
+        return f"{row[0] or 0}-{len(self._buffer)}"
+
+    def close(self):
+        self.flush()
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _to_row(self, data, location):
+        return (
+            location or data.get('location') or self.default_location,
+            to_epoch(data['timestamp']),
+            data['timestamp'],
+            data.get('temperature'),
+            data.get('humidity'),
+            data.get('description')
+        )
+
+    def _from_row(self, row):
+        return {
+            'temperature': row['temperature'],
+            'humidity': row['humidity'],
+            'description': row['description'],
+            'timestamp': row['timestamp'],
+            'location': row['location']
+        }
+
+    def _relabel_legacy_rows(self, conn):
+        if self.default_location == 'default':
+            return
+        with conn:
+            relabeled = conn.execute(
+                "UPDATE weather_observations SET location = ? WHERE location = 'default'", (self.default_location,)
+            ).rowcount
+        if relabeled:
+
+            # os intervalos de 'default' juntam-se aos da parcela: recalcula os agregados
+            self.rebuild_rollups()
+            logger.info(f"Relabeled {relabeled} legacy weather observations as '{self.default_location}'")
+
+    def _import_file_history(self):
+
+        # migração única a partir do ficheiro JSON Lines ou do JSON antigo
+        data_dir = os.path.dirname(self.db_path) or '.'
+        for name, lines in (('weather_data.jsonl', True), ('weather_data.json', False)):
+            path = os.path.join(data_dir, name)
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    if lines:
+                        entries = [json.loads(line) for line in f if line.strip()]
+                    else:
+                        entries = json.load(f)
+                self._insert([self._to_row(e, None) for e in entries if 'timestamp' in e])
+                logger.info(f"Imported {len(entries)} weather entries from {path}")
+                return
+            except Exception as e:
+                logger.error(f"Error importing weather history from {path}: {str(e)}")
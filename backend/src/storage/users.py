@@ -1,13 +1,26 @@
+import hashlib
+import hmac
 import json
 import os
-from werkzeug.security import generate_password_hash, check_password_hash
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from werkzeug.security import generate_password_hash
 from ..utils.logger import setup_logger
+from ..utils.metrics import REGISTRY
+from ..utils.password_verifier import VerificationBusy, shared_verifier
 
 # configuração do logger para registo de eventos
 logger = setup_logger()
 
+# latência da verificação de credenciais por resultado (exposta em /metrics)
+VERIFY_LATENCY = REGISTRY.histogram(
+    'agrosmart_verify_user_seconds', 'UserStore.verify_user latency by result', ('result',)
+)
+
 class UserStore:
-    def __init__(self):
+    def __init__(self, verifier=None):
 
         # definição do caminho para o ficheiro de utilizadores
         self.users_file = "data/users.json"
@@ -18,6 +31,19 @@ class UserStore:
         # inicializa o ficheiro de utilizadores
         self._init_users_file()
 
+        # tabela de utilizadores em memória, recarregada apenas quando o ficheiro muda
+        self._users = {}
+        self._users_signature = None
+        self._lock = threading.Lock()
+
+        # credenciais já verificadas (evita repetir o PBKDF2 a cada pedido)
+        self._verified = OrderedDict()
+        self._verified_max = int(os.getenv('AUTH_CACHE_SIZE', 1024))
+        self._cache_key = secrets.token_bytes(32)
+
+        # PBKDF2 com número limitado de verificações em simultâneo, fora do ciclo de pedidos
+        self.verifier = verifier or shared_verifier()
+
     def _init_users_file(self):
          
         # verifica se o ficheiro de utilizadores existe, senão cria-o com um utilizador padrão
@@ -30,20 +56,80 @@ class UserStore:
             with open(self.users_file, 'w') as f:
                 json.dump(default_user, f, indent=2)
 
+    def _get_users(self):
+
+        # compara caminho, mtime e tamanho do ficheiro; só volta a ler se algo mudou
+        try:
+            stat = os.stat(self.users_file)
+            signature = (self.users_file, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = (self.users_file, None, None)
+        if signature == self._users_signature:
+            return self._users
+
+        with self._lock:
+            if signature != self._users_signature:
+                try:
+                    with open(self.users_file, 'r') as f:
+                        self._users = json.load(f)
+                except Exception as e:
+
+                    # ficheiro inexistente ou danificado: nenhum utilizador é válido
+                    logger.error(f"Error loading users file: {str(e)}")
+                    self._users = {}
+                self._verified.clear()
+                self._users_signature = signature
+        return self._users
+
+    def get_password_fingerprint(self, username):
+
+        # resumo curto do hash guardado, usado para invalidar tokens após mudança de palavra-passe
+        stored_hash = self._get_users().get(username)
+        if stored_hash is None:
+            return None
+        return hashlib.sha256(stored_hash.encode('utf-8')).hexdigest()[:16]
+
     def verify_user(self, username, password):
+
+        # mede a verificação e conta o resultado (cache, hash, inválido ou erro)
+        started = time.perf_counter()
         try:
+            result = self._verify(username, password)
+        except VerificationBusy:
+            VERIFY_LATENCY.observe(time.perf_counter() - started, result='busy')
+            raise
+        VERIFY_LATENCY.observe(time.perf_counter() - started, result=result)
+        return result in ('cached', 'valid')
 
-            # abre o ficheiro de utilizadores
-            with open(self.users_file, 'r') as f:
-                users = json.load(f)
+    def _verify(self, username, password):
+        try:
+
+            # obtém a tabela de utilizadores em memória
+            users = self._get_users()
             
             # verifica se o utilizador existe e se a senha está correta
             if username in users:
-                return check_password_hash(users[username], password)
-            return False
-        
+                stored_hash = users[username]
+
+                # credenciais já verificadas contra o mesmo hash não repetem o PBKDF2
+                key = (username, hmac.new(self._cache_key, password.encode('utf-8'), hashlib.sha256).digest())
+                if self._verified.get(key) == stored_hash:
+                    return 'cached'
+
+                if self.verifier.check(stored_hash, password):
+                    with self._lock:
+                        self._verified[key] = stored_hash
+                        while len(self._verified) > self._verified_max:
+                            self._verified.popitem(last=False)
+                    return 'valid'
+            return 'invalid'
+
+        except VerificationBusy:
+
+            # demasiadas verificações em curso: quem chama responde 503
+            raise
         except Exception as e:
 
             # regista o erro em caso de falha na verificação
             logger.error(f"Error verifying user: {str(e)}")
-            return False
\ No newline at end of file
+            return 'error'
\ No newline at end of file
@@ -0,0 +1,86 @@
+import os
+import threading
+
+
+def is_green():
+
+    # verdadeiro quando o processo corre em modo eventlet (sockets substituídos pelo monkey_patch)
+    try:
+        from eventlet import patcher
+    except ImportError:
+        return False
+    return patcher.is_monkey_patched('socket')
+
+
+def run_blocking(func, *args, **kwargs):
+
+    # em modo eventlet, chamadas bloqueantes (SQLite, escrita de ficheiros) correm num thread do
+    # sistema para não parar o hub; fora desse modo a chamada é feita diretamente
+    if is_green():
+        from eventlet import tpool
+        return tpool.execute(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+
+def thread_local():
+
+    # estado por thread do sistema (ex.: ligações SQLite); com o monkey_patch o threading.local
+    # passaria a ser por greenthread e cada pedido abriria a sua ligação
+    if is_green():
+        from eventlet import patcher
+        return patcher.original('threading').local()
+    return threading.local()
+
+
+class OsThreadPool:
+
+    # threads do sistema próprias, separadas do tpool do eventlet (reservado ao armazenamento): trabalho de
+    # CPU que liberta o GIL (ex.: PBKDF2) corre em paralelo sem atrasar as consultas ao SQLite
+    def __init__(self, workers, name='os-pool'):
+        self.workers = max(int(workers), 1)
+        self.name = name
+        self._queue = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+
+        # threads e fila originais (não substituídas pelo monkey_patch), criadas na primeira utilização
+        from eventlet import patcher
+        real_threading = patcher.original('threading')
+        self._queue = patcher.original('queue').SimpleQueue()
+        for i in range(self.workers):
+            real_threading.Thread(target=self._work, name=f"{self.name}-{i}", daemon=True).start()
+
+    def _work(self):
+        while True:
+            func, args, kwargs, outcome, done_fd = self._queue.get()
+            try:
+                outcome.append((True, func(*args, **kwargs)))
+            except BaseException as e:
+                outcome.append((False, e))
+
+            # fechar a ponta de escrita acorda o greenthread que espera pela de leitura
+            os.close(done_fd)
+
+    def run(self, func, *args, **kwargs):
+
+        # fora do modo eventlet os pedidos já correm em threads do sistema: chamada direta
+        if not is_green():
+            return func(*args, **kwargs)
+        from eventlet.hubs import trampoline
+        with self._lock:
+            if self._queue is None:
+                self._start()
+
+        # o greenthread espera no hub (sem o bloquear) até a thread fechar o pipe
+        read_fd, write_fd = os.pipe()
+        outcome = []
+        try:
+            self._queue.put((func, args, kwargs, outcome, write_fd))
+            trampoline(read_fd, read=True)
+        finally:
+            os.close(read_fd)
+        ok, value = outcome[0]
+        if not ok:
+            raise value
+        return value
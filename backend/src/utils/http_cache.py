@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# brotli é opcional (pip install brotli); sem ele as respostas são comprimidas apenas com gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# corpos abaixo deste tamanho (bytes) não compensam a compressão
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 512))
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+
+def dumps(payload):
+
+    # o mesmo formato do jsonify (compacto, chaves ordenadas, ASCII, com quebra de linha final)
+    return (json.dumps(payload, separators=(',', ':'), sort_keys=True) + '\n').encode('utf-8')
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=min(COMPRESS_LEVEL, 11))
+    return gzip.compress(data, compresslevel=COMPRESS_LEVEL, mtime=0)
+
+def supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def negotiate_encoding(accept_encoding):
+
+    # escolhe a codificação aceite pelo cliente com maior qualidade (brotli antes de gzip em caso de empate)
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = accept_encoding.quality(encoding) if accept_encoding else 0
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+class EncodedBody:
+
+    # JSON serializado uma vez, com as versões comprimidas e uma ETag forte por codificação
+    __slots__ = ('data', 'digest', 'encoded')
+
+    def __init__(self, payload=None, data=None):
+        self.data = data if data is not None else dumps(payload)
+        self.digest = hashlib.blake2b(self.data, digest_size=12).hexdigest()
+        self.encoded = {}
+        if len(self.data) >= COMPRESS_MIN_SIZE:
+            for encoding in supported_encodings():
+                self.encoded[encoding] = compress(self.data, encoding)
+
+    def etag(self, encoding=None):
+        return f"{self.digest}-{encoding}" if encoding else self.digest
+
+    def etags(self):
+        return [self.etag()] + [self.etag(encoding) for encoding in self.encoded]
+
+    @property
+    def size(self):
+        return len(self.data) + sum(len(body) for body in self.encoded.values())
+
+class ResponseCache:
+    def __init__(self, max_entries=None, max_bytes=None):
+
+        # corpos já serializados por chave (ex.: rota, parcela e versão dos dados), com limite de memória
+        self.max_entries = int(max_entries if max_entries is not None else os.getenv('RESPONSE_CACHE_SIZE', 256))
+        self.max_bytes = int(max_bytes if max_bytes is not None else os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, producer):
+
+        # devolve o corpo guardado; só chama `producer` (e serializa) quando a chave é nova
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                return body
+        body = EncodedBody(producer())
+        with self._lock:
+            if key not in self._entries and body.size <= self.max_bytes:
+                self._entries[key] = body
+                self._bytes += body.size
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.size
+        return body
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
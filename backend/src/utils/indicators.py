@@ -0,0 +1,167 @@
+from collections import deque
+from datetime import datetime
+
+
+class RollingSum:
+
+    # soma numa janela deslizante com intervalos fixos: cada atualização é O(1) (amortizado)
+    __slots__ = ('window', 'bucket', 'total', '_buckets')
+
+    def __init__(self, window, bucket=3600):
+        self.window = float(window)
+        self.bucket = float(bucket)
+        self.total = 0.0
+        self._buckets = deque()
+
+    def add(self, ts, value):
+        start = ts - ts % self.bucket
+        if self._buckets and self._buckets[-1][0] == start:
+            self._buckets[-1][1] += value
+        else:
+            self._buckets.append([start, value])
+        self.total += value
+        self.expire(ts)
+
+    def expire(self, now):
+
+        # retira os intervalos que saíram da janela
+        while self._buckets and self._buckets[0][0] + self.bucket <= now - self.window:
+            self.total -= self._buckets.popleft()[1]
+        if not self._buckets:
+            self.total = 0.0
+
+    def value(self, now=None):
+        if now is not None:
+            self.expire(now)
+        return max(self.total, 0.0)
+
+    def to_dict(self):
+        return {'window': self.window, 'bucket': self.bucket, 'buckets': [list(b) for b in self._buckets]}
+
+    @classmethod
+    def from_dict(cls, data):
+        rolling = cls(data['window'], data['bucket'])
+        for start, value in data['buckets']:
+            rolling._buckets.append([start, value])
+            rolling.total += value
+        return rolling
+
+
+class IndicatorAccumulator:
+
+    # graus-dia de crescimento e risco de míldio de uma parcela, atualizados a cada observação
+    def __init__(self, base_temperature=10.0, season_start=(4, 1), max_gap=10800, wet_humidity=90.0,
+                 wet_temperature=(10.0, 30.0), moderate_hours=4.0, high_hours=10.0):
+        self.base_temperature = float(base_temperature)
+        self.season_start = tuple(season_start)
+        self.max_gap = float(max_gap)
+        self.wet_humidity = float(wet_humidity)
+        self.wet_temperature = tuple(wet_temperature)
+        self.moderate_hours = float(moderate_hours)
+        self.high_hours = float(high_hours)
+
+        # estado: última observação, soma da época e janelas de 7 dias (graus-dia) e 24 horas (horas húmidas)
+        self.last_ts = None
+        self.last_temperature = None
+        self.last_wet = False
+        self.season = None
+        self.season_gdd = 0.0
+        self.gdd_7d = RollingSum(7 * 86400)
+        self.wet_hours_24h = RollingSum(86400)
+        self.wet_streak = 0.0
+        self.observations = 0
+
+    def season_of(self, ts):
+
+        # ano da época (ex.: com início a 1 de abril, março ainda pertence à época anterior)
+        moment = datetime.fromtimestamp(ts)
+        return moment.year if (moment.month, moment.day) >= self.season_start else moment.year - 1
+
+    def is_wet(self, temperature, humidity):
+        return humidity >= self.wet_humidity and self.wet_temperature[0] <= temperature <= self.wet_temperature[1]
+
+    def update(self, ts, temperature, humidity):
+
+        # observações fora de ordem (ou repetidas) são ignoradas
+        if self.last_ts is not None and ts <= self.last_ts:
+            return False
+        season = self.season_of(ts)
+        if season != self.season:
+            self.season = season
+            self.season_gdd = 0.0
+
+        wet = self.is_wet(temperature, humidity)
+        if self.last_ts is not None and ts - self.last_ts <= self.max_gap:
+
+            # integração trapezoidal entre a observação anterior e a atual (sem atravessar falhas longas)
+            elapsed = ts - self.last_ts
+            mean = (temperature + self.last_temperature) / 2
+            degree_days = max(0.0, mean - self.base_temperature) * elapsed / 86400
+            self.season_gdd += degree_days
+            self.gdd_7d.add(ts, degree_days)
+
+            # horas seguidas com folhagem húmida (humidade elevada e temperatura favorável ao míldio)
+            if wet and self.last_wet:
+                self.wet_streak += elapsed
+                self.wet_hours_24h.add(ts, elapsed / 3600)
+            else:
+                self.wet_streak = 0.0
+        else:
+            self.wet_streak = 0.0
+
+        self.last_ts = ts
+        self.last_temperature = temperature
+        self.last_wet = wet
+        self.observations += 1
+        return True
+
+    def mildew_risk(self, now=None):
+
+        # risco pela maior evidência: horas seguidas agora ou horas húmidas nas últimas 24 horas
+        hours = max(self.wet_streak / 3600, self.wet_hours_24h.value(now))
+        if hours >= self.high_hours:
+            return 'elevado'
+        if hours >= self.moderate_hours:
+            return 'moderado'
+        return 'baixo'
+
+    def snapshot(self, now=None):
+        now = now if now is not None else self.last_ts
+        return {
+            'season': self.season,
+            'gdd_season': round(self.season_gdd, 2),
+            'gdd_7d': round(self.gdd_7d.value(now), 2),
+            'gdd_base_temperature': self.base_temperature,
+            'wet_hours_streak': round(self.wet_streak / 3600, 2),
+            'wet_hours_24h': round(self.wet_hours_24h.value(now), 2),
+            'mildew_risk': self.mildew_risk(now),
+            'observations': self.observations,
+            'updated_at': datetime.fromtimestamp(self.last_ts).isoformat() if self.last_ts is not None else None
+        }
+
+    def to_dict(self):
+
+        # estado completo para o ponto de retoma (a configuração vem sempre do ambiente)
+        return {
+            'last_ts': self.last_ts,
+            'last_temperature': self.last_temperature,
+            'last_wet': self.last_wet,
+            'season': self.season,
+            'season_gdd': self.season_gdd,
+            'gdd_7d': self.gdd_7d.to_dict(),
+            'wet_hours_24h': self.wet_hours_24h.to_dict(),
+            'wet_streak': self.wet_streak,
+            'observations': self.observations
+        }
+
+    def restore(self, data):
+        self.last_ts = data['last_ts']
+        self.last_temperature = data['last_temperature']
+        self.last_wet = data['last_wet']
+        self.season = data['season']
+        self.season_gdd = data['season_gdd']
+        self.gdd_7d = RollingSum.from_dict(data['gdd_7d'])
+        self.wet_hours_24h = RollingSum.from_dict(data['wet_hours_24h'])
+        self.wet_streak = data['wet_streak']
+        self.observations = data['observations']
+        return self
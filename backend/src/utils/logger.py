@@ -1,33 +1,74 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import threading
 from datetime import datetime
 
-def setup_logger():
-    
+# configuração única por processo (setup_logger é chamado em todos os módulos)
+_setup_lock = threading.Lock()
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+
+    # uma linha JSON por registo, pronta para ferramentas de pesquisa de logs
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'process': record.process,
+            'thread': record.threadName
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def create_handlers(log_dir=None, retention_days=None, log_format=None):
+
     # cria a pasta de logs se não existir
-    os.makedirs('logs', exist_ok=True)
-    
-    # cria o logger
-    logger = logging.getLogger('agrosmart')
-    logger.setLevel(logging.INFO)
-    
-    # cria o manipulador de ficheiros
-    log_file = f'logs/agrosmart_{datetime.now().strftime("%Y%m%d")}.log'
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(logging.INFO)
-    
-    # cria o manipulador de consola
+    log_dir = log_dir or os.getenv('LOG_DIR', 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+
+    # ficheiro com rotação diária à meia-noite e retenção em dias (um ficheiro por processo de trabalho)
+    worker = os.getenv('SERVER_WORKER_INDEX')
+    log_file = os.path.join(log_dir, f'agrosmart-{worker}.log' if worker else 'agrosmart.log')
+    retention_days = int(retention_days if retention_days is not None else os.getenv('LOG_RETENTION_DAYS', 14))
+    file_handler = logging.handlers.TimedRotatingFileHandler(
+        log_file, when='midnight', backupCount=retention_days, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter())
+
+    # consola em texto (ou JSON com LOG_FORMAT=json)
+    log_format = log_format or os.getenv('LOG_FORMAT', 'text')
     console_handler = logging.StreamHandler()
-    console_handler.setLevel(logging.INFO)
-    
-    # cria o formatador para os logs
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-    console_handler.setFormatter(formatter)
-    
-    # adiciona os manipuladores ao logger
-    logger.addHandler(file_handler)
-    logger.addHandler(console_handler)
-    
+    if log_format == 'json':
+        console_handler.setFormatter(JsonFormatter())
+    else:
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    return [file_handler, console_handler]
+
+def setup_logger():
+    global _listener
+
+    logger = logging.getLogger('agrosmart')
+    with _setup_lock:
+        if _listener is not None:
+            return logger
+
+        # os registos vão para uma fila em memória; a escrita em disco é feita por uma thread própria
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, *create_handlers(), respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        logger.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        logger.propagate = False
+
     # devolve o logger configurado
-    return logger
\ No newline at end of file
+    return logger
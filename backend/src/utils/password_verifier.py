@@ -0,0 +1,60 @@
+import os
+import threading
+from werkzeug.security import check_password_hash
+from .green import OsThreadPool
+
+# instância partilhada pelo processo (um único limite de verificações em curso)
+_shared = None
+_shared_lock = threading.Lock()
+
+class VerificationBusy(Exception):
+    pass
+
+class PasswordVerifier:
+    def __init__(self, workers=None, max_pending=None, timeout=None):
+
+        # PBKDF2 em simultâneo, em threads do sistema próprias (o hashlib liberta o GIL) e fora do tpool
+        # usado pelo SQLite; 0 verifica no próprio pedido
+        self.workers = int(workers if workers is not None else os.getenv('PASSWORD_WORKERS', os.cpu_count() or 1))
+        self._pool = OsThreadPool(self.workers, name='password-verifier')
+
+        # verificações em curso ou em espera; acima do limite recusa de imediato em vez de acumular
+        self.max_pending = int(max_pending if max_pending is not None else
+                               os.getenv('PASSWORD_MAX_PENDING', max(self.workers, 1) * 16))
+        self.timeout = float(timeout if timeout is not None else os.getenv('PASSWORD_VERIFY_TIMEOUT', 10))
+
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1))
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def check(self, stored_hash, password):
+        if self.workers <= 0:
+            return check_password_hash(stored_hash, password)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise VerificationBusy(f"{self._pending} password checks pending")
+            self._pending += 1
+        try:
+
+            # espera por um lugar sem ocupar o hub; o cálculo corre fora do ciclo de pedidos
+            if not self._slots.acquire(timeout=self.timeout):
+                raise VerificationBusy(f"No password check slot within {self.timeout}s")
+            try:
+                return self._pool.run(check_password_hash, stored_hash, password)
+            finally:
+                self._slots.release()
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    @property
+    def pending(self):
+        return self._pending
+
+def shared_verifier():
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = PasswordVerifier()
+        return _shared
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+
+        # `rate` fichas repostas por segundo, até ao máximo de `capacity`
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+
+        # consome sem esperar; devolve False se não houver fichas suficientes
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def wait_time(self, tokens=1):
+
+        # segundos até haver fichas suficientes
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = tokens - self._tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def acquire(self, tokens=1, timeout=None):
+
+        # espera até obter as fichas ou até esgotar o tempo limite
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.try_acquire(tokens):
+                return True
+            delay = self.wait_time(tokens)
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or delay > remaining:
+                    return False
+            time.sleep(delay)
+
+
+class KeyedRateLimiter:
+    def __init__(self, rate, capacity=None, max_keys=10000):
+
+        # um balde por chave (utilizador, endereço IP); os menos recentes são descartados acima de `max_keys`
+        self.rate = float(rate)
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.rate > 0
+
+    def _bucket(self, key):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.capacity)
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket
+
+    def try_acquire(self, key):
+
+        # devolve 0 se o pedido é admitido; caso contrário os segundos até haver uma ficha
+        if not self.enabled:
+            return 0.0
+        bucket = self._bucket(key)
+        if bucket.try_acquire():
+            return 0.0
+        return max(bucket.wait_time(), 1e-3)
+
+    def retry_after(self, key):
+
+        # o mesmo sem consumir (0 se ainda há fichas)
+        if not self.enabled:
+            return 0.0
+        return self._bucket(key).wait_time()
+
+    def __len__(self):
+        return len(self._buckets)
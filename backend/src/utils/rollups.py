@@ -0,0 +1,75 @@
+from datetime import datetime
+import numpy as np
+from .time_utils import to_epoch
+
+# resoluções suportadas para agregação (segundos por intervalo)
+RESOLUTIONS = {
+    '5m': 300,
+    '1h': 3600,
+    '1d': 86400
+}
+
+
+def bucket_observations(timestamps, temperatures, humidities, resolution):
+
+    # agrega de forma vetorizada as observações em intervalos de `resolution` segundos
+    ts = np.asarray(timestamps, dtype=np.float64)
+    temps = np.asarray(temperatures, dtype=np.float64)
+    hums = np.asarray(humidities, dtype=np.float64)
+
+    # ignora observações sem temperatura ou humidade
+    valid = ~(np.isnan(ts) | np.isnan(temps) | np.isnan(hums))
+    ts, temps, hums = ts[valid], temps[valid], hums[valid]
+    if ts.size == 0:
+        empty = np.empty(0)
+        return {'bucket': empty, 'count': np.empty(0, dtype=np.int64),
+                'temp_min': empty, 'temp_max': empty, 'temp_sum': empty,
+                'hum_min': empty, 'hum_max': empty, 'hum_sum': empty}
+
+    # ordena por intervalo e calcula os limites de cada grupo
+    buckets = np.floor(ts / resolution) * resolution
+    order = np.argsort(buckets, kind='stable')
+    buckets, temps, hums = buckets[order], temps[order], hums[order]
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+
+    return {
+        'bucket': buckets[starts],
+        'count': np.diff(np.r_[starts, buckets.size]),
+        'temp_min': np.minimum.reduceat(temps, starts),
+        'temp_max': np.maximum.reduceat(temps, starts),
+        'temp_sum': np.add.reduceat(temps, starts),
+        'hum_min': np.minimum.reduceat(hums, starts),
+        'hum_max': np.maximum.reduceat(hums, starts),
+        'hum_sum': np.add.reduceat(hums, starts)
+    }
+
+
+def format_aggregates(buckets, count, temp_min, temp_max, temp_sum, hum_min, hum_max, hum_sum):
+
+    # converte as colunas agregadas em pontos prontos para o gráfico
+    return [
+        {
+            'timestamp': datetime.fromtimestamp(float(b)).isoformat(),
+            'count': int(n),
+            'temperature_min': float(tmin),
+            'temperature_max': float(tmax),
+            'temperature_mean': round(float(tsum) / n, 2),
+            'humidity_min': float(hmin),
+            'humidity_max': float(hmax),
+            'humidity_mean': round(float(hsum) / n, 2)
+        }
+        for b, n, tmin, tmax, tsum, hmin, hmax, hsum
+        in zip(buckets, count, temp_min, temp_max, temp_sum, hum_min, hum_max, hum_sum)
+    ]
+
+
+def aggregate_entries(entries, resolution):
+
+    # agregação calculada no momento, usada pelos armazenamentos sem tabelas de rollup
+    ts = [to_epoch(e['timestamp']) for e in entries]
+    temps = [np.nan if e.get('temperature') is None else e['temperature'] for e in entries]
+    hums = [np.nan if e.get('humidity') is None else e['humidity'] for e in entries]
+    result = bucket_observations(ts, temps, hums, resolution)
+    return format_aggregates(result['bucket'], result['count'],
+                             result['temp_min'], result['temp_max'], result['temp_sum'],
+                             result['hum_min'], result['hum_max'], result['hum_sum'])
@@ -0,0 +1,147 @@
+import bisect
+import numpy as np
+
+# campos de uma recomendação e respetivos valores por omissão
+DEFAULT_OUTCOME = {
+    'should_irrigate': False,
+    'intensity': 'nenhuma',
+    'reason': '',
+    'temperature_status': 'normal',
+    'humidity_status': 'normal'
+}
+
+
+def _cut(operator, value):
+
+    # normaliza cada condição para a forma "valor >= corte" (polaridade True) ou a sua negação
+    value = float(value)
+    if operator == 'ge':
+        return value, True
+    if operator == 'gt':
+        return float(np.nextafter(value, np.inf)), True
+    if operator == 'lt':
+        return value, False
+    if operator == 'le':
+        return float(np.nextafter(value, np.inf)), False
+    raise ValueError(f"Unknown rule operator: {operator}")
+
+
+def _column(values):
+
+    # coluna indexável por id de resultado (booleanos num vetor nativo, o resto como objetos)
+    if all(isinstance(v, bool) for v in values):
+        return np.array(values, dtype=bool)
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+
+class CompiledRuleSet:
+    def __init__(self, spec, name=None):
+
+        # limiares com nome, usados nas regras e nos alertas
+        self.name = name
+        self.label = spec.get('name', name)
+        self.thresholds = {variable: dict(values) for variable, values in spec.get('thresholds', {}).items()}
+
+        # variáveis que podem faltar na observação (ex.: sensores de campo); as restantes são obrigatórias
+        self.optional = frozenset(spec.get('optional', ()))
+        defaults = dict(DEFAULT_OUTCOME, **spec.get('defaults', {}))
+        self.fields = list(defaults) + ['warnings']
+
+        # converte as condições de cada regra em cortes ordenados por variável
+        parsed = []
+        cuts = {}
+        for rule in spec.get('rules', []):
+            unknown = set(rule.get('set', {})) - set(defaults)
+            if unknown:
+                raise ValueError(f"Unknown recommendation fields in rule: {', '.join(sorted(unknown))}")
+            conditions = []
+            for variable, operators in rule.get('when', {}).items():
+                for operator, value in operators.items():
+                    cut, polarity = _cut(operator, self._resolve(variable, value))
+                    cuts.setdefault(variable, set()).add(cut)
+                    conditions.append((variable, cut, polarity))
+            parsed.append((conditions, rule.get('set', {}), rule.get('warning')))
+
+        self.variables = sorted(cuts)
+        self.cuts = {variable: sorted(cuts[variable]) for variable in self.variables}
+        positions = {variable: {cut: i for i, cut in enumerate(self.cuts[variable])} for variable in self.variables}
+
+        # tabela de decisão: as regras são avaliadas uma vez por combinação de intervalos; o último
+        # intervalo de cada variável corresponde a valor desconhecido (nenhuma condição sobre ela é verdadeira)
+        self.unknown = {variable: len(self.cuts[variable]) + 1 for variable in self.variables}
+        shape = tuple(self.unknown[variable] + 1 for variable in self.variables)
+        self.table = np.empty(shape, dtype=np.intp)
+        self.outcomes = []
+        index = {}
+        for bands in np.ndindex(*shape):
+            band_of = dict(zip(self.variables, bands))
+            outcome = dict(defaults)
+            warnings = []
+            for conditions, assignments, warning in parsed:
+                if all(band_of[variable] != self.unknown[variable] and
+                       (band_of[variable] > positions[variable][cut]) == polarity
+                       for variable, cut, polarity in conditions):
+                    outcome.update(assignments)
+                    if warning:
+                        warnings.append(warning)
+            outcome['warnings'] = tuple(warnings)
+
+            # combinações com o mesmo resultado partilham a mesma entrada
+            key = tuple(outcome[field] for field in self.fields)
+            if key not in index:
+                index[key] = len(self.outcomes)
+                self.outcomes.append(outcome)
+            self.table[bands] = index[key]
+
+        # colunas por resultado para a avaliação vetorizada
+        self.columns = {field: _column([outcome[field] for outcome in self.outcomes]) for field in self.fields}
+
+    def _resolve(self, variable, value):
+
+        # as condições podem referir limiares pelo nome (ex.: {"gt": "high"})
+        if isinstance(value, str):
+            try:
+                return self.thresholds[variable][value]
+            except KeyError:
+                raise ValueError(f"Unknown threshold '{value}' for {variable}")
+        return value
+
+    def _band(self, variable, value):
+
+        # intervalo do valor (ausente ou NaN: desconhecido)
+        if value is None or value != value:
+            return self.unknown[variable]
+        return bisect.bisect_right(self.cuts[variable], value)
+
+    def evaluate(self, values):
+
+        # procura binária do intervalo de cada variável e consulta da tabela
+        position = tuple(self._band(variable, values.get(variable) if variable in self.optional else values[variable])
+                         for variable in self.variables)
+        outcome = self.outcomes[self.table[position]]
+        return dict(outcome, warnings=list(outcome['warnings']))
+
+    def evaluate_batch(self, columns):
+
+        # o mesmo cálculo em colunas: searchsorted por variável e indexação da tabela
+        present = {variable: np.asarray(columns[variable], dtype=np.float64) for variable in self.variables
+                   if variable not in self.optional or columns.get(variable) is not None}
+        shapes = {array.shape for array in present.values()}
+        if len(shapes) > 1:
+            raise ValueError("rule inputs must have the same shape")
+        shape = shapes.pop() if shapes else np.shape(next(iter(columns.values()), ()))
+
+        # variáveis opcionais sem coluna, ou valores NaN, ficam no intervalo desconhecido
+        position = []
+        for variable in self.variables:
+            array = present.get(variable)
+            if array is None:
+                position.append(np.full(shape, self.unknown[variable], dtype=np.intp))
+                continue
+            bands = np.searchsorted(self.cuts[variable], array, side='right')
+            position.append(np.where(np.isnan(array), self.unknown[variable], bands))
+        ids = self.table[tuple(position)]
+        return {field: column[ids] for field, column in self.columns.items()}
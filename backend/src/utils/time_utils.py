@@ -0,0 +1,16 @@
+from datetime import datetime
+
+
+def to_epoch(value):
+
+    # converte datetime, número ou texto (epoch ou ISO 8601) em segundos desde a época
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import Mock, patch
+from src.services.alert_engine import AlertEngine
+from src.services.notification_service import NotificationService
+
+class TestAlertEngine(unittest.TestCase):
+    def setUp(self):
+
+        # motor com os limiares das vinhas e um envio por socket simulado
+        self.notification_service = NotificationService()
+        self.on_notification = Mock()
+        self.engine = AlertEngine(
+            self.notification_service,
+            {'low': 10, 'high': 35},
+            {'low': 60, 'high': 85},
+            hysteresis={'temperature': 1.0, 'humidity': 3.0},
+            cooldown=3600,
+            on_notification=self.on_notification
+        )
+
+    def observe(self, temperature, humidity):
+        return self.engine.evaluate({'temperature': temperature, 'humidity': humidity, 'location': 'porto'})
+
+    def test_alert_only_on_transition(self):
+
+        # a mesma condição repetida gera apenas uma notificação
+        for _ in range(10):
+            self.observe(20, 90)
+        active = self.notification_service.get_active_notifications()
+        self.assertEqual(len(active), 1)
+        self.assertEqual(active[0]['type'], 'ALERTA_HUMIDADE')
+        self.on_notification.assert_called_once()
+
+    def test_hysteresis(self):
+
+        # oscilar junto ao limiar não resolve nem volta a disparar a condição
+        self.observe(20, 86)
+        self.observe(20, 84)
+        self.observe(20, 86)
+        self.assertEqual(self.engine.active_conditions('porto'), ['humidity_high'])
+        self.assertEqual(self.on_notification.call_count, 1)
+
+        # abaixo da margem a condição fica resolvida e a notificação deixa de estar ativa
+        self.observe(20, 80)
+        self.assertEqual(self.engine.active_conditions('porto'), [])
+        self.assertEqual(self.notification_service.get_active_notifications(), [])
+
+    def test_cooldown(self):
+
+        # nova ativação dentro do período de espera não gera notificação
+        self.observe(36, 70)
+        self.observe(30, 70)
+        self.observe(36, 70)
+        self.assertEqual(self.on_notification.call_count, 1)
+
+        # passado o período de espera volta a notificar
+        self.observe(30, 70)
+        with patch('time.monotonic', return_value=10 ** 9):
+            self.observe(36, 70)
+        self.assertEqual(self.on_notification.call_count, 2)
+
+    def test_locations_are_independent(self):
+        self.observe(20, 50)
+        self.engine.evaluate({'temperature': 20, 'humidity': 50, 'location': 'douro'})
+        self.assertEqual(self.on_notification.call_count, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os
+import json
+import time
+from unittest.mock import patch
+from src.storage.users import UserStore
+from src.services.auth_service import TokenService
+from werkzeug.security import generate_password_hash
+
+class TestTokenService(unittest.TestCase):
+    def setUp(self):
+
+        # prepara ficheiro de teste e serviço de tokens
+        self.test_users_file = "data/test_tokens_users.json"
+        self.user_store = UserStore()
+        self.user_store.users_file = self.test_users_file
+        self.write_users({"admin": generate_password_hash("admin123")})
+        self.token_service = TokenService(self.user_store, secret_key="segredo-de-teste", ttl=60)
+
+    def tearDown(self):
+        if os.path.exists(self.test_users_file):
+            os.remove(self.test_users_file)
+
+    def write_users(self, users):
+        with open(self.test_users_file, 'w') as f:
+            json.dump(users, f)
+
+    def test_issue_and_verify(self):
+        token = self.token_service.issue_token("admin")
+        self.assertEqual(self.token_service.verify_token(token), "admin")
+
+    def test_tampered_token(self):
+
+        # alterar o conteúdo invalida a assinatura
+        token = self.token_service.issue_token("admin")
+        body, signature = token.split('.')
+        self.assertIsNone(self.token_service.verify_token(body[:-2] + 'xx.' + signature))
+        self.assertIsNone(self.token_service.verify_token("lixo"))
+
+    def test_expired_token(self):
+        token = self.token_service.issue_token("admin")
+        with patch('time.time', return_value=time.time() + 120):
+            self.assertIsNone(self.token_service.verify_token(token))
+
+    def test_password_change_revokes_token(self):
+
+        # nova palavra-passe no ficheiro invalida os tokens anteriores
+        token = self.token_service.issue_token("admin")
+        time.sleep(0.01)
+        self.write_users({"admin": generate_password_hash("nova-senha")})
+        self.assertIsNone(self.token_service.verify_token(token))
+
+    def test_verified_credentials_are_cached(self):
+
+        # a segunda verificação não volta a executar o PBKDF2
+        self.assertTrue(self.user_store.verify_user("admin", "admin123"))
+        with patch.object(self.user_store.verifier, 'check', return_value=False) as mock_check:
+            self.assertTrue(self.user_store.verify_user("admin", "admin123"))
+            self.assertFalse(self.user_store.verify_user("admin", "errada"))
+            mock_check.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,200 @@
+import unittest
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from src.storage.jsonl_store import JsonlDataStore
+from src.storage.sqlite_store import SqliteDataStore
+from src.utils.rollups import bucket_observations
+
+class TestJsonlDataStore(unittest.TestCase):
+    def setUp(self):
+
+        # pasta temporária para não tocar nos dados reais
+        self.data_dir = tempfile.mkdtemp()
+        self.store = JsonlDataStore(self.data_dir, retention_days=1, compact_every=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def make_entry(self, temperature, age=timedelta(0)):
+        return {
+            'temperature': temperature,
+            'humidity': 70,
+            'description': 'céu limpo',
+            'timestamp': (datetime.now() - age).isoformat()
+        }
+
+    def test_append_and_read(self):
+
+        # cada escrita acrescenta uma linha e a leitura devolve por ordem
+        for t in range(30):
+            self.assertTrue(self.store.save_weather_data(self.make_entry(t)))
+        history = self.store.get_weather_history()
+        self.assertEqual([e['temperature'] for e in history], list(range(30)))
+
+    def test_tail_limit(self):
+
+        # o limite devolve apenas as últimas entradas
+        for t in range(500):
+            self.store.save_weather_data(self.make_entry(t))
+        history = self.store.get_weather_history(limit=24)
+        self.assertEqual([e['temperature'] for e in history], list(range(476, 500)))
+
+    def test_since_cursor(self):
+
+        # o cursor devolve apenas as entradas posteriores ao último timestamp conhecido
+        entries = [self.make_entry(t, age=timedelta(minutes=10 - t)) for t in range(10)]
+        for entry in entries:
+            self.store.save_weather_data(entry)
+        history = self.store.get_weather_history(after=entries[6]['timestamp'])
+        self.assertEqual([e['temperature'] for e in history], [7, 8, 9])
+
+    def test_compaction_applies_retention(self):
+
+        # entradas fora da janela de retenção são removidas na compactação
+        self.store.save_weather_data(self.make_entry(1, age=timedelta(days=3)))
+        self.store.save_weather_data(self.make_entry(2))
+        self.assertEqual(self.store.compact(), 1)
+        self.assertEqual([e['temperature'] for e in self.store.get_weather_history()], [2])
+        self.assertFalse(os.path.exists(self.store.weather_file + '.tmp'))
+
+    def test_corrupted_tail_is_skipped(self):
+
+        # uma escrita interrompida não invalida o resto do histórico
+        self.store.save_weather_data(self.make_entry(1))
+        with open(self.store.weather_file, 'a') as f:
+            f.write('{"temperature": 2, "hum')
+        self.assertEqual(len(self.store.get_weather_history()), 1)
+
+        # a escrita seguinte começa numa linha nova e continua legível
+        self.store.save_weather_data(self.make_entry(3))
+        self.assertEqual([e['temperature'] for e in self.store.get_weather_history()], [1, 3])
+        self.assertEqual([e['temperature'] for e in self.store.get_weather_history(limit=1)], [3])
+
+    def test_legacy_migration(self):
+
+        # o ficheiro JSON antigo é importado na primeira utilização
+        legacy_dir = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(legacy_dir, 'weather_data.json'), 'w') as f:
+                json.dump([self.make_entry(5), self.make_entry(6)], f)
+            store = JsonlDataStore(legacy_dir)
+            self.assertEqual([e['temperature'] for e in store.get_weather_history()], [5, 6])
+        finally:
+            shutil.rmtree(legacy_dir, ignore_errors=True)
+
+class TestRollups(unittest.TestCase):
+    def test_bucket_observations(self):
+
+        # agrupamento vetorizado por intervalos de 5 minutos
+        result = bucket_observations([0, 60, 299, 300, 900], [10, 20, 30, 5, 7], [50, 60, 70, 80, float('nan')], 300)
+        self.assertEqual(result['bucket'].tolist(), [0, 300])
+        self.assertEqual(result['count'].tolist(), [3, 1])
+        self.assertEqual(result['temp_min'].tolist(), [10, 5])
+        self.assertEqual(result['temp_max'].tolist(), [30, 5])
+        self.assertEqual(result['hum_sum'].tolist(), [180, 80])
+
+class TestSqliteDataStore(unittest.TestCase):
+    def setUp(self):
+
+        # base de dados temporária
+        self.data_dir = tempfile.mkdtemp()
+        self.store = SqliteDataStore(os.path.join(self.data_dir, 'test.db'), batch_size=10, flush_interval=60)
+        self.now = datetime.now()
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+    def make_entry(self, temperature, hours_ago):
+        return {
+            'temperature': temperature,
+            'humidity': 70,
+            'description': 'céu limpo',
+            'timestamp': (self.now - timedelta(hours=hours_ago)).isoformat()
+        }
+
+    def test_time_range_query(self):
+
+        # 48 horas de dados; pede apenas as últimas 12 horas
+        self.store.save_many([self.make_entry(h, h) for h in range(48, 0, -1)], location='porto')
+        history = self.store.get_weather_history(start=self.now - timedelta(hours=12, minutes=1), end=self.now)
+        self.assertEqual([e['temperature'] for e in history], list(range(12, 0, -1)))
+
+    def test_limit_returns_latest_in_order(self):
+        self.store.save_many([self.make_entry(h, h) for h in range(10, 0, -1)])
+        history = self.store.get_weather_history(limit=3)
+        self.assertEqual([e['temperature'] for e in history], [3, 2, 1])
+
+    def test_buffered_writes_visible_on_read(self):
+
+        # escritas abaixo do tamanho do lote ficam pendentes mas a leitura vê-as
+        self.store.save_weather_data(self.make_entry(20, 1), location='porto')
+        self.assertEqual(len(self.store._buffer), 1)
+        history = self.store.get_weather_history(location='porto')
+        self.assertEqual(len(history), 1)
+        self.assertEqual(history[0]['location'], 'porto')
+        self.assertEqual(self.store.get_weather_history(location='braga'), [])
+
+    def test_since_cursor_and_version(self):
+
+        # o cursor devolve as entradas seguintes por ordem e a versão muda a cada escrita
+        entries = [self.make_entry(h, h) for h in range(10, 0, -1)]
+        self.store.save_many(entries)
+        version = self.store.get_history_version()
+        history = self.store.get_weather_history(after=entries[4]['timestamp'], limit=3)
+        self.assertEqual([e['temperature'] for e in history], [5, 4, 3])
+        self.store.save_weather_data(self.make_entry(0, 0))
+        self.assertNotEqual(self.store.get_history_version(), version)
+
+    def test_incremental_rollups_match_backfill(self):
+
+        # os agregados mantidos a cada escrita coincidem com a reconstrução completa
+        for h in range(72, 0, -1):
+            self.store.save_weather_data(dict(self.make_entry(10 + h % 7, h), humidity=50 + h % 11), location='porto')
+        incremental = self.store.get_weather_aggregates('1h')
+        self.store.rebuild_rollups()
+        self.assertEqual(self.store.get_weather_aggregates('1h'), incremental)
+        self.assertEqual(sum(p['count'] for p in incremental), 72)
+
+    def test_daily_aggregates(self):
+
+        # mínimo, máximo e média por dia a partir dos rollups
+        self.store.save_many([self.make_entry(t, 0) for t in (10, 20, 30)])
+        points = self.store.get_weather_aggregates('1d', limit=1)
+        self.assertEqual(points[-1]['temperature_min'], 10)
+        self.assertEqual(points[-1]['temperature_max'], 30)
+        self.assertEqual(points[-1]['temperature_mean'], 20)
+
+    def test_legacy_rows_tagged_with_default_location(self):
+
+        # observações sem localização pertencem à parcela por omissão e aparecem no histórico dela
+        self.store.save_many([self.make_entry(20, 2)])
+        self.assertEqual(len(self.store.get_weather_history(location='porto')), 1)
+
+    def test_relabels_rows_stored_as_default(self):
+
+        # base anterior com linhas 'default': ao abrir passam para a parcela por omissão, agregados incluídos
+        self.store._insert([self.store._to_row(self.make_entry(t, 1), 'default') for t in (10, 20)])
+        self.store.save_many([self.make_entry(30, 1)], location='porto')
+        self.store.close()
+        self.store = SqliteDataStore(os.path.join(self.data_dir, 'test.db'), default_location='porto')
+        self.assertEqual(self.store.get_weather_history(location='default'), [])
+        self.assertEqual(len(self.store.get_weather_history(location='porto')), 3)
+        points = self.store.get_weather_aggregates('1d', location='porto')
+        self.assertEqual(sum(p['count'] for p in points), 3)
+        self.assertEqual(self.store.get_weather_aggregates('1d', location='default'), [])
+
+    def test_uses_index_for_range_scan(self):
+
+        # o plano de execução usa o índice por localização e tempo
+        plan = self.store._connection().execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM weather_observations WHERE location = ? AND ts >= ? ORDER BY ts DESC',
+            ('porto', 0)
+        ).fetchall()
+        self.assertTrue(any('idx_weather_location_ts' in row[3] for row in plan))
+
+if __name__ == '__main__':
+    unittest.main()
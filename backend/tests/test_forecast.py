@@ -0,0 +1,154 @@
+import unittest
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock
+import numpy as np
+from src.services.openweather_client import OpenWeatherClient
+from src.services.planning_service import PlanningService
+from src.services.recomendacao_service import RecomendacaoService
+from src.services.weather_service import WeatherService
+from src.storage.forecast_store import Forecast, ForecastStore
+from src.storage.sqlite_state import SqliteSnapshotStore
+
+# 1 de junho de 2024, 00:00 UTC; dois dias completos de intervalos de 3 horas (Lisboa, UTC+1)
+START = 1717200000
+FORECAST_FIXTURE = {
+    'cnt': 16,
+    'city': {'name': 'Porto', 'timezone': 3600},
+    'list': [
+        {
+            'dt': START + i * 10800,
+            'main': {'temp': [12, 16, 24, 30, 33, 27, 20, 14][i % 8] + (4 if i >= 8 else 0),
+                     'humidity': [90, 80, 60, 45, 40, 55, 70, 85][i % 8]},
+            'weather': [{'description': 'clear sky' if i % 2 else 'light rain'}]
+        }
+        for i in reversed(range(16))
+    ]
+}
+
+class FixtureHandler(BaseHTTPRequestHandler):
+
+    # servidor local com a resposta fixa do endpoint /forecast
+    def do_GET(self):
+        if not self.path.startswith('/data/2.5/forecast'):
+            self.send_error(404)
+            return
+        body = json.dumps(FORECAST_FIXTURE).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class TestForecastIngestion(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/data/2.5"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.weather_service = WeatherService(Mock())
+        self.weather_service.client = OpenWeatherClient(api_key='test', base_url=self.base_url, max_retries=0)
+
+    def test_fetch_forecast_is_columnar(self):
+        forecast = self.weather_service.fetch_forecast()
+
+        # colunas compactas, ordenadas por instante, com as descrições traduzidas uma vez
+        self.assertEqual(len(forecast), 16)
+        self.assertEqual(forecast.times.dtype, np.int64)
+        self.assertEqual(forecast.temperature.dtype, np.float32)
+        self.assertTrue(np.all(np.diff(forecast.times) > 0))
+        self.assertEqual(forecast.times[0], START)
+        self.assertEqual(sorted(forecast.descriptions), ['chuva fraca', 'céu limpo'])
+        self.assertEqual(forecast.description[:2], ['chuva fraca', 'céu limpo'])
+        self.assertEqual(forecast.timezone, 3600)
+
+        # publicada para as rotas
+        self.assertIs(self.weather_service.get_forecast(), self.weather_service.get_forecast())
+        self.assertEqual(self.weather_service.get_forecast().times.tolist(), forecast.times.tolist())
+
+    def test_fetch_all_forecasts(self):
+        results = self.weather_service.fetch_all_forecasts()
+        self.assertEqual(list(results), ['porto'])
+        self.assertEqual(self.weather_service.forecasts.version('porto'), 1)
+
+class TestForecastStore(unittest.TestCase):
+    def test_shared_between_processes(self):
+
+        # o processo que recolhe publica; outro lê as mesmas colunas através do SQLite
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'state.db')
+            leader = ForecastStore(SqliteSnapshotStore(db_path))
+            follower = ForecastStore(SqliteSnapshotStore(db_path))
+            self.assertIsNone(follower.get('porto'))
+            leader.publish(Forecast.from_api('porto', FORECAST_FIXTURE))
+            forecast = follower.get('porto')
+            self.assertEqual(forecast.times[0], START)
+            np.testing.assert_array_equal(forecast.humidity[:8], [90, 80, 60, 45, 40, 55, 70, 85])
+
+            # a conversão só se repete quando a versão muda
+            self.assertIs(follower.get('porto'), forecast)
+            leader.publish(Forecast.from_api('porto', FORECAST_FIXTURE))
+            self.assertIsNot(follower.get('porto'), forecast)
+
+class TestPlanningService(unittest.TestCase):
+    def setUp(self):
+        self.weather_service = WeatherService(Mock())
+        self.recomendacao_service = RecomendacaoService(locations=self.weather_service.locations)
+        self.planning_service = PlanningService(self.weather_service, self.recomendacao_service)
+        self.weather_service.forecasts.publish(Forecast.from_api('porto', FORECAST_FIXTURE))
+
+    def test_plan_matches_scalar_recommendations(self):
+        plan = self.planning_service.get_plan()
+        forecast = self.weather_service.get_forecast()
+
+        # dias locais (UTC+1): o primeiro intervalo (00:00 UTC) já pertence a 1 de junho
+        self.assertEqual(plan['crop'], 'uva')
+        self.assertEqual([day['date'] for day in plan['days']], ['2024-06-01', '2024-06-02'])
+
+        # cada intervalo com rega corresponde à recomendação calculada individualmente
+        expected = []
+        for temperature, humidity in zip(forecast.temperature, forecast.humidity):
+            expected.append(self.recomendacao_service.get_recommendation(
+                {'temperature': float(temperature), 'humidity': float(humidity), 'location': 'porto'}
+            ))
+        slots = [slot for day in plan['days'] for slot in day['irrigation_slots']]
+        self.assertEqual(len(slots), sum(1 for r in expected if r['should_irrigate']))
+        self.assertEqual([slot['intensity'] for slot in slots],
+                         [r['intensity'] for r in expected if r['should_irrigate']])
+
+        first_day = plan['days'][0]
+        self.assertEqual(first_day['temperature_min'], 12)
+        self.assertEqual(first_day['temperature_max'], 33)
+        self.assertTrue(first_day['should_irrigate'])
+        self.assertEqual(first_day['intensity'], 'elevada')
+
+    def test_plan_is_memoized_per_forecast_version(self):
+        plan = self.planning_service.get_plan()
+        self.assertIs(self.planning_service.get_plan(), plan)
+        self.assertEqual(len(self.planning_service.get_plan(days=1)['days']), 1)
+
+        # nova previsão: novo plano
+        self.weather_service.forecasts.publish(Forecast.from_api('porto', FORECAST_FIXTURE))
+        self.assertIsNot(self.planning_service.get_plan(), plan)
+
+    def test_no_forecast_yet(self):
+        planning_service = PlanningService(WeatherService(Mock()), self.recomendacao_service)
+        self.assertIsNone(planning_service.get_plan())
+        with self.assertRaises(KeyError):
+            planning_service.get_plan('desconhecida')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import subprocess
+import sys
+import textwrap
+from unittest.mock import patch
+from src.utils.green import OsThreadPool, is_green, run_blocking
+
+class TestGreen(unittest.TestCase):
+
+    def test_direct_call_without_eventlet(self):
+
+        # nos testes o eventlet não está ativo: a função é chamada diretamente
+        self.assertFalse(is_green())
+        self.assertEqual(run_blocking(lambda a, b=0: a + b, 1, b=2), 3)
+
+    def test_tpool_in_green_mode(self):
+
+        # em modo eventlet a chamada é delegada ao conjunto de threads do sistema
+        with patch('eventlet.patcher.is_monkey_patched', return_value=True), \
+                patch('eventlet.tpool.execute', return_value='ok') as execute:
+            func = lambda: 'direct'
+            self.assertEqual(run_blocking(func), 'ok')
+            execute.assert_called_once_with(func)
+    def test_thread_local_per_os_thread(self):
+
+        # com o monkey_patch (num processo à parte, tpool com um thread como no server.py) os pedidos
+        # partilham a ligação do thread do sistema em vez de abrirem uma por greenthread
+        script = textwrap.dedent('''
+            import os
+            os.environ['EVENTLET_THREADPOOL_SIZE'] = '1'
+            import eventlet
+            eventlet.monkey_patch()
+            import sqlite3, tempfile
+            from src.storage.sqlite_state import SqliteSnapshotStore
+            opened = []
+            connect = sqlite3.connect
+            sqlite3.connect = lambda *a, **k: opened.append(1) or connect(*a, **k)
+            store = SqliteSnapshotStore(os.path.join(tempfile.mkdtemp(), 'state.db'))
+            store.publish('porto', {'temperature': 20})
+            pool = eventlet.GreenPool()
+            for _ in range(50):
+                pool.spawn(lambda: (store.get('porto'), store.version('porto')))
+            pool.waitall()
+            print(len(opened))
+        ''')
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        self.assertLessEqual(int(output.strip()), 2)
+    def test_os_thread_pool_direct_without_eventlet(self):
+        pool = OsThreadPool(2)
+        self.assertEqual(pool.run(lambda a, b=0: a + b, 1, b=2), 3)
+        with self.assertRaises(ZeroDivisionError):
+            pool.run(lambda: 1 / 0)
+
+    def test_os_thread_pool_separate_from_tpool(self):
+
+        # em modo eventlet (processo à parte) o pool corre em paralelo e o tpool (1 thread) continua livre
+        script = textwrap.dedent('''
+            import os
+            os.environ['EVENTLET_THREADPOOL_SIZE'] = '1'
+            import eventlet
+            eventlet.monkey_patch()
+            import time
+            from eventlet import patcher, tpool
+            from src.utils.green import OsThreadPool
+            blocking_sleep = patcher.original('time').sleep
+            pool = OsThreadPool(2)
+            green = eventlet.GreenPool()
+            started = time.monotonic()
+            jobs = [green.spawn(pool.run, lambda: blocking_sleep(0.3) or 'ok') for _ in range(2)]
+            eventlet.sleep(0.05)
+            probe = time.monotonic()
+            tpool.execute(lambda: None)
+            probe = time.monotonic() - probe
+            results = [job.wait() for job in jobs]
+            try:
+                pool.run(lambda: 1 / 0)
+            except ZeroDivisionError:
+                results.append('raised')
+            print(results, round(time.monotonic() - started, 2), round(probe, 2))
+        ''')
+        output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+        results, elapsed, probe = output.rsplit(' ', 2)
+        self.assertEqual(results, "['ok', 'ok', 'raised']")
+        self.assertLess(float(elapsed), 0.55)
+        self.assertLess(float(probe), 0.1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import gzip
+import json
+from unittest.mock import Mock, patch
+from werkzeug.datastructures import Accept
+import app as app_module
+from src.utils.http_cache import EncodedBody, ResponseCache, negotiate_encoding
+
+# sem recolha real nos testes (o agendador arrancaria no primeiro pedido)
+app_module.SCHEDULER_AUTOSTART = False
+
+class TestResponseCache(unittest.TestCase):
+    def test_producer_called_once_per_key(self):
+        cache = ResponseCache(max_entries=10)
+        producer = Mock(return_value={'temperature': 21.5})
+        first = cache.get(('weather', 'porto', 1), producer)
+        second = cache.get(('weather', 'porto', 1), producer)
+        self.assertIs(first, second)
+        self.assertEqual(producer.call_count, 1)
+        self.assertEqual(json.loads(first.data), {'temperature': 21.5})
+
+        # nova versão dos dados: nova chave
+        cache.get(('weather', 'porto', 2), producer)
+        self.assertEqual(producer.call_count, 2)
+
+    def test_limits(self):
+
+        # limite de entradas e de memória (as mais antigas saem primeiro)
+        cache = ResponseCache(max_entries=2, max_bytes=10000)
+        for i in range(3):
+            cache.get(i, lambda: {'i': i})
+        self.assertEqual(len(cache), 2)
+        cache.get('big', lambda: ['x' * 20000])
+        self.assertEqual(len(cache), 2)
+
+    def test_compressed_variants(self):
+
+        # corpos grandes são comprimidos uma vez, com uma ETag por codificação
+        body = EncodedBody([{'temperature': 20 + i % 5, 'humidity': 70} for i in range(100)])
+        self.assertIn('gzip', body.encoded)
+        self.assertEqual(gzip.decompress(body.encoded['gzip']), body.data)
+        self.assertLess(len(body.encoded['gzip']), len(body.data))
+        self.assertEqual(body.etag('gzip'), f"{body.digest}-gzip")
+        self.assertEqual(EncodedBody({'a': 1}).encoded, {})
+
+    def test_negotiate_encoding(self):
+        self.assertEqual(negotiate_encoding(Accept([('gzip', 1), ('deflate', 1)])), 'gzip')
+        self.assertIsNone(negotiate_encoding(Accept([('gzip', 0)])))
+        self.assertIsNone(negotiate_encoding(Accept([])))
+
+class TestCachedRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.headers = {'Authorization': f"Bearer {app_module.token_service.issue_token('admin')}"}
+        self.weather_data = {'temperature': 31.0, 'humidity': 45, 'description': 'céu limpo',
+                             'timestamp': '2024-06-01T12:00:00', 'location': 'porto'}
+        app_module.weather_service.snapshots.publish('porto', self.weather_data)
+
+    def test_weather_etag_and_304(self):
+        response = self.client.get('/api/weather', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), self.weather_data)
+        etag = response.headers['ETag']
+
+        # o mesmo snapshot: 304 sem corpo; nova observação: nova ETag
+        again = self.client.get('/api/weather', headers=dict(self.headers, **{'If-None-Match': etag}))
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again.data, b'')
+        app_module.weather_service.snapshots.publish('porto', dict(self.weather_data, temperature=32.0))
+        changed = self.client.get('/api/weather', headers=dict(self.headers, **{'If-None-Match': etag}))
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+
+    def test_recommendation_computed_once_per_snapshot(self):
+        with patch.object(app_module.recomendacao_service, 'get_recommendation',
+                          wraps=app_module.recomendacao_service.get_recommendation) as get_recommendation:
+            first = self.client.get('/api/recommendations', headers=self.headers)
+            second = self.client.get('/api/recommendations', headers=self.headers)
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(get_recommendation.call_count, 1)
+        self.assertEqual(first.get_json(), app_module.recomendacao_service.get_recommendation(self.weather_data))
+
+    def test_history_gzip(self):
+        headers = dict(self.headers, **{'Accept-Encoding': 'gzip'})
+        response = self.client.get('/api/history/weather?limit=200', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        if response.headers.get('Content-Encoding') == 'gzip':
+            self.assertIsInstance(json.loads(gzip.decompress(response.data)), list)
+        else:
+            self.assertIsInstance(response.get_json(), list)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+import numpy as np
+import app as app_module
+from src.services.indicator_service import IndicatorService
+from src.storage.snapshot_store import SnapshotStore
+from src.utils.indicators import IndicatorAccumulator, RollingSum
+
+# sem recolha real nos testes (o agendador arrancaria no primeiro pedido)
+app_module.SCHEDULER_AUTOSTART = False
+
+START = datetime(2024, 6, 1).timestamp()
+
+class TestRollingSum(unittest.TestCase):
+    def test_window(self):
+
+        # só contam os intervalos dentro da janela
+        rolling = RollingSum(window=7200, bucket=3600)
+        rolling.add(START, 1)
+        rolling.add(START + 1800, 2)
+        rolling.add(START + 3600, 4)
+        self.assertEqual(rolling.value(), 7)
+        self.assertEqual(rolling.value(START + 3 * 3600), 4)
+        self.assertEqual(RollingSum.from_dict(rolling.to_dict()).value(), 4)
+
+class TestIndicatorAccumulator(unittest.TestCase):
+    def test_degree_days_match_trapezoid(self):
+
+        # a soma incremental é igual à integração do período completo
+        ts = START + np.arange(0, 3 * 86400, 600)
+        temps = 18 + 8 * np.sin(ts / 86400 * 2 * np.pi)
+        accumulator = IndicatorAccumulator()
+        for t, temp in zip(ts, temps):
+            accumulator.update(float(t), float(temp), 60)
+        mean = np.maximum((temps[1:] + temps[:-1]) / 2 - 10, 0)
+        expected = float(np.sum(mean * np.diff(ts)) / 86400)
+        self.assertAlmostEqual(accumulator.season_gdd, expected, places=6)
+        self.assertAlmostEqual(accumulator.snapshot()['gdd_7d'], round(expected, 2))
+
+    def test_gaps_order_and_season(self):
+        accumulator = IndicatorAccumulator(max_gap=3600)
+        accumulator.update(START, 20, 60)
+        accumulator.update(START + 3600, 20, 60)
+        self.assertAlmostEqual(accumulator.season_gdd, 10 / 24)
+
+        # falha longa não é integrada; observação antiga é ignorada
+        accumulator.update(START + 5 * 3600, 20, 60)
+        self.assertFalse(accumulator.update(START, 30, 60))
+        self.assertAlmostEqual(accumulator.season_gdd, 10 / 24)
+
+        # nova época (1 de abril) recomeça a soma
+        accumulator.update(datetime(2025, 4, 1, 12).timestamp(), 20, 60)
+        self.assertEqual((accumulator.season, accumulator.season_gdd), (2025, 0.0))
+
+    def test_mildew_risk(self):
+
+        # horas seguidas de folhagem húmida aumentam o risco; uma hora seca interrompe a sequência
+        accumulator = IndicatorAccumulator()
+        risks = []
+        for hour in range(12):
+            accumulator.update(START + hour * 3600, 18, 95)
+            risks.append(accumulator.mildew_risk())
+        self.assertEqual(risks[3], 'baixo')
+        self.assertEqual(risks[4], 'moderado')
+        self.assertEqual(risks[10], 'elevado')
+        accumulator.update(START + 12 * 3600, 18, 60)
+        snapshot = accumulator.snapshot()
+        self.assertEqual(snapshot['wet_hours_streak'], 0)
+        self.assertEqual(snapshot['wet_hours_24h'], 11)
+        self.assertEqual(snapshot['mildew_risk'], 'elevado')
+
+class TestIndicatorService(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.history = [
+            {'location': 'porto', 'timestamp': (datetime(2024, 6, 1) + timedelta(minutes=10 * i)).isoformat(),
+             'temperature': 15 + i % 12, 'humidity': 70 + i % 25}
+            for i in range(300)
+        ]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def service(self, history, checkpoint='indicators.json'):
+        weather_service = Mock()
+        weather_service.snapshots = SnapshotStore()
+        weather_service.locations.all.return_value = [{'id': 'porto'}]
+
+        def get_weather_history(start=None, after=None, location_id=None):
+            bound = after or start
+            return [e for e in history if e['timestamp'] > bound] if after else list(history)
+
+        weather_service.get_weather_history = Mock(side_effect=get_weather_history)
+        return IndicatorService(weather_service, checkpoint_file=os.path.join(self.tmp, checkpoint),
+                                checkpoint_interval=3600)
+
+    def test_restart_resumes_from_checkpoint(self):
+
+        # processo contínuo como referência
+        reference = self.service(self.history, 'reference.json')
+        reference.restore()
+        for entry in self.history:
+            reference.update(entry)
+
+        # o primeiro processo grava o ponto de retoma a meio; o seguinte só lê o que veio depois
+        first = self.service(self.history[:1])
+        first.restore()
+        for entry in self.history[1:200]:
+            first.update(entry)
+        first.stop()
+        second = self.service(self.history[:250])
+        self.assertEqual(second.restore(), 50)
+        self.assertIsNotNone(second.weather_service.get_weather_history.call_args.kwargs['after'])
+        for entry in self.history[250:]:
+            second.update(entry)
+        self.assertEqual(second.get_indicators('porto'), reference.get_indicators('porto'))
+
+class TestIndicatorsRoute(unittest.TestCase):
+    def test_indicators_with_recommendations(self):
+        client = app_module.app.test_client()
+        headers = {'Authorization': f"Bearer {app_module.token_service.issue_token('admin')}"}
+        weather_data = {'temperature': 20.0, 'humidity': 95, 'description': 'nublado',
+                        'timestamp': '2024-06-01T12:00:00', 'location': 'porto'}
+        app_module.weather_service.snapshots.publish('porto', weather_data)
+        indicators = {'gdd_season': 120.5, 'mildew_risk': 'elevado'}
+        app_module.weather_service.snapshots.publish(IndicatorService.key('porto'), indicators)
+        data = client.get('/api/indicators', headers=headers).get_json()
+        self.assertEqual(data['indicators'], indicators)
+        self.assertEqual(data['recommendations'], app_module.recomendacao_service.get_recommendation(weather_data))
+        dashboard = client.get('/api/dashboard?fields=indicators', headers=headers).get_json()
+        self.assertEqual(dashboard, {'indicators': indicators})
+        self.assertEqual(client.get('/api/indicators?location=nenhuma', headers=headers).status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
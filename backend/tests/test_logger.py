@@ -0,0 +1,37 @@
+import unittest
+import json
+import logging
+import logging.handlers
+import sys
+from src.utils.logger import JsonFormatter, setup_logger
+
+class TestLogger(unittest.TestCase):
+
+    def test_setup_is_idempotent(self):
+
+        # várias chamadas (uma por módulo) não acrescentam manipuladores
+        for _ in range(3):
+            logger = setup_logger()
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertIsInstance(logger.handlers[0], logging.handlers.QueueHandler)
+
+    def test_json_format(self):
+
+        # cada registo é uma linha JSON com os campos principais
+        record = logging.LogRecord('agrosmart', logging.WARNING, __file__, 10, 'Poll failed for %s', ('douro',), None)
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertEqual(entry['level'], 'WARNING')
+        self.assertEqual(entry['message'], 'Poll failed for douro')
+        self.assertEqual(entry['logger'], 'agrosmart')
+        self.assertIn('timestamp', entry)
+
+    def test_exception_included(self):
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.LogRecord('agrosmart', logging.ERROR, __file__, 10, 'failed', None, sys.exc_info())
+        entry = json.loads(JsonFormatter().format(record))
+        self.assertIn('ValueError: boom', entry['exception'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import json
+import os
+from werkzeug.security import generate_password_hash
+from src.storage.users import UserStore, VERIFY_LATENCY
+from src.utils.metrics import Registry
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_render(self):
+        requests_total = self.registry.counter('http_requests_total', 'Requests', ('method', 'status'))
+        requests_total.inc(method='GET', status=200)
+        requests_total.inc(method='GET', status=200)
+        requests_total.inc(method='POST', status=401)
+        self.assertEqual(requests_total.value(method='GET', status=200), 2)
+
+        # formato de texto do Prometheus
+        text = self.registry.render()
+        self.assertIn('# TYPE http_requests_total counter', text)
+        self.assertIn('http_requests_total{method="GET",status="200"} 2', text)
+        self.assertIn('http_requests_total{method="POST",status="401"} 1', text)
+
+    def test_registration_is_idempotent(self):
+
+        # o mesmo nome devolve a mesma métrica
+        first = self.registry.counter('calls_total', 'Calls')
+        second = self.registry.counter('calls_total', 'Calls')
+        self.assertIs(first, second)
+        self.assertEqual(self.registry.render().count('# TYPE calls_total'), 1)
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = self.registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            latency.observe(value, route='/api/weather')
+        with latency.time(route='/api/weather'):
+            pass
+        self.assertEqual(latency.count(route='/api/weather'), 5)
+
+        # cada limite inclui as observações abaixo dele (le = menor ou igual)
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{route="/api/weather",le="0.1"} 3', text)
+        self.assertIn('latency_seconds_bucket{route="/api/weather",le="1.0"} 4', text)
+        self.assertIn('latency_seconds_bucket{route="/api/weather",le="+Inf"} 5', text)
+        self.assertIn('latency_seconds_count{route="/api/weather"} 5', text)
+
+    def test_gauge_function_is_read_at_scrape(self):
+        sizes = {'HIGH': 1, 'LOW': 0}
+        gauge = self.registry.gauge('notifications', 'Notifications', ('severity',))
+        gauge.set_function(lambda: sizes)
+        sizes['HIGH'] = 4
+        self.assertIn('notifications{severity="HIGH"} 4', self.registry.render())
+
+        # uma função que falha não impede a recolha das restantes métricas
+        gauge.set_function(lambda: 1 / 0)
+        self.registry.gauge('cache_entries', 'Entries').set(3)
+        text = self.registry.render()
+        self.assertNotIn('notifications{', text)
+        self.assertIn('cache_entries 3', text)
+
+    def test_label_values_are_escaped(self):
+        self.registry.counter('errors_total', 'Errors', ('message',)).inc(message='a "b"\nc')
+        self.assertIn('errors_total{message="a \\"b\\"\\nc"} 1', self.registry.render())
+
+class TestVerifyUserMetrics(unittest.TestCase):
+    def setUp(self):
+        self.test_users_file = "data/test_metrics_users.json"
+        self.user_store = UserStore()
+        self.user_store.users_file = self.test_users_file
+        os.makedirs(os.path.dirname(self.test_users_file), exist_ok=True)
+        with open(self.test_users_file, 'w') as f:
+            json.dump({"admin": generate_password_hash("admin123")}, f)
+
+    def tearDown(self):
+        if os.path.exists(self.test_users_file):
+            os.remove(self.test_users_file)
+
+    def test_results_are_labelled(self):
+
+        # o resultado distingue verificação completa, cache e credenciais inválidas
+        before = {result: VERIFY_LATENCY.count(result=result) for result in ('valid', 'cached', 'invalid')}
+        self.assertTrue(self.user_store.verify_user("admin", "admin123"))
+        self.assertTrue(self.user_store.verify_user("admin", "admin123"))
+        self.assertFalse(self.user_store.verify_user("admin", "errada"))
+        for result in ('valid', 'cached', 'invalid'):
+            self.assertEqual(VERIFY_LATENCY.count(result=result), before[result] + 1)
+
+if __name__ == '__main__':
+    unittest.main()
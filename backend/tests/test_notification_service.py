@@ -53,5 +53,44 @@ class TestNotificationService(unittest.TestCase):
         # confirma que há menos ou igual número de alertas altos vs. médios
         self.assertTrue(len(high_severity) <= len(medium_severity))
 
+    def test_delete_and_acknowledge(self):
+
+        # apagar e confirmar por id
+        recommendation = {'temperature_status': 'elevada', 'humidity_status': 'baixa'}
+        created = self.notification_service.create_notification(recommendation)
+        self.assertEqual(len(self.notification_service.get_active_notifications()), 2)
+
+        self.assertTrue(self.notification_service.delete_notification(created[0]['id']))
+        self.assertTrue(self.notification_service.acknowledge_notification(created[1]['id']))
+        self.assertEqual(self.notification_service.get_active_notifications(), [])
+        self.assertFalse(self.notification_service.delete_notification('inexistente'))
+
+    def test_bounded_capacity(self):
+
+        # a memória fica limitada: as confirmadas saem primeiro, depois as mais antigas
+        service = NotificationService(capacity=3)
+        first = service.create_notification({'temperature_status': 'elevada', 'humidity_status': 'normal'})[0]
+        service.acknowledge_notification(first['id'])
+        second = service.create_notification({'temperature_status': 'normal', 'humidity_status': 'baixa'})[0]
+        for _ in range(2):
+            service.create_notification({'temperature_status': 'elevada', 'humidity_status': 'normal'})
+
+        self.assertEqual(len(service.store), 3)
+        self.assertIsNone(service.store.get(first['id']))
+        self.assertIsNotNone(service.store.get(second['id']))
+        service.create_notification({'temperature_status': 'elevada', 'humidity_status': 'normal'})
+        self.assertIsNone(service.store.get(second['id']))
+
+    def test_severity_buckets_keep_order(self):
+
+        # filtro por severidade mantém a ordem de chegada
+        self.notification_service.create_notification({'temperature_status': 'normal', 'humidity_status': 'baixa'})
+        self.notification_service.create_notification({'temperature_status': 'elevada', 'humidity_status': 'baixa'})
+        medium = self.notification_service.get_active_notifications('MEDIUM')
+        high = self.notification_service.get_active_notifications('HIGH')
+        self.assertEqual([n['severity'] for n in medium], ['MEDIUM', 'HIGH', 'MEDIUM'])
+        self.assertEqual([n['severity'] for n in high], ['HIGH'])
+        self.assertEqual(self.notification_service.store.counts(), {'HIGH': 1, 'MEDIUM': 2, 'LOW': 0})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
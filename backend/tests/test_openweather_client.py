@@ -0,0 +1,100 @@
+import unittest
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.services.openweather_client import OpenWeatherClient, CircuitOpenError
+
+class StubOpenWeatherHandler(BaseHTTPRequestHandler):
+
+    # respostas a devolver por ordem; a última repete-se
+    responses = []
+    calls = 0
+
+    def do_GET(self):
+        cls = type(self)
+        status, delay = cls.responses[min(cls.calls, len(cls.responses) - 1)]
+        cls.calls += 1
+        if delay:
+            time.sleep(delay)
+        body = json.dumps({
+            'main': {'temp': 22.5, 'humidity': 70},
+            'weather': [{'description': 'clear sky'}]
+        }).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class TestOpenWeatherClient(unittest.TestCase):
+    def setUp(self):
+
+        # servidor HTTP local que simula o OpenWeather
+        StubOpenWeatherHandler.responses = [(200, 0)]
+        StubOpenWeatherHandler.calls = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), StubOpenWeatherHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = OpenWeatherClient(
+            api_key='teste', base_url=f"http://127.0.0.1:{self.server.server_address[1]}/data/2.5",
+            read_timeout=0.2, max_retries=2, backoff=0.01, failure_threshold=2, reset_timeout=0.2
+        )
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_successful_request(self):
+        data = self.client.get_current({'q': 'Porto,PT'})
+        self.assertEqual(data['main']['temp'], 22.5)
+        self.assertEqual(self.client.metrics.snapshot()['count'], 1)
+
+    def test_retry_on_server_error(self):
+
+        # dois erros 500 seguidos de sucesso: o cliente tenta de novo
+        StubOpenWeatherHandler.responses = [(500, 0), (503, 0), (200, 0)]
+        data = self.client.get_current({'q': 'Porto,PT'})
+        self.assertEqual(data['main']['humidity'], 70)
+        self.assertEqual(StubOpenWeatherHandler.calls, 3)
+
+    def test_client_error_is_not_retried(self):
+        StubOpenWeatherHandler.responses = [(401, 0)]
+        with self.assertRaises(Exception):
+            self.client.get_current({'q': 'Porto,PT'})
+        self.assertEqual(StubOpenWeatherHandler.calls, 1)
+
+    def test_read_timeout(self):
+
+        # servidor lento: o pedido termina pelo tempo limite em vez de bloquear
+        StubOpenWeatherHandler.responses = [(200, 1)]
+        self.client.max_retries = 0
+        start = time.monotonic()
+        with self.assertRaises(Exception):
+            self.client.get_current({'q': 'Porto,PT'})
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(self.client.metrics.snapshot()['errors'], 1)
+
+    def test_circuit_breaker_opens_and_recovers(self):
+
+        # após duas falhas o disjuntor abre e não contacta o servidor
+        StubOpenWeatherHandler.responses = [(500, 0)]
+        self.client.max_retries = 0
+        for _ in range(2):
+            with self.assertRaises(Exception):
+                self.client.get_current({'q': 'Porto,PT'})
+        with self.assertRaises(CircuitOpenError):
+            self.client.get_current({'q': 'Porto,PT'})
+        self.assertEqual(StubOpenWeatherHandler.calls, 2)
+
+        # passado o tempo de espera, um pedido de teste bem-sucedido fecha-o
+        StubOpenWeatherHandler.responses = [(200, 0)]
+        StubOpenWeatherHandler.calls = 0
+        time.sleep(0.25)
+        self.client.get_current({'q': 'Porto,PT'})
+        self.assertEqual(self.client.circuit_breaker.state, 'closed')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+import threading
+from unittest.mock import patch
+from werkzeug.security import generate_password_hash
+import app as app_module
+from src.utils.password_verifier import PasswordVerifier, VerificationBusy
+
+# sem recolha real nos testes (o agendador arrancaria no primeiro pedido)
+app_module.SCHEDULER_AUTOSTART = False
+
+class TestPasswordVerifier(unittest.TestCase):
+    def setUp(self):
+        self.stored_hash = generate_password_hash('segredo')
+
+    def test_check(self):
+
+        # o resultado é o mesmo com e sem limite de verificações
+        for workers in (0, 2):
+            verifier = PasswordVerifier(workers=workers)
+            self.assertTrue(verifier.check(self.stored_hash, 'segredo'))
+            self.assertFalse(verifier.check(self.stored_hash, 'errada'))
+            self.assertEqual(verifier.pending, 0)
+
+    def test_busy_when_queue_full(self):
+
+        # sem lugar na fila recusa de imediato
+        with self.assertRaises(VerificationBusy):
+            PasswordVerifier(workers=1, max_pending=0).check(self.stored_hash, 'segredo')
+
+    def test_busy_after_timeout(self):
+
+        # todos os lugares ocupados durante mais do que o tempo limite
+        verifier = PasswordVerifier(workers=1, max_pending=4, timeout=0.05)
+        release = threading.Event()
+        with patch('src.utils.password_verifier.check_password_hash', side_effect=lambda *args: release.wait(5)):
+            worker = threading.Thread(target=verifier.check, args=(self.stored_hash, 'segredo'))
+            worker.start()
+            try:
+                with self.assertRaises(VerificationBusy):
+                    verifier.check(self.stored_hash, 'segredo')
+            finally:
+                release.set()
+                worker.join()
+        self.assertEqual(verifier.pending, 0)
+
+class TestLoginAdmission(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.ip_limiter = app_module.login_ip_limiter
+        self.user_limiter = app_module.login_user_limiter
+
+    def tearDown(self):
+        app_module.login_ip_limiter = self.ip_limiter
+        app_module.login_user_limiter = self.user_limiter
+
+    def test_ip_limit(self):
+        app_module.login_ip_limiter = app_module.KeyedRateLimiter(rate=0.01, capacity=2)
+        with patch.object(app_module.user_store, 'verify_user', return_value=False) as verify_user:
+            statuses = [self.client.post('/api/login', headers={'Authorization': 'Basic YWRtaW46eA=='}).status_code
+                        for _ in range(3)]
+        self.assertEqual(statuses, [401, 401, 429])
+
+        # a tentativa recusada não chega ao PBKDF2
+        self.assertEqual(verify_user.call_count, 2)
+
+    def test_user_limit_counts_failures_only(self):
+        app_module.login_user_limiter = app_module.KeyedRateLimiter(rate=0.01, capacity=1)
+        with patch.object(app_module.user_store, 'verify_user', return_value=True):
+            for _ in range(2):
+                self.assertEqual(self.client.post('/api/login', headers={'Authorization': 'Basic YWRtaW46eA=='}).status_code, 200)
+        with patch.object(app_module.user_store, 'verify_user', return_value=False):
+            self.assertEqual(self.client.post('/api/login', headers={'Authorization': 'Basic YWRtaW46eA=='}).status_code, 401)
+            response = self.client.post('/api/login', headers={'Authorization': 'Basic YWRtaW46eA=='})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers['Retry-After']), 1)
+
+    def test_busy(self):
+        with patch.object(app_module.user_store, 'verify_user', side_effect=VerificationBusy('full')):
+            response = self.client.post('/api/login', headers={'Authorization': 'Basic YWRtaW46eA=='})
+            self.assertEqual(response.status_code, 503)
+            self.assertIn('Retry-After', response.headers)
+            self.assertEqual(self.client.get('/api/locations', headers={'Authorization': 'Basic YWRtaW46eA=='}).status_code, 503)
+
+if __name__ == '__main__':
+    unittest.main()
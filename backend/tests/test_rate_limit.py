@@ -0,0 +1,51 @@
+import unittest
+import time
+from src.utils.rate_limit import KeyedRateLimiter, TokenBucket
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_refuse(self):
+
+        # a capacidade limita o número de pedidos imediatos
+        bucket = TokenBucket(rate=1, capacity=3)
+        self.assertEqual([bucket.try_acquire() for _ in range(4)], [True, True, True, False])
+
+    def test_refill_over_time(self):
+
+        # as fichas são repostas à taxa configurada
+        bucket = TokenBucket(rate=100, capacity=1)
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+        time.sleep(0.02)
+        self.assertTrue(bucket.try_acquire())
+
+    def test_acquire_timeout(self):
+
+        # sem fichas dentro do tempo limite, desiste
+        bucket = TokenBucket(rate=0.1, capacity=1)
+        bucket.try_acquire()
+        start = time.monotonic()
+        self.assertFalse(bucket.acquire(timeout=0.05))
+        self.assertLess(time.monotonic() - start, 1)
+
+class TestKeyedRateLimiter(unittest.TestCase):
+    def test_independent_keys(self):
+
+        # cada chave tem o seu balde; a recusa indica quanto tempo esperar
+        limiter = KeyedRateLimiter(rate=1, capacity=2)
+        self.assertEqual([limiter.try_acquire('a') for _ in range(2)], [0.0, 0.0])
+        self.assertGreater(limiter.try_acquire('a'), 0)
+        self.assertEqual(limiter.try_acquire('b'), 0.0)
+        self.assertGreater(limiter.retry_after('a'), 0)
+        self.assertEqual(limiter.retry_after('b'), 0.0)
+
+    def test_disabled_and_bounded(self):
+
+        # taxa 0 desativa; o número de chaves guardadas é limitado
+        self.assertEqual(KeyedRateLimiter(rate=0).try_acquire('a'), 0.0)
+        limiter = KeyedRateLimiter(rate=1, capacity=1, max_keys=3)
+        for key in range(10):
+            limiter.try_acquire(key)
+        self.assertEqual(len(limiter), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,34 @@
 import unittest
+import json
+import os
+import tempfile
+import numpy as np
 from src.services.recomendacao_service import RecomendacaoService
+from src.storage.crop_rules import CropRuleRegistry
+from src.storage.locations import LocationRegistry
+
+def legacy_recommendation(temp, humidity):
+
+    # regras originais da vinha (if/elif), usadas como referência
+    recommendation = {'should_irrigate': False, 'intensity': 'nenhuma', 'reason': '',
+                      'temperature_status': 'normal', 'humidity_status': 'normal', 'warnings': []}
+    if temp > 35:
+        recommendation.update(temperature_status='elevada', should_irrigate=True, intensity='elevada',
+                              reason='Temperatura elevada requer aumento da irrigação')
+        recommendation['warnings'].append('Temperatura elevada pode causar stress nas vinhas')
+    elif temp < 10:
+        recommendation['temperature_status'] = 'baixa'
+        recommendation['warnings'].append('Temperatura baixa pode atrasar o crescimento')
+    if humidity < 60:
+        recommendation.update(humidity_status='baixa', should_irrigate=True, intensity='elevada',
+                              reason='Humidade baixa pode afetar o desenvolvimento das uvas')
+    elif humidity > 85:
+        recommendation.update(humidity_status='elevada', reason='Humidade elevada - monitorizar doenças fúngicas')
+        recommendation['warnings'].append('Risco de míldio e outras doenças fúngicas')
+    else:
+        recommendation.update(intensity='média' if temp > 25 else 'baixa', should_irrigate=temp > 25,
+                              reason='Condições normais para a cultura da vinha')
+    return recommendation
 
 class TestRecomendacaoService(unittest.TestCase):
     def setUp(self):
@@ -61,5 +90,126 @@ class TestRecomendacaoService(unittest.TestCase):
         with self.assertRaises(Exception):
             self.service.get_recommendation(invalid_data)
 
+    def test_batch_matches_scalar(self):
+
+        # grelha que inclui os valores exatamente nos limiares
+        temps = np.r_[np.arange(-5, 45, 0.5), 9.99, 10.01, 24.99, 25.01, 34.99, 35.01]
+        hums = np.r_[np.arange(30, 100, 1.0), 59.99, 60.01, 84.99, 85.01]
+        grid_t, grid_h = np.meshgrid(temps, hums)
+
+        batch = self.service.get_recommendations_batch(grid_t.ravel(), grid_h.ravel())
+        records = self.service.batch_to_recommendations(batch)
+
+        # cada linha deve ser igual à recomendação individual e às regras originais
+        for t, h, record in zip(grid_t.ravel(), grid_h.ravel(), records):
+            expected = self.service.get_recommendation({'temperature': float(t), 'humidity': float(h)})
+            self.assertEqual(record, expected)
+            self.assertEqual(record, legacy_recommendation(float(t), float(h)))
+
+    def test_batch_columns(self):
+
+        # o resultado em colunas mantém o formato das leituras
+        batch = self.service.get_recommendations_batch([40, 22, 5], [70, 55, 90])
+        self.assertEqual(batch['should_irrigate'].tolist(), [True, True, False])
+        self.assertEqual(batch['intensity'].tolist(), ['média', 'elevada', 'nenhuma'])
+        self.assertEqual(batch['temperature_status'].tolist(), ['elevada', 'normal', 'baixa'])
+        self.assertEqual(batch['humidity_status'].tolist(), ['normal', 'baixa', 'elevada'])
+
+    def test_field_sensor_conditions(self):
+
+        # humidade do solo e molhamento foliar (opcionais) ajustam a recomendação
+        weather = {'temperature': 30, 'humidity': 70}
+        self.assertTrue(self.service.get_recommendation(weather)['should_irrigate'])
+        wet = self.service.get_recommendation(dict(weather, soil_moisture=40, leaf_wetness=80))
+        self.assertFalse(wet['should_irrigate'])
+        self.assertEqual(wet['warnings'], ['Folhas molhadas: condições favoráveis ao míldio'])
+        dry = self.service.get_recommendation(dict(weather, soil_moisture=10))
+        self.assertEqual((dry['should_irrigate'], dry['intensity']), (True, 'elevada'))
+
+        # sem leitura (ou NaN) o resultado é o das regras meteorológicas, também em lote
+        self.assertEqual(self.service.get_recommendation(dict(weather, soil_moisture=None)),
+                         self.service.get_recommendation(weather))
+        batch = self.service.get_recommendations_batch([30, 30, 30], [70, 70, 70])
+        with_sensors = self.service.rules.get().evaluate_batch(
+            {'temperature': [30, 30, 30], 'humidity': [70, 70, 70], 'soil_moisture': [np.nan, 40, 10]}
+        )
+        self.assertEqual(with_sensors['should_irrigate'].tolist(), [True, False, True])
+        self.assertEqual(with_sensors['intensity'][0], batch['intensity'][0])
+
+    def test_batch_shape_mismatch(self):
+
+        # colunas com tamanhos diferentes devem dar erro
+        with self.assertRaises(ValueError):
+            self.service.get_recommendations_batch([20, 21], [70])
+
+class TestCropRules(unittest.TestCase):
+    def setUp(self):
+
+        # ficheiros temporários de regras e de parcelas
+        self.tmp = tempfile.TemporaryDirectory()
+        self.rules_file = os.path.join(self.tmp.name, 'crop_rules.json')
+        locations_file = os.path.join(self.tmp.name, 'locations.json')
+        with open(locations_file, 'w', encoding='utf-8') as f:
+            json.dump([{'id': 'douro', 'name': 'Douro', 'crop': 'uva'},
+                       {'id': 'alentejo', 'name': 'Alentejo', 'crop': 'oliveira'}], f)
+        self.write_rules({'oliveira': {
+            'thresholds': {'temperature': {'high': 40}, 'humidity': {'low': 30}},
+            'rules': [
+                {'when': {'temperature': {'gt': 'high'}},
+                 'set': {'temperature_status': 'elevada', 'should_irrigate': True, 'intensity': 'média'},
+                 'warning': 'Calor extremo'},
+                {'when': {'humidity': {'lt': 'low'}}, 'set': {'humidity_status': 'baixa', 'reason': 'Ar seco'}}
+            ]
+        }})
+        self.rules = CropRuleRegistry(self.rules_file, check_interval=0)
+        self.service = RecomendacaoService(LocationRegistry(locations_file), self.rules)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_rules(self, rules):
+        with open(self.rules_file, 'w', encoding='utf-8') as f:
+            json.dump(rules, f)
+
+    def test_crop_from_location(self):
+
+        # a mesma leitura dá resultados diferentes consoante a cultura da parcela
+        vinha = self.service.get_recommendation({'temperature': 38, 'humidity': 25, 'location': 'douro'})
+        olival = self.service.get_recommendation({'temperature': 38, 'humidity': 25, 'location': 'alentejo'})
+        self.assertEqual(vinha['temperature_status'], 'elevada')
+        self.assertEqual(olival['temperature_status'], 'normal')
+        self.assertEqual(olival['reason'], 'Ar seco')
+        self.assertFalse(olival['should_irrigate'])
+
+        # e os limiares dos alertas seguem a cultura
+        self.assertEqual(self.service.get_thresholds('alentejo')[0], {'high': 40})
+
+    def test_batch_for_crop(self):
+        batch = self.service.get_recommendations_batch([45, 20], [20, 50], location_id='alentejo')
+        self.assertEqual(batch['should_irrigate'].tolist(), [True, False])
+        self.assertEqual(batch['warnings'].tolist(), [('Calor extremo',), ()])
+
+    def test_hot_reload(self):
+
+        # alterar o ficheiro recompila as regras e incrementa a versão
+        self.rules.get('oliveira')
+        version = self.rules.version
+        self.write_rules({'oliveira': {'thresholds': {'temperature': {'high': 30}}, 'rules': [
+            {'when': {'temperature': {'gt': 'high'}}, 'set': {'temperature_status': 'elevada'}}
+        ]}})
+        os.utime(self.rules_file, ns=(0, os.stat(self.rules_file).st_mtime_ns + 10 ** 9))
+
+        result = self.service.get_recommendation({'temperature': 35, 'humidity': 50}, crop='oliveira')
+        self.assertEqual(result['temperature_status'], 'elevada')
+        self.assertEqual(self.rules.version, version + 1)
+
+    def test_invalid_rules_keep_previous(self):
+
+        # regras com erros não substituem as já compiladas
+        self.rules.get('oliveira')
+        self.write_rules({'oliveira': {'rules': [{'when': {'temperature': {'gt': 'inexistente'}}}]}})
+        os.utime(self.rules_file, ns=(0, os.stat(self.rules_file).st_mtime_ns + 10 ** 9))
+        self.assertEqual(self.rules.get('oliveira').thresholds['temperature'], {'high': 40})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,185 @@
+import unittest
+import os
+import shutil
+import tempfile
+import sqlite3
+import time
+from unittest.mock import patch
+import app as app_module
+from src.services.sensor_service import SensorService
+from src.storage.locations import LocationRegistry
+from src.storage.sensor_store import SensorStore
+
+# sem recolha real nos testes (o agendador arrancaria no primeiro pedido)
+app_module.SCHEDULER_AUTOSTART = False
+
+class TestSensorService(unittest.TestCase):
+    def setUp(self):
+
+        # base de dados temporária e uma única parcela conhecida
+        self.tmp = tempfile.mkdtemp()
+        self.store = SensorStore(db_path=os.path.join(self.tmp, 'sensors.db'), batch_size=1000, flush_interval=60)
+        locations = LocationRegistry(default_location={'id': 'porto', 'name': 'Porto', 'city': 'Porto',
+                                                       'country': 'PT', 'crop': 'uva'})
+        self.service = SensorService(locations, store=self.store)
+        self.now = time.time()
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_json_validation(self):
+        batch = self.service.parse_json([
+            {'location': 'porto', 'sensor': 's1', 'timestamp': self.now - 60, 'soil_moisture': 30},
+            {'location': 'lisboa', 'sensor': 's1', 'soil_moisture': 30},
+            'texto',
+            {'location': 'porto', 'sensor': 's1', 'soil_moisture': 'seco'},
+            {'location': 'porto', 'soil_moisture': 30},
+            {'location': 'porto', 'sensor': 's1', 'timestamp': '2001-01-01T00:00:00', 'soil_moisture': 30},
+            {'location': 'porto', 'sensor': 's1'},
+            {'location': 'porto', 'sensor': 's1', 'leaf_wetness': 140},
+            {'location': 'porto', 'sensor': 's2', 'timestamp': (self.now - 30) * 1000, 'leaf_wetness': 70}
+        ])
+        result = self.service.ingest(batch)
+        self.assertEqual((result['accepted'], result['rejected']), (2, 7))
+        self.assertEqual([(error['index'], error['reason']) for error in result['errors']], [
+            (1, 'unknown_location'), (2, 'malformed'), (3, 'malformed'), (4, 'invalid_sensor'),
+            (5, 'invalid_timestamp'), (6, 'no_values'), (7, 'out_of_range')
+        ])
+
+    def test_line_protocol(self):
+        text = (
+            "# comentário\n"
+            f"campo,location=porto,sensor=s1 soil_moisture=12.5,temperature=21 {int(self.now - 10)}\n"
+            "\n"
+            "linha inválida\n"
+            f"campo,location=porto,sensor=s2 leaf_wetness=80 {int(self.now - 5) * 10 ** 9}\n"
+        )
+        result = self.service.ingest(self.service.parse_lines(text))
+        self.assertEqual(result['accepted'], 2)
+        self.assertEqual(result['errors'], [{'line': 4, 'reason': 'malformed'}])
+
+        # as leituras ficam em memória até ao lote estar cheio; a leitura do histórico força a escrita
+        self.assertEqual(self.store.pending, 2)
+        readings = self.service.get_readings('porto')
+        self.assertEqual([r['sensor'] for r in readings], ['s1', 's2'])
+        self.assertEqual(readings[0]['soil_moisture'], 12.5)
+        self.assertNotIn('leaf_wetness', readings[0])
+        self.assertEqual(self.store.pending, 0)
+
+    def test_conditions_keep_latest_reading(self):
+
+        # a leitura mais recente de cada grandeza vence, mesmo que chegue num lote anterior
+        self.service.ingest(self.service.parse_json([
+            {'location': 'porto', 'sensor': 's1', 'timestamp': self.now - 10, 'soil_moisture': 40},
+            {'location': 'porto', 'sensor': 's2', 'timestamp': self.now - 20, 'soil_moisture': 15}
+        ]))
+        self.service.ingest(self.service.parse_json([
+            {'location': 'porto', 'sensor': 's3', 'timestamp': self.now - 30, 'soil_moisture': 10,
+             'leaf_wetness': 60}
+        ]))
+        self.assertEqual(self.service.get_conditions('porto'), {'soil_moisture': 40, 'leaf_wetness': 60})
+        self.assertEqual(self.service.get_latest('porto')['soil_moisture']['sensor'], 's1')
+
+        # leituras antigas deixam de contar para as recomendações
+        self.service.stale_after = 5
+        self.assertEqual(self.service.get_conditions('porto'), {})
+
+    def test_batch_size_triggers_flush(self):
+        self.store.batch_size = 3
+        rows = [{'location': 'porto', 'sensor': 's1', 'timestamp': self.now - i, 'humidity': 80} for i in range(3)]
+        self.service.ingest(self.service.parse_json(rows))
+        self.assertEqual(self.store.pending, 0)
+        self.assertEqual(len(self.store.get_readings(location='porto')), 3)
+
+    def test_failed_flush_keeps_readings(self):
+
+        # leituras já aceites (202) não se perdem se a escrita falhar: ficam para a tentativa seguinte
+        rows = [{'location': 'porto', 'sensor': 's1', 'timestamp': self.now - i, 'humidity': 80} for i in range(3)]
+        self.service.ingest(self.service.parse_json(rows[:2]))
+        self.service.ingest(self.service.parse_json(rows[2:]))
+        with patch.object(self.store, '_connection', side_effect=sqlite3.OperationalError('disk I/O error')):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.store.flush()
+        self.assertEqual(self.store.pending, 3)
+        self.assertEqual(self.store.flush(), 3)
+        self.assertEqual(len(self.store.get_readings(location='porto')), 3)
+
+    def test_ingest_accepts_when_flush_fails(self):
+
+        # lote cheio com a base em baixo: o pedido é aceite e as condições atualizadas na mesma
+        self.store.batch_size = 2
+        rows = [{'location': 'porto', 'sensor': 's1', 'timestamp': self.now - i, 'soil_moisture': 20} for i in range(2)]
+        with patch.object(self.store, '_connection', side_effect=sqlite3.OperationalError('disk I/O error')):
+            result = self.service.ingest(self.service.parse_json(rows))
+        self.assertEqual(result['accepted'], 2)
+        self.assertEqual(self.service.get_conditions('porto'), {'soil_moisture': 20})
+        self.assertEqual(self.store.pending, 2)
+
+    def test_retained_readings_are_capped(self):
+
+        # escritas a falhar: ficam no máximo max_pending leituras, descartando os lotes mais antigos
+        self.store.batch_size = 2
+        self.store.max_pending = 4
+        with patch.object(self.store, '_connection', side_effect=sqlite3.OperationalError('disk I/O error')):
+            for i in range(5):
+                row = {'location': 'porto', 'sensor': f's{i}', 'timestamp': self.now - 10 + i, 'humidity': 80}
+                self.service.ingest(self.service.parse_json([row, dict(row, timestamp=self.now - 9 + i)]))
+        self.assertEqual(self.store.pending, 4)
+        self.assertEqual(self.store.flush(), 4)
+        self.assertEqual({r['sensor'] for r in self.store.get_readings(location='porto')}, {'s3', 's4'})
+
+    def test_batch_limit(self):
+        self.service.max_batch = 2
+        with self.assertRaises(OverflowError):
+            self.service.parse_json([{}] * 3)
+
+class TestSensorRoutes(unittest.TestCase):
+    def setUp(self):
+        self.client = app_module.app.test_client()
+        self.headers = {'Authorization': f"Bearer {app_module.token_service.issue_token('admin')}"}
+        self.weather_data = {'temperature': 28.0, 'humidity': 70, 'description': 'céu limpo',
+                             'timestamp': '2024-06-01T12:00:00', 'location': 'porto'}
+        app_module.weather_service.snapshots.publish('porto', self.weather_data)
+        app_module.weather_service.snapshots.publish(SensorService.key('porto'), {})
+
+    def tearDown(self):
+
+        # as condições de campo não passam para outros testes da aplicação
+        app_module.weather_service.snapshots.publish(SensorService.key('porto'), {})
+
+    def test_ingest_formats(self):
+        now = time.time()
+        response = self.client.post('/api/sensors/readings', headers=self.headers, json=[
+            {'location': 'porto', 'sensor': 'vinha-01', 'timestamp': now, 'soil_moisture': 25}
+        ])
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.get_json()['accepted'], 1)
+        response = self.client.post('/api/sensors/readings', headers=self.headers, content_type='text/plain',
+                                    data=f"campo,location=porto,sensor=vinha-02 leaf_wetness=10 {int(now)}\n")
+        self.assertEqual(response.status_code, 202)
+        latest = self.client.get('/api/sensors/latest', headers=self.headers).get_json()
+        self.assertEqual(latest['conditions'], {'soil_moisture': 25, 'leaf_wetness': 10})
+
+        # lote só com leituras inválidas ou corpo que não é uma lista
+        self.assertEqual(self.client.post('/api/sensors/readings', headers=self.headers,
+                                          json=[{'location': 'nenhuma'}]).status_code, 400)
+        self.assertEqual(self.client.post('/api/sensors/readings', headers=self.headers,
+                                          json={'location': 'porto'}).status_code, 400)
+        self.assertEqual(self.client.post('/api/sensors/readings', json=[]).status_code, 401)
+
+    def test_soil_moisture_feeds_recommendations(self):
+
+        # com 28°C recomenda-se rega; o solo húmido medido no campo dispensa-a
+        before = self.client.get('/api/recommendations', headers=self.headers).get_json()
+        self.assertTrue(before['should_irrigate'])
+        self.client.post('/api/sensors/readings', headers=self.headers, json=[
+            {'location': 'porto', 'sensor': 'vinha-01', 'timestamp': time.time(), 'soil_moisture': 38}
+        ])
+        after = self.client.get('/api/recommendations', headers=self.headers).get_json()
+        self.assertFalse(after['should_irrigate'])
+        dashboard = self.client.get('/api/dashboard?fields=recommendations', headers=self.headers).get_json()
+        self.assertEqual(dashboard['recommendations'], after)
+
+if __name__ == '__main__':
+    unittest.main()
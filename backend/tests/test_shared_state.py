@@ -0,0 +1,170 @@
+import unittest
+import os
+import tempfile
+import threading
+import time
+import uuid
+from unittest.mock import Mock
+from src.services.weather_scheduler import WeatherScheduler
+from src.services.socket_queue import SqliteQueueManager
+from src.storage.sqlite_state import SqliteNotificationStore, SqliteSnapshotStore
+from src.utils.file_lock import FileLock
+
+SEVERITY_LEVELS = {'HIGH': 3, 'MEDIUM': 2, 'LOW': 1}
+
+def make_notification(severity='HIGH', location=None):
+    notification = {
+        'id': str(uuid.uuid4()),
+        'type': 'ALERTA_TEMPERATURA',
+        'message': 'Temperatura elevada',
+        'severity': severity,
+        'timestamp': '2024-06-01T12:00:00',
+        'details': None
+    }
+    if location is not None:
+        notification['location'] = location
+    return notification
+
+class TestSqliteNotificationStore(unittest.TestCase):
+    def setUp(self):
+
+        # duas instâncias sobre o mesmo ficheiro simulam dois processos
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'state.db')
+        self.worker_a = SqliteNotificationStore(SEVERITY_LEVELS, capacity=3, db_path=self.db_path)
+        self.worker_b = SqliteNotificationStore(SEVERITY_LEVELS, capacity=3, db_path=self.db_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_shared_between_instances(self):
+
+        # o que um processo cria, o outro vê; a confirmação também é partilhada
+        notification = make_notification(location='douro')
+        self.worker_a.add(notification)
+        self.assertEqual(self.worker_b.list(), [dict(notification, acknowledged=False)])
+        self.assertTrue(self.worker_b.acknowledge(notification['id']))
+        self.assertEqual(self.worker_a.list(), [])
+        self.assertTrue(self.worker_a.get(notification['id'])['acknowledged'])
+
+    def test_severity_filter_and_order(self):
+        low = make_notification('LOW')
+        high = make_notification('HIGH')
+        medium = make_notification('MEDIUM')
+        for notification in (low, high, medium):
+            self.worker_a.add(notification)
+        self.assertEqual([n['id'] for n in self.worker_b.list('MEDIUM')], [high['id'], medium['id']])
+        self.assertEqual(self.worker_b.counts(), {'HIGH': 1, 'MEDIUM': 1, 'LOW': 1})
+
+    def test_capacity_evicts_acknowledged_first(self):
+        notifications = [make_notification() for _ in range(3)]
+        for notification in notifications:
+            self.worker_a.add(notification)
+        self.worker_a.acknowledge(notifications[1]['id'])
+        self.worker_b.add(make_notification())
+
+        # a confirmada sai antes da mais antiga
+        self.assertEqual(len(self.worker_a), 3)
+        self.assertIsNone(self.worker_a.get(notifications[1]['id']))
+        self.assertIsNotNone(self.worker_a.get(notifications[0]['id']))
+
+    def test_delete_and_clear(self):
+        notification = make_notification()
+        self.worker_a.add(notification)
+        self.assertTrue(self.worker_b.delete(notification['id']))
+        self.assertFalse(self.worker_b.delete(notification['id']))
+        self.worker_a.add(make_notification())
+        self.worker_b.clear()
+        self.assertEqual(len(self.worker_a), 0)
+
+class TestSqliteSnapshotStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp.name, 'state.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_publish_visible_to_other_instance(self):
+        leader = SqliteSnapshotStore(self.db_path)
+        follower = SqliteSnapshotStore(self.db_path, poll_interval=0.01)
+
+        # sem publicação: espera até ao limite e devolve None
+        self.assertIsNone(follower.get('porto', timeout=0.05))
+        leader.publish('porto', {'temperature': 20})
+        leader.publish('porto', {'temperature': 21})
+        self.assertEqual(follower.get('porto'), {'temperature': 21})
+        self.assertEqual(follower.version('porto'), 2)
+        self.assertEqual(follower.keys(), ['porto'])
+
+class TestLeaderElection(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.lock_path = os.path.join(self.tmp.name, 'scheduler.lock')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_file_lock_is_exclusive(self):
+        first = FileLock(self.lock_path)
+        second = FileLock(self.lock_path)
+        self.assertTrue(first.try_acquire())
+        self.assertFalse(second.try_acquire())
+
+        # libertado o trinco, o outro pode assumir
+        first.release()
+        self.assertTrue(second.try_acquire())
+        second.release()
+
+    def test_only_leader_polls(self):
+
+        # dois agendadores partilham o trinco: só um chama a API
+        service_a, service_b = Mock(), Mock()
+        service_a.fetch_all_locations.return_value = {}
+        service_b.fetch_all_locations.return_value = {}
+        scheduler_a = WeatherScheduler(service_a, interval=0.02, leader_lock=FileLock(self.lock_path))
+        scheduler_b = WeatherScheduler(service_b, interval=0.02, leader_lock=FileLock(self.lock_path))
+        scheduler_a.start()
+        time.sleep(0.1)
+        scheduler_b.start()
+        time.sleep(0.2)
+        self.assertTrue(scheduler_a.is_leader())
+        self.assertFalse(scheduler_b.is_leader())
+        self.assertEqual(service_b.fetch_all_locations.call_count, 0)
+
+        # ao parar o líder, o outro assume a recolha
+        scheduler_a.stop()
+        time.sleep(0.2)
+        scheduler_b.stop(timeout=1)
+        self.assertGreater(service_b.fetch_all_locations.call_count, 0)
+
+class TestSqliteQueueManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.url = 'sqlite:///' + os.path.join(self.tmp.name, 'queue.db')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_messages_reach_other_listener(self):
+
+        # o ouvinte só recebe mensagens publicadas depois de começar a escutar
+        publisher = SqliteQueueManager(self.url, write_only=True)
+        listener = SqliteQueueManager(self.url, write_only=True, poll_interval=0.01)
+        publisher._publish({'method': 'emit', 'event': 'old'})
+        received = []
+
+        def consume():
+            for message in listener._listen():
+                received.append(message)
+                return
+
+        thread = threading.Thread(target=consume, daemon=True)
+        thread.start()
+        time.sleep(0.1)
+        publisher._publish({'method': 'emit', 'event': 'weather_update', 'data': [{'temperature': 20}]})
+        thread.join(2)
+        self.assertEqual([message['event'] for message in received], ['weather_update'])
+
+if __name__ == '__main__':
+    unittest.main()
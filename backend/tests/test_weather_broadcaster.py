@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import Mock
+from src.services.weather_broadcaster import WeatherBroadcaster
+
+class TestWeatherBroadcaster(unittest.TestCase):
+    def setUp(self):
+
+        # socketio simulado para verificar os eventos enviados
+        self.socketio = Mock()
+        self.broadcaster = WeatherBroadcaster(self.socketio)
+        self.weather_data = {'temperature': 22.5, 'humidity': 70, 'description': 'céu limpo',
+                             'timestamp': '2024-06-01T12:00:00', 'location': 'douro'}
+
+    def test_emits_only_on_change(self):
+
+        # a mesma observação com outro timestamp não gera novo evento
+        self.assertTrue(self.broadcaster.publish(self.weather_data))
+        self.assertFalse(self.broadcaster.publish(dict(self.weather_data, timestamp='2024-06-01T12:00:20')))
+        self.assertTrue(self.broadcaster.publish(dict(self.weather_data, temperature=23.0)))
+        self.assertEqual(self.socketio.emit.call_count, 2)
+
+    def test_emits_to_location_room(self):
+        self.broadcaster.publish(self.weather_data)
+        self.socketio.emit.assert_called_once_with('weather_update', self.weather_data, to='location:douro')
+
+        # cada parcela tem a sua própria última observação
+        self.assertTrue(self.broadcaster.publish(dict(self.weather_data, location='alentejo')))
+
+    def test_stale_data_is_not_sent(self):
+        self.assertFalse(self.broadcaster.publish(dict(self.weather_data, stale=True)))
+        self.socketio.emit.assert_not_called()
+
+    def test_history_append_for_every_observation(self):
+
+        # o histórico recebe também as observações repetidas (que não geram weather_update)
+        repeated = dict(self.weather_data, timestamp='2024-06-01T12:00:20')
+        self.assertTrue(self.broadcaster.publish_history(self.weather_data))
+        self.assertTrue(self.broadcaster.publish_history(repeated))
+        self.socketio.emit.assert_called_with('history_append', repeated, to='location:douro')
+        self.assertEqual(self.socketio.emit.call_count, 2)
+        self.assertFalse(self.broadcaster.publish_history(dict(repeated, stale=True)))
+
+    def test_notification_room(self):
+        self.broadcaster.publish_notification({'id': '1', 'location': 'douro'})
+        self.socketio.emit.assert_called_once_with('notification', {'id': '1', 'location': 'douro'}, to='location:douro')
+
+if __name__ == '__main__':
+    unittest.main()
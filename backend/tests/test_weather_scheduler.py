@@ -0,0 +1,135 @@
+import unittest
+import time
+from unittest.mock import Mock
+from src.services.weather_scheduler import WeatherScheduler
+from src.storage.snapshot_store import SnapshotStore
+
+class TestWeatherScheduler(unittest.TestCase):
+    def setUp(self):
+
+        # serviço simulado que devolve sempre a mesma observação
+        self.weather_data = {'temperature': 22.5, 'humidity': 70}
+        self.weather_service = Mock()
+        self.weather_service.fetch_all_locations.return_value = {'porto': self.weather_data}
+        self.weather_service.locations.all.return_value = [{'id': 'porto'}]
+
+    def test_poll_once_notifies_listeners(self):
+        listener = Mock()
+        scheduler = WeatherScheduler(self.weather_service, interval=20, on_update=listener)
+        scheduler.poll_once()
+        listener.assert_called_once_with(self.weather_data)
+
+    def test_failed_location_is_skipped(self):
+
+        # uma parcela com erro não impede a notificação das restantes
+        self.weather_service.fetch_all_locations.return_value = {
+            'porto': self.weather_data, 'douro': Exception("API Error")
+        }
+        listener = Mock()
+        scheduler = WeatherScheduler(self.weather_service, interval=20, on_update=listener)
+        scheduler.poll_once()
+        listener.assert_called_once_with(self.weather_data)
+        self.assertEqual(scheduler.failures, 0)
+
+    def test_outage_counts_as_failure(self):
+
+        # sem nenhuma observação nova (parcelas com erro ou só recurso) as falhas acumulam
+        self.weather_service.fetch_all_locations.return_value = {
+            'porto': dict(self.weather_data, stale=True), 'douro': Exception("API Error")
+        }
+        listener = Mock()
+        scheduler = WeatherScheduler(self.weather_service, interval=0.01, on_update=listener)
+        scheduler.start()
+        time.sleep(0.1)
+        scheduler.stop()
+        self.assertTrue(scheduler.failures >= 1)
+        listener.assert_not_called()
+
+        # a primeira observação nova repõe o contador
+        self.weather_service.fetch_all_locations.return_value = {'porto': self.weather_data}
+        scheduler.poll_once()
+        self.assertEqual(scheduler.failures, 0)
+
+    def test_backoff_after_failures(self):
+
+        # após falhas o intervalo cresce, com jitter, até ao limite
+        scheduler = WeatherScheduler(self.weather_service, interval=10, max_backoff=60)
+        self.assertEqual(scheduler.next_delay(), 10)
+        scheduler.failures = 3
+        for _ in range(20):
+            self.assertTrue(10 <= scheduler.next_delay() <= 60)
+
+    def test_start_and_stop(self):
+
+        # o ciclo corre em segundo plano e termina de forma limpa
+        scheduler = WeatherScheduler(self.weather_service, interval=0.01)
+        scheduler.start()
+        time.sleep(0.1)
+        scheduler.stop()
+        self.assertFalse(scheduler.is_running())
+        self.assertTrue(self.weather_service.fetch_all_locations.call_count >= 1)
+
+    def test_leader_tasks_run_once_before_first_poll(self):
+
+        # tarefas de arranque correm no thread do agendador, uma vez, antes da primeira recolha
+        calls = []
+        self.weather_service.fetch_all_locations.side_effect = lambda: calls.append('poll') or {'porto': self.weather_data}
+        scheduler = WeatherScheduler(self.weather_service, interval=0.01)
+        scheduler.add_leader_task(lambda: calls.append('restore'))
+        scheduler.add_leader_task(Mock(side_effect=Exception("boom")))
+        scheduler.start()
+        time.sleep(0.1)
+        scheduler.stop()
+        self.assertEqual(calls[:2], ['restore', 'poll'])
+        self.assertEqual(calls.count('restore'), 1)
+
+    def test_leader_tasks_skipped_without_leadership(self):
+
+        # outro processo tem o trinco: nem recolha nem tarefas de arranque
+        lock = Mock()
+        lock.try_acquire.return_value = False
+        task = Mock()
+        scheduler = WeatherScheduler(self.weather_service, interval=0.01, leader_lock=lock)
+        scheduler.add_leader_task(task)
+        scheduler.start()
+        time.sleep(0.05)
+        scheduler.stop()
+        task.assert_not_called()
+        self.weather_service.fetch_all_locations.assert_not_called()
+
+    def test_forecasts_polled_per_interval(self):
+
+        # previsões só voltam a ser pedidas depois do intervalo próprio; após falha, na recolha seguinte
+        scheduler = WeatherScheduler(self.weather_service, interval=20, forecast_interval=3600)
+        self.weather_service.fetch_all_forecasts.side_effect = Exception("API Error")
+        self.assertIsNone(scheduler.poll_forecasts())
+        self.weather_service.fetch_all_forecasts.side_effect = None
+        self.weather_service.fetch_all_forecasts.return_value = {'porto': Mock()}
+        self.assertIsNotNone(scheduler.poll_forecasts())
+        self.assertIsNone(scheduler.poll_forecasts())
+        self.assertEqual(self.weather_service.fetch_all_forecasts.call_count, 2)
+
+    def test_failed_forecast_location_retried(self):
+
+        # com falha parcial só a parcela que falhou volta a ser pedida na recolha seguinte
+        self.weather_service.locations.all.return_value = [{'id': 'porto'}, {'id': 'douro'}]
+        scheduler = WeatherScheduler(self.weather_service, interval=20, forecast_interval=3600)
+        self.weather_service.fetch_all_forecasts.return_value = {'porto': Mock(), 'douro': Exception("API Error")}
+        scheduler.poll_forecasts()
+        self.weather_service.fetch_all_forecasts.assert_called_with(['porto', 'douro'])
+        self.weather_service.fetch_all_forecasts.return_value = {'douro': Mock()}
+        scheduler.poll_forecasts()
+        self.weather_service.fetch_all_forecasts.assert_called_with(['douro'])
+        self.assertIsNone(scheduler.poll_forecasts())
+
+    def test_snapshot_store(self):
+
+        # leitura sem espera devolve None antes da primeira publicação
+        store = SnapshotStore()
+        self.assertIsNone(store.get('Porto,PT'))
+        store.publish('Porto,PT', self.weather_data)
+        self.assertEqual(store.get('Porto,PT', timeout=1), self.weather_data)
+        self.assertEqual(store.version('Porto,PT'), 1)
+
+if __name__ == '__main__':
+    unittest.main()
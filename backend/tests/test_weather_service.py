@@ -2,6 +2,10 @@ import unittest
 from unittest.mock import Mock, patch
 from src.services.weather_service import WeatherService
 from src.storage.data_store import DataStore
+from src.storage.locations import LocationRegistry
+from src.utils.metrics import REGISTRY
+import json
+import os
 
 class TestWeatherService(unittest.TestCase):
     def setUp(self):
@@ -11,7 +15,7 @@ class TestWeatherService(unittest.TestCase):
         self.weather_service = WeatherService(self.mock_socketio)
         self.data_store = DataStore()
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_get_current_weather(self, mock_get):
 
         # simula a resposta da API do tempo
@@ -30,10 +34,10 @@ class TestWeatherService(unittest.TestCase):
         self.assertIn('description', weather_data)
         self.assertIn('timestamp', weather_data)
         
-        # verifica se o evento foi emitido
-        self.mock_socketio.emit.assert_called_once_with('weather_update', weather_data)
+        # os eventos são enviados apenas pelo agendador, não por cada leitura
+        self.mock_socketio.emit.assert_not_called()
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_weather_history(self, mock_get):
 
         # simula obtenção do histórico
@@ -47,7 +51,7 @@ class TestWeatherService(unittest.TestCase):
         history = self.weather_service.get_weather_history()
         self.assertIsInstance(history, list)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_weather_service_error(self, mock_get):
         
         # simula um erro na API
@@ -59,6 +63,96 @@ class TestWeatherService(unittest.TestCase):
         # confirma que não houve evento emitido
         self.mock_socketio.emit.assert_not_called()
 
+    @patch('requests.Session.get')
+    def test_latest_weather_snapshot(self, mock_get):
+
+        # a observação recolhida fica disponível para as rotas sem nova chamada
+        mock_get.return_value.json.return_value = {
+            'main': {'temp': 22.5, 'humidity': 70},
+            'weather': [{'description': 'clear sky'}]
+        }
+        mock_get.return_value.raise_for_status = Mock()
+
+        self.assertIsNone(self.weather_service.get_latest_weather(timeout=0))
+        weather_data = self.weather_service.fetch_current_weather()
+        self.assertEqual(self.weather_service.get_latest_weather(), weather_data)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.Session.get')
+    def test_fetch_all_locations(self, mock_get):
+
+        # várias parcelas recolhidas em paralelo, cada uma com o seu snapshot
+        mock_get.return_value.json.return_value = {
+            'main': {'temp': 22.5, 'humidity': 70},
+            'weather': [{'description': 'clear sky'}]
+        }
+        mock_get.return_value.raise_for_status = Mock()
+        locations_file = "data/test_locations.json"
+        with open(locations_file, 'w') as f:
+            json.dump([
+                {'id': 'douro', 'lat': 41.16, 'lon': -7.79},
+                {'id': 'minho', 'lat': 41.69, 'lon': -8.83}
+            ], f)
+        self.addCleanup(os.remove, locations_file)
+        self.weather_service.locations = LocationRegistry(locations_file)
+
+        results = self.weather_service.fetch_all_locations()
+        self.assertEqual(set(results), {'douro', 'minho'})
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(self.weather_service.get_latest_weather('douro')['location'], 'douro')
+        self.assertIn('lat', mock_get.call_args[1]['params'])
+
+    def test_invalid_locations_file_keeps_previous_registry(self):
+
+        # ficheiro vazio, lista vazia ou parcela sem id: regista o erro e mantém as parcelas carregadas
+        locations_file = "data/test_locations_reload.json"
+        self.addCleanup(os.remove, locations_file)
+        registry = LocationRegistry(locations_file)
+        with open(locations_file, 'w') as f:
+            json.dump([{'id': 'douro'}, {'id': 'minho'}], f)
+        self.assertEqual(registry.ids(), ['douro', 'minho'])
+        for content in ('', '[]', '{"id": "douro"}', '[{"name": "sem id"}]', '[{"id": "douro"'):
+            with open(locations_file, 'w') as f:
+                f.write(content)
+            with self.assertLogs('agrosmart', level='ERROR'):
+                self.assertEqual(registry.ids(), ['douro', 'minho'])
+            self.assertEqual(registry.get()['id'], 'douro')
+
+        # sem registo anterior válido fica a parcela por omissão
+        self.assertEqual(LocationRegistry(locations_file).get()['id'], 'porto')
+
+    @patch('requests.Session.get')
+    def test_fallback_to_last_good_observation(self, mock_get):
+
+        # com a API em baixo a leitura devolve a última observação válida, marcada como desatualizada
+        mock_get.return_value.json.return_value = {
+            'main': {'temp': 22.5, 'humidity': 70},
+            'weather': [{'description': 'clear sky'}]
+        }
+        mock_get.return_value.raise_for_status = Mock()
+        first = self.weather_service.fetch_current_weather()
+
+        mock_get.side_effect = Exception("API Error")
+        fallback = self.weather_service.get_current_weather()
+        self.assertTrue(fallback['stale'])
+        self.assertEqual(fallback['timestamp'], first['timestamp'])
+
+        # a recolha do agendador vê a falha
+        with self.assertRaises(Exception):
+            self.weather_service.fetch_current_weather()
+
+    @patch('requests.Session.get')
+    def test_fetch_latency_recorded(self, mock_get):
+
+        # a latência é medida na recolha (o caminho usado pelo agendador)
+        mock_get.return_value.json.return_value = {
+            'main': {'temp': 22.5, 'humidity': 70},
+            'weather': [{'description': 'clear sky'}]
+        }
+        mock_get.return_value.raise_for_status = Mock()
+        self.weather_service.fetch_current_weather()
+        self.assertIn('agrosmart_weather_current_seconds_count{outcome="success"}', REGISTRY.render())
+
     def tearDown(self):
 
         # limpeza após os testes
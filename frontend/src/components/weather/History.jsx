@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { fetchHistory } from '../../services/api';
 import socketService from '../../services/socket';
 import { FontAwesomeIcon } from '@fortawesome/react-fontawesome';
@@ -12,6 +12,14 @@ const History = () => {
     const [loading, setLoading] = useState(true); 
     const [error, setError] = useState(null); 
 
+    // Timestamp da última entrada conhecida (cursor para recuperar as entradas perdidas)
+    const lastTimestamp = useRef(null);
+    useEffect(() => {
+        if (history.length > 0) {
+            lastTimestamp.current = history[history.length - 1].timestamp;
+        }
+    }, [history]);
+
     useEffect(() => {
         // Função para obter os dados históricos da API
         const getHistoryData = async () => {
@@ -36,14 +44,38 @@ const History = () => {
         // Carrega os dados quando o componente é montado
         getHistoryData();
 
-        // Configura o listener para atualizações em tempo real usando o serviço de socket
-        const unsubscribe = socketService.on('weather_update', () => {
-            console.log('Received weather update from server, refreshing history...');
-            getHistoryData();
+        // Acrescenta apenas as entradas mais recentes do que a última, mantendo as últimas 24
+        const appendEntries = (entries) => {
+            setHistory(prev => {
+                const last = prev.length > 0 ? prev[prev.length - 1].timestamp : null;
+                const newer = entries.filter(entry => last === null || entry.timestamp > last);
+                return newer.length > 0 ? [...prev, ...newer].slice(-24) : prev;
+            });
+        };
+
+        // Nova entrada do histórico recebida por socket (uma por observação guardada)
+        const removeListener = socketService.on('history_append', (entry) => appendEntries([entry]));
+
+        // Após uma (re)ligação pede as entradas guardadas durante a interrupção
+        const removeConnectListener = socketService.on('connect', async () => {
+            const token = localStorage.getItem('token');
+            if (!token || !lastTimestamp.current) {
+                return;
+            }
+            try {
+                appendEntries(await fetchHistory(token, lastTimestamp.current));
+            } catch (err) {
+                console.error('Failed to recover missed history entries:', err);
+            }
         });
+        const unsubscribe = socketService.subscribe();
 
-        // Limpa o listener quando o componente é desmontado
-        return unsubscribe;
+        // Limpa os listeners e a subscrição quando o componente é desmontado
+        return () => {
+            removeListener();
+            removeConnectListener();
+            unsubscribe();
+        };
     }, []);
 
     // Função para selecionar o ícone adequado com base na descrição do tempo
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import { fetchNotifications, clearNotifications, deleteNotification } from '../../services/api'; 
+import socketService from '../../services/socket';
 
 // Componente que gere e apresenta as notificações e alertas do sistema
 const Notifications = () => {
@@ -43,6 +44,21 @@ const Notifications = () => {
 
         // Carrega as notificações quando o componente é montado
         getNotifications();
+
+        // Recebe por socket apenas os novos alertas da parcela subscrita, enviados uma vez por mudança de estado
+        const removeListener = socketService.on('notification', (notification) => {
+            setNotifications(prev => [
+                ...prev.filter(n => n.id !== notification.id),
+                { ...notification, read: false, ignored: false }
+            ]);
+        });
+        const unsubscribe = socketService.subscribe();
+
+        // Limpa o listener e a subscrição quando o componente é desmontado
+        return () => {
+            removeListener();
+            unsubscribe();
+        };
     }, []);
 
     // Função para marcar uma notificação como lida
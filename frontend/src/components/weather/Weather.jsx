@@ -43,13 +43,18 @@ const Weather = () => {
         getWeather();
 
         // Configura o listener para atualizações em tempo real usando o serviço de socket
-        const unsubscribe = socketService.on('weather_update', (data) => {
+        // (o servidor só envia eventos da parcela subscrita e quando a observação muda)
+        const removeListener = socketService.on('weather_update', (data) => {
             console.log('Received weather update from server, refreshing weather data...');
             setWeather(data);
         });
+        const unsubscribe = socketService.subscribe();
 
-        // Limpa o listener quando o componente é desmontado
-        return unsubscribe;
+        // Limpa o listener e a subscrição quando o componente é desmontado
+        return () => {
+            removeListener();
+            unsubscribe();
+        };
     }, []);
 
     // Função para selecionar o ícone adequado com base na descrição do tempo
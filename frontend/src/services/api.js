@@ -3,24 +3,56 @@ import axios from 'axios';
 // Define o endereço base da API para todos os pedidos
 const API_BASE_URL = 'http://localhost:5000/api';
 
-// Obtém os dados meteorológicos atuais do servidor
-export const fetchWeather = async (token) => {
-    const response = await fetch(`${API_BASE_URL}/weather`, {
+// Pedido ao painel em curso, partilhado pelos componentes que carregam ao mesmo tempo
+let dashboardRequest = null;
+
+// Obtém várias secções (tempo, recomendações, notificações, histórico) num único pedido
+export const fetchDashboard = async (token, fields = null) => {
+    const query = fields ? `?fields=${encodeURIComponent(fields.join(','))}` : '';
+    const response = await fetch(`${API_BASE_URL}/dashboard${query}`, {
         headers: {
-            'Authorization': 'Basic ' + token
+            'Authorization': 'Bearer ' + token
         }
     });
     if (!response.ok) {
-        throw new Error('Failed to fetch weather data');
+        throw new Error('Failed to fetch dashboard');
     }
     return response.json();
 };
 
+// Devolve uma secção do painel; chamadas simultâneas reutilizam o mesmo pedido
+const fetchDashboardSection = async (token, section, errorMessage) => {
+    if (!dashboardRequest) {
+        dashboardRequest = fetchDashboard(token);
+        const clear = () => { dashboardRequest = null; };
+        dashboardRequest.then(clear, clear);
+    }
+    let data;
+    try {
+        data = await dashboardRequest;
+    } catch (err) {
+        throw new Error(errorMessage);
+    }
+    if (data[section] === null || data[section] === undefined) {
+        throw new Error(errorMessage);
+    }
+    return data[section];
+};
+
+// Obtém os dados meteorológicos atuais do servidor
+export const fetchWeather = async (token) => {
+    return fetchDashboardSection(token, 'weather', 'Failed to fetch weather data');
+};
+
 // Obtém o histórico de dados meteorológicos armazenados
-export const fetchHistory = async (token) => {
-    const response = await fetch(`${API_BASE_URL}/history/weather`, {
+// Com `since` devolve apenas as entradas posteriores a esse timestamp
+export const fetchHistory = async (token, since = null) => {
+    if (!since) {
+        return fetchDashboardSection(token, 'history', 'Failed to fetch history data');
+    }
+    const response = await fetch(`${API_BASE_URL}/history/weather?since=${encodeURIComponent(since)}`, {
         headers: {
-            'Authorization': 'Basic ' + token
+            'Authorization': 'Bearer ' + token
         }
     });
     if (!response.ok) {
@@ -31,28 +63,12 @@ export const fetchHistory = async (token) => {
 
 // Obtém recomendações para irrigação com base nos dados meteorológicos
 export const fetchRecommendations = async (token) => {
-    const response = await fetch(`${API_BASE_URL}/recommendations`, {
-        headers: {
-            'Authorization': 'Basic ' + token
-        }
-    });
-    if (!response.ok) {
-        throw new Error('Failed to fetch recommendations');
-    }
-    return response.json();
+    return fetchDashboardSection(token, 'recommendations', 'Failed to fetch recommendations');
 };
 
 // Obtém as notificações e alertas do utilizador
 export const fetchNotifications = async (token) => {
-    const response = await fetch(`${API_BASE_URL}/notifications`, {
-        headers: {
-            'Authorization': 'Basic ' + token
-        }
-    });
-    if (!response.ok) {
-        throw new Error('Failed to fetch notifications');
-    }
-    return response.json();
+    return fetchDashboardSection(token, 'notifications', 'Failed to fetch notifications');
 };
 
 // Apaga uma notificação específica usando o seu identificador
@@ -60,7 +76,7 @@ export const deleteNotification = async (token, id) => {
     const response = await fetch(`${API_BASE_URL}/notifications/${id}`, {
         method: 'DELETE',
         headers: {
-            'Authorization': 'Basic ' + token
+            'Authorization': 'Bearer ' + token
         }
     });
     if (!response.ok) {
@@ -74,7 +90,7 @@ export const clearNotifications = async (token) => {
     const response = await fetch(`${API_BASE_URL}/notifications`, {
         method: 'DELETE',
         headers: {
-            'Authorization': 'Basic ' + token
+            'Authorization': 'Bearer ' + token
         }
     });
     if (!response.ok) {
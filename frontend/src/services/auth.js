@@ -19,9 +19,10 @@ export async function login(username, password) {
     // Se a resposta não for bem-sucedida, lança um erro
     if (!response.ok) throw new Error('Login failed');
     
-    // Guarda o token de autenticação no armazenamento local do navegador
-    // para manter o utilizador autenticado entre visitas
-    localStorage.setItem('token', btoa(username + ':' + password));
+    // Guarda o token assinado devolvido pelo servidor no armazenamento local do navegador
+    // para manter o utilizador autenticado entre visitas sem reenviar a palavra-passe
+    const data = await response.json();
+    localStorage.setItem('token', data.token);
 }
 
 
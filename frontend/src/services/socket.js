@@ -6,17 +6,54 @@ class SocketService {
     constructor() {
         this.socket = null;
         this.listeners = {};
+
+        // Parcelas subscritas e número de componentes interessados em cada uma
+        this.subscriptions = {};
     }
 
     // Inicializa a conexão socket
     connect() {
         if (!this.socket) {
             this.socket = io(SOCKET_SERVER_URL);
+
+            // Repõe as subscrições a cada (re)ligação
+            this.socket.on('connect', () => {
+                Object.keys(this.subscriptions).forEach(key => {
+                    this.socket.emit('subscribe', { location: key || null });
+                });
+            });
             console.log('Socket connected to server');
         }
         return this.socket;
     }
 
+    // Subscreve as atualizações de uma parcela (sem parcela: a predefinida)
+    subscribe(location = null) {
+        const key = location || '';
+        this.subscriptions[key] = (this.subscriptions[key] || 0) + 1;
+        if (!this.socket) {
+            this.connect();
+        } else if (this.subscriptions[key] === 1 && this.socket.connected) {
+            this.socket.emit('subscribe', { location });
+        }
+        return () => this.unsubscribe(location);
+    }
+
+    // Cancela a subscrição quando nenhum componente precisa dela
+    unsubscribe(location = null) {
+        const key = location || '';
+        if (!this.subscriptions[key]) {
+            return;
+        }
+        this.subscriptions[key] -= 1;
+        if (this.subscriptions[key] === 0) {
+            delete this.subscriptions[key];
+            if (this.socket && this.socket.connected) {
+                this.socket.emit('unsubscribe', { location });
+            }
+        }
+    }
+
     // Desconecta o socket
     disconnect() {
         if (this.socket) {